@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Shell history search benchmark.
+Indexes a synthetic history and compares HistoryIndex.search with a linear
+scan of the entries, newest first, for a few typical queries.
+
+Usage: python scripts/bench_history_search.py [entries] [limit]
+       (defaults: 300000 entries, 20 results)
+"""
+
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.shell.command_history import HistoryIndex, tokenize
+
+VERBS = ["create folder called", "delete file called", "find files named", "remind me to", "backup data to", "list files in"]
+WORDS = ["report", "project", "invoice", "photos", "notes", "budget", "draft", "archive", "music", "taxes"]
+
+
+def generate(count, seed=7):
+    rng = random.Random(seed)
+    return [f"{rng.choice(VERBS)} {rng.choice(WORDS)}{rng.randrange(5000)}" for _ in range(count)]
+
+
+def linear_search(entries, query, limit):
+    words = tokenize(query)
+    results, seen = [], set()
+    for command in reversed(entries):
+        tokens = tokenize(command)
+        if command in seen or not all(w in tokens for w in words[:-1]):
+            continue
+        if not any(t.startswith(words[-1]) for t in tokens):
+            continue
+        seen.add(command)
+        results.append(command)
+        if len(results) >= limit:
+            break
+    return results
+
+
+def measure(fn, *args, repeat=200):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = fn(*args)
+    return (time.perf_counter() - start) / repeat * 1000, result
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 300000
+    limit = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    entries = generate(count)
+    index = HistoryIndex()
+    start = time.perf_counter()
+    for command in entries:
+        index.add(command)
+    print(f"History search benchmark: {count} entries, indexed in {time.perf_counter() - start:.2f} s")
+    print("=" * 60)
+    for query in ["create", "delete file called invoice42", "remind taxes49", "find files named pho", "backup zzz"]:
+        indexed_ms, found = measure(index.search, query, limit)
+        scan_ms, expected = measure(linear_search, entries, query, limit, repeat=5)
+        assert [cmd for _, cmd in found] == expected, query
+        print(f"{query!r:32} index {indexed_ms:>8.3f} ms   scan {scan_ms:>9.2f} ms   {len(found)} hits")
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Intent matcher throughput benchmark.
+Compares the compiled single-pass IntentMatcher against the previous
+substring scan + per-intent re.search implementation of AIEngine.process_input.
+
+Usage: python scripts/bench_intent_matcher.py [iterations]
+"""
+
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.core.ai_engine import AIEngine
+from src.core.intent_matcher import IntentMatcher
+
+
+def legacy_process_input(user_input, intent_patterns=AIEngine.INTENT_PATTERNS):
+    user_input_lower = user_input.lower()
+    for intent, patterns in intent_patterns.items():
+        if any(p in user_input_lower for p in patterns):
+            if intent == "find_files":
+                match = re.search(r"find (.+)", user_input_lower)
+                query = match.group(1) if match else ""
+                return {"intent": intent, "query": query, "confidence": 0.9}
+            if intent == "create_folder":
+                match = re.search(r"create folder(?: called)? ?([\w.\- ]+)?", user_input_lower)
+                folder = match.group(1).strip() if match and match.group(1) else "new_folder"
+                return {"intent": intent, "folder": folder, "confidence": 0.9}
+            if intent == "delete_file":
+                match = re.search(r"delete file(?: called)? ?([\w.\- ]+)?", user_input_lower)
+                filename = match.group(1).strip() if match and match.group(1) else ""
+                return {"intent": intent, "filename": filename, "confidence": 0.9}
+            return {"intent": intent, "confidence": 0.9}
+    return {"intent": "unknown", "confidence": 0.3}
+
+
+SAMPLES = [
+    "list files",
+    "please find quarterly report.pdf",
+    "create folder called projects",
+    "delete file called old_report.txt",
+    "what's the system status?",
+    "show system specs",
+    "make a backup of everything",
+    "What is the weather like today?",
+    "Can you write a python function that parses a csv file and returns the rows?",
+    "tell me a joke about transformers and attention heads",
+]
+
+
+def bench(name, fn, inputs, iterations):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        for text in inputs:
+            fn(text)
+    elapsed = time.perf_counter() - start
+    calls = iterations * len(inputs)
+    print(f"{name:12}: {calls / elapsed:>12,.0f} calls/s  ({elapsed * 1e6 / calls:.2f} us/call)")
+    return elapsed
+
+
+if __name__ == "__main__":
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    matcher = IntentMatcher(AIEngine.INTENT_PATTERNS)
+    print(f"Intent matcher benchmark: {len(SAMPLES)} inputs x {iterations} iterations")
+    print("=" * 50)
+    legacy = bench("legacy", legacy_process_input, SAMPLES, iterations)
+    compiled = bench("compiled", matcher.classify, SAMPLES, iterations)
+    print(f"Speedup: {legacy / compiled:.2f}x")
+    print("\nIntent differences (legacy -> compiled):")
+    for text in SAMPLES:
+        old, new = legacy_process_input(text)["intent"], matcher.classify(text)["intent"]
+        if old != new:
+            print(f"  {text!r}: {old} -> {new}")
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+GET /logs tail-read benchmark.
+Generates an action log of the requested size and compares the old
+readlines()-then-slice approach with the backward block reader used by /logs.
+
+Usage: python scripts/bench_log_tail.py [size_mb] [count] [path]
+       (defaults: 2048 MB, 20 entries, a file in the system temp dir)
+"""
+
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.core.masterAIAgent.logReader import tail_entries
+
+
+def generate_log(path, size_mb):
+    target = size_mb * 1024 * 1024
+    if os.path.exists(path) and os.path.getsize(path) >= target:
+        return
+    print(f"Generating {size_mb} MB log at {path} ...")
+    entry = {
+        "timestamp": "2025-11-05T21:46:16.019680", "user_id": "user123",
+        "input_text": "create folder called projects", "action_type": "chat",
+        "context": None, "llm_response": "Creating folder: projects"
+    }
+    chunk = "".join(json.dumps({**entry, "seq": i}) + "\n" for i in range(10000))
+    with open(path, "w") as f:
+        written = 0
+        while written < target:
+            f.write(chunk)
+            written += len(chunk)
+
+
+def legacy_tail(path, count):
+    with open(path, "r") as logf:
+        lines = logf.readlines()[-count:]
+        return [json.loads(line) for line in lines]
+
+
+def measure(name, fn, *args):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = fn(*args)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{name:10}: {elapsed * 1000:>10.2f} ms  peak memory {peak / 1024 / 1024:>9.2f} MB")
+    return result
+
+
+if __name__ == "__main__":
+    size_mb = int(sys.argv[1]) if len(sys.argv) > 1 else 2048
+    count = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    path = sys.argv[3] if len(sys.argv) > 3 else os.path.join(tempfile.gettempdir(), "tess_bench_action_log.jsonl")
+    generate_log(path, size_mb)
+    print(f"Log tail benchmark: {os.path.getsize(path) / 1024 / 1024:.0f} MB file, last {count} entries")
+    print("=" * 50)
+    new = measure("tail", tail_entries, path, count)
+    old = measure("readlines", legacy_tail, path, count)
+    assert new == old, "tail reader returned different entries"
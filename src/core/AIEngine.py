@@ -1,4 +1,4 @@
-import re
+from src.core.intent_matcher import IntentMatcher
 
 class AIEngine:
     INTENT_PATTERNS = {
@@ -15,60 +15,20 @@ class AIEngine:
     }
 
     def __init__(self):
+        # Compile the intent table once; every call is then a single regex scan
+        self.matcher = IntentMatcher(self.INTENT_PATTERNS)
         print("AI Engine initialized (basic intent matcher)")
 
     def process_input(self, user_input: str):
-        user_input_lower = user_input.lower()
-        for intent, patterns in self.INTENT_PATTERNS.items():
-            if any(p in user_input_lower for p in patterns):
-                # Try to extract search/query for find_files intent
-                if intent == "find_files":
-                    match = re.search(r"find (.+)", user_input_lower)
-                    query = match.group(1) if match else ""
-                    return {
-                        "intent": intent,
-                        "text": f"Searching for: {query}" if query else "What would you like me to find?",
-                        "query": query,
-                        "confidence": 0.9
-                    }
-                # Try to extract folder name for create_folder intent
-                if intent == "create_folder":
-                    match = re.search(r"create folder(?: called)? ?([\w.\- ]+)?", user_input_lower)
-                    folder = match.group(1).strip() if match and match.group(1) else "new_folder"
-                    return {
-                        "intent": intent,
-                        "text": f"Creating folder: {folder}",
-                        "folder": folder,
-                        "confidence": 0.9
-                    }
-                if intent == "delete_file":
-                    match = re.search(r"delete file(?: called)? ?([\w.\- ]+)?", user_input_lower)
-                    filename = match.group(1).strip() if match and match.group(1) else ""
-                    return {
-                        "intent": intent,
-                        "text": f"Delete file: {filename if filename else '[no file detected]'}",
-                        "filename": filename,
-                        "confidence": 0.9
-                    }
-                if intent == "backup_data":
-                    return {
-                        "intent": intent,
-                        "text": "Preparing to back up your Documents folder...",
-                        "confidence": 0.95
-                    }
-            
-                
-                return {
-                    "intent": intent,
-                    "text": f"Detected intent: {intent}",
-                    "confidence": 0.9
-                }
-                
-        return {
-            "intent": "unknown",
-            "text": "Sorry, I didn't understand. Try asking about files, system, or type 'help'.",
-            "confidence": 0.3
-        }
+        return self.matcher.classify(user_input)
+
+    def process_batch(self, user_inputs):
+        # Repeated commands in a batch are classified once
+        results = {}
+        for text in user_inputs:
+            if text not in results:
+                results[text] = self.process_input(text)
+        return [results[text] for text in user_inputs]
 
 import os
 
@@ -0,0 +1,139 @@
+import re
+from typing import Dict, List, Optional, Pattern, Tuple
+
+# Trigger phrases that carry an argument after them: phrase -> (argument name, pattern).
+ARGUMENT_PATTERNS = {
+    "find": ("query", r" (.+)"),
+    "create folder": ("folder", r"(?: called)? ?([\w.\- ]+)?"),
+    "delete file": ("filename", r"(?: called)? ?([\w.\- ]+)?"),
+}
+
+UNKNOWN_RESPONSE = {
+    "intent": "unknown",
+    "text": "Sorry, I didn't understand. Try asking about files, system, or type 'help'.",
+    "confidence": 0.3
+}
+
+
+def _trie_pattern(phrases) -> str:
+    """
+    Build a regex alternation factored by common prefixes, so the engine walks
+    one branch per input character instead of trying every phrase in turn.
+    Longer continuations are tried first, giving longest-match at each position.
+    """
+    root: dict = {}
+    for phrase in phrases:
+        node = root
+        for char in phrase:
+            node = node.setdefault(char, {})
+        node[""] = True
+
+    def build(node):
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+        if len(branches) == 1 and "" not in node:
+            return branches[0]
+        group = "(?:" + "|".join(branches) + ")"
+        return group + "?" if "" in node else group
+
+    return build(root)
+
+
+class IntentMatcher:
+    def __init__(self, intent_patterns: Dict[str, List[str]], argument_patterns=ARGUMENT_PATTERNS):
+        """
+        Compile every trigger phrase into one word-bounded regex.
+        :param intent_patterns: intent -> trigger phrases, in priority order.
+        :param argument_patterns: phrase -> (argument name, pattern matched right after the phrase).
+        """
+        self.intents = list(intent_patterns)
+        # phrase -> (intent priority, intent, argument name, compiled argument pattern)
+        self.phrases: Dict[str, Tuple[int, str, Optional[str], Optional[Pattern]]] = {}
+        for priority, intent in enumerate(self.intents):
+            for phrase in intent_patterns[intent]:
+                phrase = phrase.lower()
+                if phrase in self.phrases:
+                    # Shared phrases belong to the first intent that lists them
+                    continue
+                arg_name, arg_pattern = argument_patterns.get(phrase, (None, None))
+                self.phrases[phrase] = (
+                    priority, intent, arg_name,
+                    re.compile(arg_pattern) if arg_pattern else None
+                )
+        # Zero-width lookahead so overlapping phrases ("show system info") are all seen
+        self.pattern = re.compile(r"\b(?=(" + _trie_pattern(self.phrases) + r")\b)")
+
+    def match(self, user_input: str) -> Optional[Tuple[str, Dict[str, str]]]:
+        """
+        Scan the input once and return (intent, arguments) for the highest-priority
+        intent found, or None if no trigger phrase is present.
+        """
+        text = user_input.lower()
+        best = best_match = None
+        for m in self.pattern.finditer(text):
+            entry = self.phrases[m.group(1)]
+            if best is None or entry[0] < best[0]:
+                best, best_match = entry, m
+                if entry[0] == 0:
+                    break
+        if best is None:
+            return None
+        _, intent, arg_name, arg_pattern = best
+        args = {}
+        if arg_pattern is not None:
+            # Anchored at the end of the trigger phrase, so no second scan of the input
+            arg = arg_pattern.match(text, best_match.end(1))
+            value = arg.group(1) if arg else None
+            args[arg_name] = value.strip() if value else ""
+        return intent, args
+
+    def classify(self, user_input: str) -> dict:
+        """
+        Match the input and shape the response returned by AIEngine.process_input.
+        """
+        found = self.match(user_input)
+        if found is None:
+            return dict(UNKNOWN_RESPONSE)
+        return build_response(*found)
+
+
+def build_response(intent: str, args: Dict[str, str]) -> dict:
+    """
+    Shape the AIEngine response for a recognised intent and its arguments.
+    """
+    if intent == "find_files":
+        query = args.get("query", "")
+        return {
+            "intent": intent,
+            "text": f"Searching for: {query}" if query else "What would you like me to find?",
+            "query": query,
+            "confidence": 0.9
+        }
+    if intent == "create_folder":
+        folder = args.get("folder") or "new_folder"
+        return {
+            "intent": intent,
+            "text": f"Creating folder: {folder}",
+            "folder": folder,
+            "confidence": 0.9
+        }
+    if intent == "delete_file":
+        filename = args.get("filename", "")
+        return {
+            "intent": intent,
+            "text": f"Delete file: {filename if filename else '[no file detected]'}",
+            "filename": filename,
+            "confidence": 0.9
+        }
+    if intent == "backup_data":
+        return {
+            "intent": intent,
+            "text": "Preparing to back up your Documents folder...",
+            "confidence": 0.95
+        }
+    return {
+        "intent": intent,
+        "text": f"Detected intent: {intent}",
+        "confidence": 0.9
+    }
@@ -0,0 +1,126 @@
+import re
+import zlib
+from typing import Dict, List, Optional, Set, Tuple
+
+import numpy as np
+
+_WORD_RE = re.compile(r"[a-z0-9']+")
+
+# Function words and generic verbs. They make "where is my cat" look just like
+# "where is my file" to the vectors, so they don't count as evidence for an intent.
+STOPWORDS = frozenset("""
+a about after all am an and any anything are as at be been being but by can could did do does doing
+for from get give go going had has have how i i'm if in into is it it's its let like me much my need
+now of on or our please right show so some tell than that the their them then there these they this
+to up us very want was we were what what's when where which who why will with would you your
+""".split())
+
+
+def content_words(text: str) -> Set[str]:
+    """
+    Lowercased words of the input other than STOPWORDS, with a trailing
+    "'s" or plural "s" dropped ("files" and "file" are the same word).
+    """
+    words = set()
+    for word in _WORD_RE.findall(text.lower()):
+        if word.endswith("'s"):
+            word = word[:-2]
+        if word in STOPWORDS or len(word) < 2:
+            continue
+        if len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+            word = word[:-1]
+        words.add(word)
+    return words
+
+
+def normalize_words(text: str) -> str:
+    return " ".join(_WORD_RE.findall(text.lower()))
+
+
+def hashed_features(text: str, dim: int) -> Dict[int, float]:
+    """
+    Hash word unigrams, word bigrams and character trigrams of the input into
+    `dim` buckets. crc32 keeps bucket ids stable across processes.
+    """
+    words = _WORD_RE.findall(text.lower())
+    grams = [f"w:{w}" for w in words]
+    grams += [f"b:{a} {b}" for a, b in zip(words, words[1:])]
+    for w in words:
+        padded = f" {w} "
+        grams += [f"c:{padded[i:i + 3]}" for i in range(len(padded) - 2)]
+    counts: Dict[int, float] = {}
+    for gram in grams:
+        bucket = zlib.crc32(gram.encode()) % dim
+        counts[bucket] = counts.get(bucket, 0.0) + 1.0
+    return counts
+
+
+class IntentVectorIndex:
+    def __init__(self, intent_examples: Dict[str, List[str]], dim: int = 2048):
+        """
+        Precompute TF-IDF weighted, L2-normalised example vectors per intent,
+        and each intent's vocabulary of content words.
+        :param intent_examples: intent -> example phrasings.
+        :param dim: number of hash buckets.
+        """
+        self.dim = dim
+        self.labels: List[str] = []
+        self.intents = list(intent_examples)
+        self.vocab: Dict[str, Set[str]] = {intent: set() for intent in self.intents}
+        # Normalised example text -> intent, for inputs that are an example verbatim
+        self.exact: Dict[str, str] = {}
+        rows = []
+        for intent, examples in intent_examples.items():
+            for example in examples:
+                self.vocab[intent] |= content_words(example)
+                self.exact.setdefault(normalize_words(example), intent)
+                self.labels.append(intent)
+                rows.append(hashed_features(example, dim))
+
+        # Smoothed idf per bucket, computed over the example set
+        df = np.zeros(dim, dtype=np.float32)
+        for row in rows:
+            df[list(row)] += 1
+        self.idf = (np.log((1 + len(rows)) / (1 + df)) + 1).astype(np.float32)
+
+        matrix = np.zeros((dim, len(rows)), dtype=np.float32)
+        for col, row in enumerate(rows):
+            buckets = np.fromiter(row, dtype=np.int64)
+            weights = (1 + np.log(np.fromiter(row.values(), dtype=np.float32))) * self.idf[buckets]
+            matrix[buckets, col] = weights / np.linalg.norm(weights)
+        # Stored bucket-major in half precision: scoring only gathers the rows for
+        # the handful of buckets present in the query.
+        self.matrix = matrix.astype(np.float16)
+
+    def score(self, text: str) -> Optional[Tuple[str, float]]:
+        """
+        Return (intent, confidence) for the best-scoring intent, or None for empty input.
+        Confidence is the cosine similarity of the intent's nearest example, scaled
+        by the share of the input's content words that occur in that intent's
+        examples. A close match on phrasing alone ("where is my cat" vs "where is
+        my file") therefore scores low, as does input with no content words at all,
+        unless it is one of the examples verbatim ("what can you do"), which
+        scores 1.0.
+        """
+        features = hashed_features(text, self.dim)
+        if not features:
+            return None
+        exact = self.exact.get(normalize_words(text))
+        if exact is not None:
+            return exact, 1.0
+        buckets = np.fromiter(features, dtype=np.int64)
+        weights = (1 + np.log(np.fromiter(features.values(), dtype=np.float32))) * self.idf[buckets]
+        weights /= np.linalg.norm(weights)
+        sims = weights @ self.matrix[buckets].astype(np.float32)
+        words = content_words(text)
+        best_intent, best = self.labels[int(np.argmax(sims))], (0.0, 0.0)
+        nearest: Dict[str, float] = {}
+        for label, sim in zip(self.labels, sims.tolist()):
+            if sim > nearest.get(label, -1.0):
+                nearest[label] = sim
+        for intent, sim in nearest.items():
+            coverage = len(words & self.vocab[intent]) / len(words) if words else 0.0
+            # Ties on confidence (e.g. both zero) go to the closer phrasing
+            if (sim * coverage, sim) > best:
+                best_intent, best = intent, (sim * coverage, sim)
+        return best_intent, best[0]
@@ -0,0 +1,168 @@
+import gzip
+import logging.handlers
+import os
+import re
+import shutil
+import tempfile
+import time
+from itertools import chain
+from typing import BinaryIO, Iterator, List, Tuple
+
+# Decompressed archive bytes held in memory while reading it backwards; beyond
+# this the data spills to a temporary file
+GZIP_SPOOL_BYTES = 4 * 1024 * 1024
+
+
+def _segment_pattern(path: str):
+    return re.compile(re.escape(os.path.basename(path)) + r"\.(\d+)(\.gz)?$")
+
+
+def _sealed(path: str) -> List[Tuple[int, str]]:
+    """
+    (sequence number, file path) of every sealed segment of `path`, oldest first.
+    A segment whose compression was interrupted is listed once, preferring the .gz copy.
+    """
+    directory = os.path.dirname(path) or "."
+    if not os.path.isdir(directory):
+        return []
+    pattern = _segment_pattern(path)
+    found = {}
+    for name in os.listdir(directory):
+        m = pattern.match(name)
+        if m and (m.group(2) or int(m.group(1)) not in found):
+            found[int(m.group(1))] = os.path.join(directory, name)
+    return sorted(found.items())
+
+
+def sealed_segments(path: str) -> List[str]:
+    """
+    Sealed segments of `path`, newest first.
+    """
+    return [segment for _, segment in reversed(_sealed(path))]
+
+
+def segment_paths(path: str) -> List[str]:
+    """
+    Every segment of `path` newest first: the active file (if any), then the sealed ones.
+    """
+    return ([path] if os.path.exists(path) else []) + sealed_segments(path)
+
+
+def seal_segment(path: str, compress=True, max_segments=0) -> str:
+    """
+    Rename the active file to the next numbered segment (`path.000001`, ...),
+    gzip it if `compress`, and drop the oldest segments beyond `max_segments` (0 keeps all).
+    Returns the sealed segment's path.
+    """
+    existing = _sealed(path)
+    sealed = f"{path}.{(existing[-1][0] + 1 if existing else 1):06d}"
+    os.replace(path, sealed)
+    if compress:
+        # Write under a temporary name so readers never see a half-written archive
+        with open(sealed, "rb") as src, gzip.open(sealed + ".gz.tmp", "wb") as dst:
+            shutil.copyfileobj(src, dst)
+        os.replace(sealed + ".gz.tmp", sealed + ".gz")
+        os.remove(sealed)
+        sealed += ".gz"
+    if max_segments > 0:
+        for _, old in _sealed(path)[:-max_segments]:
+            os.remove(old)
+    return sealed
+
+
+def iter_segment_lines_reversed(segment: str, block_size: int = 64 * 1024) -> Iterator[bytes]:
+    """
+    Non-empty lines of one segment, newest first. Plain files are read backwards
+    in blocks; compressed segments are decompressed only when iteration reaches them,
+    a block at a time into a spool (GZIP_SPOOL_BYTES in memory, the rest on disk)
+    that is then read backwards the same way.
+    """
+    if segment.endswith(".gz"):
+        with gzip.open(segment, "rb") as src, tempfile.SpooledTemporaryFile(GZIP_SPOOL_BYTES) as spool:
+            shutil.copyfileobj(src, spool, block_size)
+            yield from _reversed_lines(spool, block_size)
+        return
+    with open(segment, "rb") as f:
+        yield from _reversed_lines(f, block_size)
+
+
+def _reversed_lines(f: BinaryIO, block_size: int) -> Iterator[bytes]:
+    f.seek(0, os.SEEK_END)
+    pos = f.tell()
+    remainder = b""
+    while pos > 0:
+        read_size = min(block_size, pos)
+        pos -= read_size
+        f.seek(pos)
+        lines = (f.read(read_size) + remainder).split(b"\n")
+        # The first piece may continue in the previous block
+        remainder = lines[0]
+        for line in reversed(lines[1:]):
+            if line.strip():
+                yield line
+    if remainder.strip():
+        yield remainder
+
+
+def iter_lines_reversed(path: str, max_segments: int = 0) -> Iterator[bytes]:
+    """
+    Non-empty lines of a segmented log, newest first, across the active file and
+    the sealed segments: the newest `max_segments` of them all (0 reads every one).
+    """
+    segments = segment_paths(path)
+    if max_segments > 0:
+        segments = segments[:max_segments]
+    return chain.from_iterable(iter_segment_lines_reversed(segment) for segment in segments)
+
+
+class SegmentPolicy:
+    def __init__(self, path: str, max_bytes=0, max_age_sec=0, max_segments=0, compress=True):
+        """
+        When to seal the active file of a segmented log.
+        :param path: active log file.
+        :param max_bytes: seal once the active file reaches this size (0 disables).
+        :param max_age_sec: seal once the active file has been written for this long (0 disables).
+        :param max_segments: sealed segments kept; older ones are deleted (0 keeps all).
+        :param compress: gzip sealed segments.
+        """
+        self.path = path
+        self.max_bytes = max_bytes
+        self.max_age_sec = max_age_sec
+        self.max_segments = max_segments
+        self.compress = compress
+        self.started = time.time()
+
+    def due(self, size: int) -> bool:
+        if size <= 0:
+            return False
+        if self.max_bytes and size >= self.max_bytes:
+            return True
+        return bool(self.max_age_sec) and time.time() - self.started >= self.max_age_sec
+
+    def rotate(self) -> str:
+        sealed = seal_segment(self.path, self.compress, self.max_segments)
+        self.started = time.time()
+        return sealed
+
+
+class SegmentedFileHandler(logging.handlers.BaseRotatingHandler):
+    def __init__(self, filename: str, max_bytes=0, max_age_sec=0, max_segments=0, compress=True,
+                 encoding="utf-8"):
+        """
+        logging handler that rolls its file into numbered, optionally gzipped segments.
+        See SegmentPolicy for the parameters.
+        """
+        super().__init__(filename, "a", encoding=encoding)
+        self.policy = SegmentPolicy(self.baseFilename, max_bytes, max_age_sec, max_segments, compress)
+
+    def shouldRollover(self, record) -> bool:
+        if self.stream is None:
+            self.stream = self._open()
+        return self.policy.due(self.stream.tell())
+
+    def doRollover(self):
+        if self.stream:
+            self.stream.close()
+            self.stream = None
+        self.policy.rotate()
+        self.stream = self._open()
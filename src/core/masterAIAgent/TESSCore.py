@@ -2,34 +2,207 @@
 # MASTER AI AGENT (TESS CORE)
 # ============================
 import uvicorn
-from fastapi import FastAPI, Request, HTTPException, BackgroundTasks
-from typing import Dict, Any, List, Optional
+from fastapi import FastAPI, Request, HTTPException, Query
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from typing import Dict, Any, List, Optional, AsyncIterator
 from pydantic import BaseModel
 from uuid import uuid4
 import datetime
 import logging
-import requests
-import os
+import asyncio
+import time
 import json
+import atexit
+import random
 import re
-
+import hmac
+
+from src.core.intent_matcher import IntentMatcher, build_response
+from src.core.intent_vectors import IntentVectorIndex
+from src.core.log_segments import SegmentPolicy
+from src.core.masterAIAgent.endpointPool import EndpointPool
+from src.core.masterAIAgent.llmCache import LLMResponseCache
+from src.core.masterAIAgent.llmClient import AsyncLLMClient
+from src.core.masterAIAgent.llmScheduler import AdmissionError, LLMScheduler
+from src.core.masterAIAgent.logReader import tail_entries
+from src.core.masterAIAgent.logStore import ActionLogStore
+from src.core.masterAIAgent.logWriter import BackgroundLogWriter
+from src.core.masterAIAgent.metrics import MetricsRegistry
+from src.core.masterAIAgent.sandboxCache import SandboxResultCache
+from src.core.masterAIAgent.sandboxJobs import SandboxJobQueue
 from src.core.masterAIAgent.sandboxRunner import ScriptSandbox
+from src.core.masterAIAgent.sessionManager import RateLimitedError, Session, SessionManager
+from src.core.masterAIAgent.singleFlight import SingleFlight
+from src.core.masterAIAgent.tracing import Tracer, current_request_id, span
 
 
 # ======================================
 # CONFIGURATION AND GLOBAL DEFINITIONS
 # ======================================
 
+# Each model lists one or more Ollama replicas; requests go to the replica
+# with the fewest outstanding generations
 LLM_ENDPOINTS = {
-    "mixtral": "http://localhost:11434/api/generate",
-    "codellama": "http://localhost:11436/api/generate"
+    "mixtral": ["http://localhost:11434/api/generate"],
+    "codellama": ["http://localhost:11436/api/generate"]
 }
 
+# Replica health: background probe interval and per-replica circuit breaker
+LLM_HEALTH_CHECK_INTERVAL_SEC = 10
+LLM_BREAKER_FAILURE_THRESHOLD = 3
+LLM_BREAKER_RESET_SEC = 30
+
 LOG_PATH = "tess_action_log.jsonl"
+# Indexed, queryable copy of the action log (fed by the log writer)
+LOG_STORE_PATH = "tess_action_log.sqlite3"
+# Most entries GET /logs returns per call (tail or page)
+LOG_MAX_COUNT = 1000
+
+# Background action-log writer: batch size, max seconds before a batch is
+# written, and durability per batch ('none', 'flush' or 'fsync')
+LOG_BATCH_SIZE = 256
+LOG_FLUSH_INTERVAL_SEC = 0.5
+LOG_DURABILITY = "flush"
+
+# Action-log rotation: seal the active file into a gzipped, numbered segment
+# (tess_action_log.jsonl.000001.gz, ...) by size or age; 0 disables a limit
+LOG_SEGMENT_MAX_BYTES = 64 * 1024 * 1024
+LOG_SEGMENT_MAX_AGE_SEC = 24 * 3600
+LOG_MAX_SEGMENTS = 0
+
+# Warm sandbox interpreters (POSIX); each runs every script in a fresh fork of
+# itself and is replaced after this many scripts. 0 = new interpreter per script
+SANDBOX_POOL_SIZE = 2
+SANDBOX_WORKER_MAX_RUNS = 100
+
+# Output kept per sandbox run (stdout + stderr); a script going over it is stopped
+SANDBOX_MAX_OUTPUT_BYTES = 1024 * 1024
+SANDBOX_KILL_ON_OUTPUT_LIMIT = True
+
+# Kernel-enforced limits per sandbox script on Linux (address space, CPU
+# seconds, processes, file size). Results report peak RSS and CPU/wall time.
+SANDBOX_MEMORY_LIMIT_MB = 256
+SANDBOX_CPU_LIMIT_SEC = 60
+SANDBOX_MAX_PROCESSES = 64
+SANDBOX_MAX_FILE_MB = 64
+
+# Results of successful runs for requests with "cache": true, keyed on script,
+# language, interpreter version and limits; LRU-bounded by count and size
+SANDBOX_CACHE_ENABLED = True
+SANDBOX_CACHE_MAX_ENTRIES = 512
+SANDBOX_CACHE_MAX_BYTES = 16 * 1024 * 1024
+
+# POST /sandbox/jobs: jobs run at once, jobs allowed to wait (429 beyond that),
+# and how long finished results stay available to GET /sandbox/jobs/{id}
+SANDBOX_JOB_WORKERS = 2
+SANDBOX_JOB_MAX_QUEUE = 100
+SANDBOX_JOB_RESULT_TTL_SEC = 600
+
+# Request tracing: fraction of requests traced / profiled without being asked,
+# and whether clients may ask with X-Trace: 1 / X-Profile: 1 headers (off: any
+# client could make the server profile and write files). With a secret set, the
+# headers also need a matching X-Trace-Secret.
+# Traces are kept in memory (GET /traces); profiles go to PROFILE_DIR/<request id>-<time>.prof
+TRACE_SAMPLE_RATE = 0.0
+PROFILE_SAMPLE_RATE = 0.0
+TRACE_HEADERS_ENABLED = False
+TRACE_HEADER_SECRET = ""
+TRACE_MAX_KEPT = 200
+PROFILE_DIR = "data/profiles"
+PROFILE_MAX_KEPT = 50
+
+# Max generations in flight per model (shared by /chat and /chat/batch)
+LLM_MAX_CONCURRENCY = {
+    "mixtral": 4,
+    "codellama": 4
+}
+LLM_TIMEOUT_SEC = 120
+
+# Admission control: bounded per-model queues, lower priority value served first
+LLM_MAX_QUEUE = 64
+LLM_PRIORITY = {
+    "chat": 0,
+    "code": 1
+}
+LLM_DEFAULT_PRIORITY = 1
+# Max seconds a request may wait in the queue before it is dropped
+LLM_QUEUE_TIMEOUT_SEC = {
+    "chat": 30,
+    "code": 300
+}
+LLM_DEFAULT_QUEUE_TIMEOUT_SEC = 120
+
+# Sessions: LRU/idle eviction under a global cap, token bucket per user
+# guarding the LLM tier (rate = sustained requests/sec, burst = bucket size)
+SESSION_MAX_COUNT = 10000
+SESSION_IDLE_TIMEOUT_SEC = 1800
+SESSION_LLM_RATE_PER_SEC = 0.5
+SESSION_LLM_BURST = 10
+
+# How often a pending /chat request checks whether its client went away
+DISCONNECT_POLL_SEC = 0.5
+
+# LLM response cache: in-memory LRU + persistent SQLite tier
+LLM_CACHE_PATH = "tess_llm_cache.sqlite3"
+LLM_CACHE_MAX_ENTRIES = 1024
+LLM_CACHE_TTL_SEC = 6 * 3600
 
 app = FastAPI(title="TESS Master AI Agent")
 
-sandbox = ScriptSandbox(time_limit_sec=60)
+sandbox = ScriptSandbox(
+    time_limit_sec=60, pool_size=SANDBOX_POOL_SIZE, max_runs_per_worker=SANDBOX_WORKER_MAX_RUNS,
+    max_output_bytes=SANDBOX_MAX_OUTPUT_BYTES, kill_on_output_limit=SANDBOX_KILL_ON_OUTPUT_LIMIT,
+    memory_limit_mb=SANDBOX_MEMORY_LIMIT_MB, cpu_limit_sec=SANDBOX_CPU_LIMIT_SEC,
+    max_processes=SANDBOX_MAX_PROCESSES, max_file_mb=SANDBOX_MAX_FILE_MB
+)
+atexit.register(sandbox.close)
+
+sandbox_cache = SandboxResultCache(
+    max_entries=SANDBOX_CACHE_MAX_ENTRIES, max_bytes=SANDBOX_CACHE_MAX_BYTES
+) if SANDBOX_CACHE_ENABLED else None
+
+sandbox_jobs = SandboxJobQueue(
+    workers=SANDBOX_JOB_WORKERS, max_queue=SANDBOX_JOB_MAX_QUEUE, result_ttl_sec=SANDBOX_JOB_RESULT_TTL_SEC
+)
+
+log_store = ActionLogStore(LOG_STORE_PATH)
+
+log_writer = BackgroundLogWriter(
+    LOG_PATH, batch_size=LOG_BATCH_SIZE, flush_interval_sec=LOG_FLUSH_INTERVAL_SEC, durability=LOG_DURABILITY,
+    sinks=[log_store.insert_many],
+    rotation=SegmentPolicy(LOG_PATH, LOG_SEGMENT_MAX_BYTES, LOG_SEGMENT_MAX_AGE_SEC, LOG_MAX_SEGMENTS)
+)
+atexit.register(log_writer.close)
+
+llm_pool = EndpointPool(
+    LLM_ENDPOINTS, failure_threshold=LLM_BREAKER_FAILURE_THRESHOLD, reset_timeout_sec=LLM_BREAKER_RESET_SEC
+)
+
+llm_client = AsyncLLMClient(
+    LLM_ENDPOINTS, max_concurrency=LLM_MAX_CONCURRENCY, timeout_sec=LLM_TIMEOUT_SEC, pool=llm_pool
+)
+
+llm_cache = LLMResponseCache(LLM_CACHE_PATH, max_entries=LLM_CACHE_MAX_ENTRIES, ttl_sec=LLM_CACHE_TTL_SEC)
+
+llm_scheduler = LLMScheduler(max_concurrency=LLM_MAX_CONCURRENCY, max_queue=LLM_MAX_QUEUE)
+
+llm_single_flight = SingleFlight()
+
+tracer = Tracer(max_traces=TRACE_MAX_KEPT, profile_dir=PROFILE_DIR, max_profiles=PROFILE_MAX_KEPT)
+
+# Served by GET /metrics in the Prometheus text format
+metrics = MetricsRegistry()
+intent_latency = metrics.histogram("tess_intent_match_seconds", "AIEngine.process_input latency.")
+llm_latency = metrics.histogram("tess_llm_query_seconds", "LLM query latency, including cache hits.", ("model",))
+llm_ttft = metrics.histogram("tess_llm_ttft_seconds", "Time to the first streamed token on /chat/stream.", ("model",))
+sandbox_latency = metrics.histogram("tess_sandbox_run_seconds", "ScriptSandbox.run_script latency.", ("language",))
+save_log_latency = metrics.histogram("tess_save_log_seconds", "Time to hand action-log entries to the writer.")
+resolutions = metrics.counter(
+    "tess_chat_resolutions_total", "Chat inputs by what answered them (keyword, vector or llm fallback), or rejected.", ("source",)
+)
+http_requests = metrics.counter("tess_http_requests_total", "HTTP requests by endpoint and status.", ("endpoint", "status"))
+http_errors = metrics.counter("tess_http_errors_total", "HTTP responses with status >= 400 by endpoint.", ("endpoint", "status"))
+http_in_flight = metrics.gauge("tess_http_requests_in_flight", "HTTP requests currently being handled.")
 
 # ==============
 # AI ENGINE (Basic Intent Matcher)
@@ -47,58 +220,56 @@ class AIEngine:
         "backup_data": ["backup", "backup my data", "make a backup", "save everything"]
     }
 
+    # Paraphrases scored by the vector tier when no keyword matches
+    INTENT_EXAMPLES = {
+        "list_files": ["what's in this directory", "what files are in this folder", "show me the contents of this folder", "list the directory contents"],
+        "find_files": ["where is my file", "look for a file named report", "search my documents for a file"],
+        "create_folder": ["make a new folder", "create a new directory"],
+        "delete_file": ["get rid of this file", "erase the file"],
+        "help": ["what can you do", "how do i use this", "show me the commands"],
+        "system_status": ["how is the system doing", "how much cpu and memory is in use", "how long has the machine been running"],
+        "system_info": ["what hardware is this machine running", "tell me about this computer"],
+        "backup_data": ["back up my documents", "copy my files somewhere safe"]
+    }
+
     def __init__(self):
+        # Compile the intent table once; every call is then a single regex scan
+        self.matcher = IntentMatcher(self.INTENT_PATTERNS)
+        # Example vectors for the similarity tier, built once at startup
+        examples = {
+            intent: patterns + self.INTENT_EXAMPLES.get(intent, [])
+            for intent, patterns in self.INTENT_PATTERNS.items()
+        }
+        self.vectors = IntentVectorIndex(examples)
         print("AI Engine initialized (basic intent matcher)")
 
     def process_input(self, user_input: str):
-        user_input_lower = user_input.lower()
-        for intent, patterns in self.INTENT_PATTERNS.items():
-            if any(p in user_input_lower for p in patterns):
-                # Try to extract search/query for find_files intent
-                if intent == "find_files":
-                    match = re.search(r"find (.+)", user_input_lower)
-                    query = match.group(1) if match else ""
-                    return {
-                        "intent": intent,
-                        "text": f"Searching for: {query}" if query else "What would you like me to find?",
-                        "query": query,
-                        "confidence": 0.9
-                    }
-                # Try to extract folder name for create_folder intent
-                if intent == "create_folder":
-                    match = re.search(r"create folder(?: called)? ?([\w.\- ]+)?", user_input_lower)
-                    folder = match.group(1).strip() if match and match.group(1) else "new_folder"
-                    return {
-                        "intent": intent,
-                        "text": f"Creating folder: {folder}",
-                        "folder": folder,
-                        "confidence": 0.9
-                    }
-                if intent == "delete_file":
-                    match = re.search(r"delete file(?: called)? ?([\w.\- ]+)?", user_input_lower)
-                    filename = match.group(1).strip() if match and match.group(1) else ""
-                    return {
-                        "intent": intent,
-                        "text": f"Delete file: {filename if filename else '[no file detected]'}",
-                        "filename": filename,
-                        "confidence": 0.9
-                    }
-                if intent == "backup_data":
-                    return {
-                        "intent": intent,
-                        "text": "Preparing to back up your Documents folder...",
-                        "confidence": 0.95
-                    }
-                return {
-                    "intent": intent,
-                    "text": f"Detected intent: {intent}",
-                    "confidence": 0.9
-                }
-        return {
-            "intent": "unknown",
-            "text": "Sorry, I didn't understand. Try asking about files, system, or type 'help'.",
-            "confidence": 0.3
-        }
+        with intent_latency.time():
+            return self.classify(user_input)
+
+    def classify(self, user_input: str):
+        result = self.matcher.classify(user_input)
+        if result["intent"] != "unknown":
+            return result
+        # Keyword miss: score against the example vectors. The confidence is
+        # calibrated against how much of the input the intent's vocabulary covers;
+        # the caller's threshold decides whether it is good enough or goes to the LLM.
+        scored = self.vectors.score(user_input)
+        if scored is None:
+            return result
+        intent, similarity = scored
+        result = build_response(intent, {})
+        result["confidence"] = round(similarity, 3)
+        result["tier"] = "vector"
+        return result
+
+    def process_batch(self, user_inputs: List[str]) -> List[Dict[str, Any]]:
+        # Repeated commands in a batch are classified once
+        results: Dict[str, Dict[str, Any]] = {}
+        for text in user_inputs:
+            if text not in results:
+                results[text] = self.process_input(text)
+        return [results[text] for text in user_inputs]
 
 # Instantiate the AI Engine singleton to be used across agent
 agent_ai_engine = AIEngine()
@@ -111,22 +282,90 @@ def get_timestamp():
     return datetime.datetime.now().isoformat()
 
 def save_log(entry: Dict[str, Any]):
-    with open(LOG_PATH, "a") as logf:
-        logf.write(json.dumps(entry) + "\n")
+    # Queued for the background writer; no file I/O on the request path
+    with save_log_latency.time():
+        log_writer.write(entry)
+
+def save_logs(entries: List[Dict[str, Any]]):
+    with save_log_latency.time():
+        log_writer.write_many(entries)
+
+def batch_source(result: Dict[str, Any], intent_result: Dict[str, Any]) -> str:
+    # Log/metrics source of a batch item; items refused by the rate limit or LLM
+    # admission never reached a model, so they aren't counted as "llm"
+    if result["status"] == "intent":
+        return intent_result.get("tier", "keyword")
+    if result["status"] == "rejected":
+        return "rejected"
+    return "llm"
 
 def select_llm_model(task_type: str):
     if task_type == "code":
         return "codellama"
     return "mixtral"
 
-def query_llm(model: str, prompt: str) -> str:
-    url = LLM_ENDPOINTS[model]
-    payload = {"model": model, "prompt": prompt}
-    try:
-        resp = requests.post(url, json=payload, timeout=120)
-        resp.raise_for_status()
-        result = resp.json().get("response", "")
+def llm_slot(model: str, task_type: Optional[str]):
+    # Admission control: interactive chat is served ahead of bulk jobs
+    return llm_scheduler.slot(
+        model,
+        priority=LLM_PRIORITY.get(task_type, LLM_DEFAULT_PRIORITY),
+        timeout=LLM_QUEUE_TIMEOUT_SEC.get(task_type, LLM_DEFAULT_QUEUE_TIMEOUT_SEC)
+    )
+
+def check_llm_admission(model: str, task_type: Optional[str]):
+    # What llm_slot() would refuse right now, raised without taking a slot
+    llm_scheduler.check(
+        model,
+        priority=LLM_PRIORITY.get(task_type, LLM_DEFAULT_PRIORITY),
+        timeout=LLM_QUEUE_TIMEOUT_SEC.get(task_type, LLM_DEFAULT_QUEUE_TIMEOUT_SEC)
+    )
+
+async def scheduled_generate(model: str, prompt: str, options: Optional[Dict[str, Any]], task_type: Optional[str]) -> str:
+    async with llm_slot(model, task_type):
+        return await llm_client.generate(model, prompt, options)
+
+async def generate_llm(model: str, prompt: str, options: Optional[Dict[str, Any]] = None, use_cache: bool = True,
+                       task_type: Optional[str] = "chat") -> str:
+    with llm_latency.time(model):
+        return await cached_generate(model, prompt, options, use_cache, task_type)
+
+async def cache_lookup(cache_key: str) -> Optional[str]:
+    # Memory tier inline; the SQLite tier on a worker thread so a disk read (or
+    # a concurrent commit) never stalls the event loop
+    cached = llm_cache.get_memory(cache_key)
+    if cached is None and llm_cache.persistent:
+        cached = await asyncio.to_thread(llm_cache.get_disk, cache_key)
+    return cached
+
+async def cached_generate(model: str, prompt: str, options: Optional[Dict[str, Any]], use_cache: bool,
+                          task_type: Optional[str]) -> str:
+    # Raises on failure (including AdmissionError); query_llm turns other errors
+    # into a response string. Only successful generations are cached.
+    if not use_cache:
+        llm_cache.record_bypass()
+        return await scheduled_generate(model, prompt, options, task_type)
+    cache_key = llm_cache.make_key(model, prompt, options, exact=task_type == "code")
+    cached = await cache_lookup(cache_key)
+    if cached is not None:
+        return cached
+
+    async def generate_and_cache():
+        result = await scheduled_generate(model, prompt, options, task_type)
+        # SQLite commit happens off the event loop
+        await asyncio.to_thread(llm_cache.put, cache_key, result)
         return result
+
+    # Identical prompts already in flight share one upstream generation
+    return await llm_single_flight.do(cache_key, generate_and_cache)
+
+async def query_llm(model: str, prompt: str, options: Optional[Dict[str, Any]] = None, use_cache: bool = True,
+                    task_type: Optional[str] = "chat") -> str:
+    try:
+        with span("query_llm", model=model):
+            return await generate_llm(model, prompt, options=options, use_cache=use_cache, task_type=task_type)
+    except AdmissionError:
+        # Surfaced to the client as 429/503 with Retry-After
+        raise
     except Exception as e:
         logging.error(f"LLM Query Failed: {e}")
         return f"Error: {str(e)}"
@@ -140,6 +379,8 @@ class AgentAction(BaseModel):
     input_text: str
     context: Optional[Dict[str, Any]] = None
     task_type: Optional[str] = "chat"  # 'chat', 'code', 'sandbox', etc.
+    options: Optional[Dict[str, Any]] = None  # Ollama generation options
+    no_cache: bool = False  # Skip the LLM response cache for this request
 
 class AgentLog(BaseModel):
     timestamp: str
@@ -150,10 +391,14 @@ class AgentLog(BaseModel):
     result: Optional[Any] = None
     context: Optional[Dict[str, Any]] = None
 
+class BatchAgentAction(BaseModel):
+    actions: List[AgentAction]
+
 class SandboxTask(BaseModel):
     user_id: str
     script: str
     language: str = "python"
+    cache: bool = False  # Reuse the result of an identical earlier successful run
 
 # ==============
 # MAIN AGENT LOGIC
@@ -161,13 +406,28 @@ class SandboxTask(BaseModel):
 
 class MasterAgentCore:
     def __init__(self):
-        self.active_sessions: Dict[str, Dict[str, Any]] = {}
-
-    def process(self, action: AgentAction) -> str:
+        self.sessions = SessionManager(
+            max_sessions=SESSION_MAX_COUNT,
+            idle_timeout_sec=SESSION_IDLE_TIMEOUT_SEC,
+            llm_rate_per_sec=SESSION_LLM_RATE_PER_SEC,
+            llm_burst=SESSION_LLM_BURST
+        )
+
+    def session_for(self, action: AgentAction) -> Session:
+        # Requests without a user id share one anonymous session (and rate limit)
+        return self.sessions.touch(action.user_id or "anonymous")
+
+    async def process(self, action: AgentAction) -> str:
+        with span("process", task_type=action.task_type):
+            return await self._process(action)
+
+    async def _process(self, action: AgentAction) -> str:
         session_id = action.user_id or str(uuid4())
+        session = self.session_for(action)
         # 1. Log initial action basics
         log_entry = {
             "timestamp": get_timestamp(),
+            "request_id": current_request_id(),
             "user_id": session_id,
             "input_text": action.input_text,
             "action_type": action.task_type,
@@ -175,32 +435,217 @@ class MasterAgentCore:
         }
 
         # 2. First, use AIEngine intent matcher for quick intent recognition
-        intent_result = agent_ai_engine.process_input(action.input_text)
+        with span("intent_match"):
+            intent_result = agent_ai_engine.process_input(action.input_text)
 
         if intent_result["intent"] == "unknown" or intent_result.get("confidence", 0) < 0.6:
             # 3. Fall back to LLM if intent not confidently detected
+            # Raises RateLimitedError (429) when the user's bucket is empty
+            self.sessions.consume_llm(session)
             model = select_llm_model(action.task_type)
-            llm_output = query_llm(model, action.input_text)
+            llm_output = await query_llm(
+                model, action.input_text, options=action.options, use_cache=not action.no_cache, task_type=action.task_type
+            )
             log_entry["llm_response"] = llm_output
+            log_entry["source"] = "llm"
             response_text = llm_output
         else:
             # 4. Use intent matcher result directly
             log_entry["llm_response"] = intent_result["text"]
+            log_entry["source"] = intent_result.get("tier", "keyword")
             response_text = intent_result["text"]
 
         # 5. Save interaction log
-        save_log(log_entry)
+        resolutions.inc(log_entry["source"])
+        with span("save_log"):
+            save_log(log_entry)
 
         # 6. Return response to API/UI
         return response_text
 
+    async def open_stream(self, action: AgentAction) -> AsyncIterator[Dict[str, Any]]:
+        # Same pipeline as process(), but LLM tokens are yielded as they arrive.
+        # Everything that can refuse the request (the session rate limit, a full or
+        # overloaded LLM queue) runs here, before the caller starts a response, so it
+        # still surfaces as an HTTP status; the returned iterator yields the events.
+        # A queue that fills up between this check and the slot is still reported
+        # in-band.
+        session = self.session_for(action)
+        log_entry = {
+            "timestamp": get_timestamp(),
+            "request_id": current_request_id(),
+            "user_id": action.user_id or str(uuid4()),
+            "input_text": action.input_text,
+            "action_type": action.task_type,
+            "context": action.context,
+        }
+        intent_result = agent_ai_engine.process_input(action.input_text)
+        if intent_result["intent"] != "unknown" and intent_result.get("confidence", 0) >= 0.6:
+            return self._stream_intent(log_entry, intent_result)
+        # Raises RateLimitedError (429) when the user's bucket is empty
+        self.sessions.consume_llm(session)
+        model = select_llm_model(action.task_type)
+        cache_key = llm_cache.make_key(model, action.input_text, action.options, exact=action.task_type == "code")
+        cached = await cache_lookup(cache_key) if not action.no_cache else None
+        if cached is None:
+            # QueueFullError (429) / DeadlineExceededError (503); cache hits need no slot
+            check_llm_admission(model, action.task_type)
+        return self._stream_llm(action, log_entry, model, cache_key, cached)
+
+    async def _stream_intent(self, log_entry: Dict[str, Any], intent_result: Dict[str, Any]) -> AsyncIterator[Dict[str, Any]]:
+        log_entry["llm_response"] = intent_result["text"]
+        log_entry["source"] = intent_result.get("tier", "keyword")
+        resolutions.inc(log_entry["source"])
+        save_log(log_entry)
+        yield {"token": intent_result["text"]}
+        yield {"done": True, "intent": intent_result["intent"]}
+
+    async def _stream_llm(self, action: AgentAction, log_entry: Dict[str, Any], model: str, cache_key: str,
+                          cached: Optional[str]) -> AsyncIterator[Dict[str, Any]]:
+        log_entry["source"] = "llm"
+        resolutions.inc("llm")
+        if cached is not None:
+            log_entry["llm_response"] = cached
+            save_log(log_entry)
+            yield {"token": cached}
+            yield {"done": True, "model": model, "cached": True}
+            return
+
+        tokens: List[str] = []
+        started = time.perf_counter()
+        completed = False
+        try:
+            async with llm_slot(model, action.task_type):
+                async for token in llm_client.stream(model, action.input_text, action.options):
+                    if not tokens:
+                        ttft = time.perf_counter() - started
+                        llm_ttft.observe(ttft, model)
+                        log_entry["ttft_ms"] = round(ttft * 1000, 1)
+                    tokens.append(token)
+                    yield {"token": token}
+            completed = True
+        except AdmissionError as e:
+            tokens.append(f"Error: {str(e)}")
+            yield {"error": str(e), "status_code": e.status_code, "retry_after": e.retry_after}
+            return
+        except Exception as e:
+            logging.error(f"LLM Stream Failed: {e}")
+            tokens.append(f"Error: {str(e)}")
+            yield {"error": str(e)}
+            return
+        finally:
+            # Runs on completion, error and client disconnect alike
+            log_entry["llm_response"] = "".join(tokens)
+            if not completed:
+                log_entry["stream_completed"] = False
+            save_log(log_entry)
+        if action.no_cache:
+            llm_cache.record_bypass()
+        else:
+            await asyncio.to_thread(llm_cache.put, cache_key, log_entry["llm_response"])
+        yield {"done": True, "model": model}
+
+    async def process_batch(self, actions: List[AgentAction]) -> List[Dict[str, Any]]:
+        with span("process_batch", size=len(actions)):
+            return await self._process_batch(actions)
+
+    async def _process_batch(self, actions: List[AgentAction]) -> List[Dict[str, Any]]:
+        # 1. Classify every input in one pass through the intent matcher
+        intent_results = agent_ai_engine.process_batch([a.input_text for a in actions])
+        results: List[Dict[str, Any]] = [None] * len(actions)
+        misses: Dict[str, List[int]] = {}
+        for i, (action, intent_result) in enumerate(zip(actions, intent_results)):
+            session = self.session_for(action)
+            if intent_result["intent"] == "unknown" or intent_result.get("confidence", 0) < 0.6:
+                try:
+                    self.sessions.consume_llm(session)
+                except RateLimitedError as e:
+                    results[i] = {
+                        "status": "rejected", "intent": "unknown",
+                        "response": f"Error: {str(e)}", "retry_after": e.retry_after
+                    }
+                    continue
+                misses.setdefault(select_llm_model(action.task_type), []).append(i)
+            else:
+                results[i] = {
+                    "status": "intent",
+                    "intent": intent_result["intent"],
+                    "response": intent_result["text"]
+                }
+
+        # 2. Send only the misses to the LLM, all models at once; the scheduler's
+        #    per-model concurrency limit bounds how many run on each
+        async def run_model(model: str, indices: List[int]):
+            return await asyncio.gather(
+                *(
+                    generate_llm(model, actions[i].input_text, actions[i].options, not actions[i].no_cache, actions[i].task_type)
+                    for i in indices
+                ),
+                return_exceptions=True
+            )
+
+        per_model = await asyncio.gather(*(run_model(model, indices) for model, indices in misses.items()))
+        for (model, indices), outputs in zip(misses.items(), per_model):
+            for i, output in zip(indices, outputs):
+                if isinstance(output, AdmissionError):
+                    results[i] = {
+                        "status": "rejected", "intent": "unknown", "model": model,
+                        "response": f"Error: {str(output)}", "retry_after": output.retry_after
+                    }
+                elif isinstance(output, Exception):
+                    logging.error(f"LLM Query Failed: {output}")
+                    results[i] = {"status": "error", "intent": "unknown", "model": model, "response": f"Error: {str(output)}"}
+                else:
+                    results[i] = {"status": "llm", "intent": "unknown", "model": model, "response": output}
+
+        # 3. Save all interaction logs in one write
+        timestamp = get_timestamp()
+        request_id = current_request_id()
+        entries = [
+            {
+                "timestamp": timestamp,
+                "request_id": request_id,
+                "user_id": action.user_id or str(uuid4()),
+                "input_text": action.input_text,
+                "action_type": action.task_type,
+                "context": action.context,
+                "llm_response": result["response"],
+                "source": batch_source(result, intent_result),
+            }
+            for action, result, intent_result in zip(actions, results, intent_results)
+        ]
+        for entry in entries:
+            resolutions.inc(entry["source"])
+        save_logs(entries)
+        return results
+
     def run_sandbox_task(self, task: SandboxTask) -> Dict[str, Any]:
+        if not task.cache or sandbox_cache is None:
+            return {**self.execute_sandbox_task(task), "cached": False}
+        key = sandbox_cache.make_key(task.script, task.language, sandbox.fingerprint())
+        cached = sandbox_cache.get(key)
+        if cached is not None:
+            return {**cached, "cached": True}
+        response = self.execute_sandbox_task(task)
+        # Only clean, complete runs: never failures, timeouts or truncated output
+        if response.get("success") and not response.get("truncated"):
+            # Usage belongs to the run that paid for it, not to later hits
+            sandbox_cache.put(key, {k: v for k, v in response.items() if k != "resources"})
+        return {**response, "cached": False}
+
+    def execute_sandbox_task(self, task: SandboxTask) -> Dict[str, Any]:
         # Delegate script execution to sandbox runner
-        result = sandbox.run_script(script=task.script, language=task.language)
-        return {
+        with span("run_sandbox_task", language=task.language), sandbox_latency.time(task.language):
+            result = sandbox.run_script(script=task.script, language=task.language)
+        response = {
             "output": result.get("stdout", ""),
             "error": result.get("stderr", "")
         }
+        # Resource usage ends up in the action log too, for capacity planning and billing
+        for key in ("success", "truncated", "killed", "resources"):
+            if key in result:
+                response[key] = result[key]
+        return response
 
 agent_core = MasterAgentCore()
 
@@ -208,31 +653,247 @@ agent_core = MasterAgentCore()
 # API ENDPOINTS (CORE)
 # ==============
 
+@app.middleware("http")
+async def record_http_metrics(request: Request, call_next):
+    http_in_flight.inc()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        http_in_flight.dec()
+        # Route template, not the raw path, so unknown URLs don't add label values
+        route = request.scope.get("route")
+        endpoint = getattr(route, "path", "unmatched")
+        http_requests.inc(endpoint, str(status))
+        if status >= 400:
+            http_errors.inc(endpoint, str(status))
+
+REQUEST_ID_RE = re.compile(r"[A-Za-z0-9._-]{1,64}")
+
+def wants(request: Request, header: str, sample_rate: float) -> bool:
+    if TRACE_HEADERS_ENABLED and request.headers.get(header) == "1" and (
+        not TRACE_HEADER_SECRET
+        or hmac.compare_digest(request.headers.get("x-trace-secret", ""), TRACE_HEADER_SECRET)
+    ):
+        return True
+    return sample_rate > 0 and random.random() < sample_rate
+
+@app.middleware("http")
+async def trace_requests(request: Request, call_next):
+    # Every request gets an id (echoed as X-Request-ID and written to log
+    # entries); spans and cProfile dumps only for requested or sampled ones.
+    # A client-supplied id is kept only if it is safe to use as a file name.
+    request_id = request.headers.get("x-request-id", "")
+    if not REQUEST_ID_RE.fullmatch(request_id):
+        request_id = uuid4().hex
+    traced = wants(request, "x-trace", TRACE_SAMPLE_RATE)
+    with tracer.request(request_id, f"{request.method} {request.url.path}", trace=traced):
+        if wants(request, "x-profile", PROFILE_SAMPLE_RATE):
+            async with tracer.profile(request_id):
+                response = await call_next(request)
+        else:
+            response = await call_next(request)
+    response.headers["X-Request-ID"] = request_id
+    return response
+
+@app.exception_handler(AdmissionError)
+async def admission_error_handler(request: Request, exc: AdmissionError):
+    return JSONResponse(
+        status_code=exc.status_code,
+        content={"detail": str(exc)},
+        headers={"Retry-After": str(exc.retry_after)}
+    )
+
+async def cancel_on_disconnect(request: Request, coro):
+    # Run the handler's work as a task and cancel it (aborting any upstream LLM
+    # call) if the client disconnects before it finishes.
+    task = asyncio.ensure_future(coro)
+    try:
+        while True:
+            done, _ = await asyncio.wait({task}, timeout=DISCONNECT_POLL_SEC)
+            if done:
+                return task.result()
+            if await request.is_disconnected():
+                task.cancel()
+                raise HTTPException(status_code=499, detail="Client disconnected")
+    finally:
+        if not task.done():
+            task.cancel()
+
 @app.post("/chat")
-async def chat_action(action: AgentAction):
-    result = agent_core.process(action)
+async def chat_action(action: AgentAction, request: Request):
+    result = await cancel_on_disconnect(request, agent_core.process(action))
     return {"response": result}
 
-@app.post("/sandbox")
-async def sandbox_run(task: SandboxTask):
+@app.post("/chat/stream")
+async def chat_stream_action(action: AgentAction):
+    # Rate limiting and LLM admission happen before the response starts, so they
+    # get a real 429/503 with Retry-After
+    stream = await agent_core.open_stream(action)
+
+    async def events():
+        async for event in stream:
+            yield f"data: {json.dumps(event)}\n\n"
+    return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+@app.post("/chat/batch")
+async def chat_batch_action(batch: BatchAgentAction, request: Request):
+    results = await cancel_on_disconnect(request, agent_core.process_batch(batch.actions))
+    return {"results": results}
+
+def run_and_log_sandbox_task(task: SandboxTask) -> Dict[str, Any]:
     result = agent_core.run_sandbox_task(task)
     save_log({
         "timestamp": get_timestamp(),
+        "request_id": current_request_id(),
         "user_id": task.user_id,
         "input_text": task.script,
         "action_type": "sandbox",
+        "source": "sandbox",
         "result": result,
         "context": {"language": task.language}
     })
     return result
 
+@app.post("/sandbox")
+async def sandbox_run(task: SandboxTask):
+    # Blocks this request until the script ends, but not the event loop
+    return await asyncio.to_thread(run_and_log_sandbox_task, task)
+
+@app.post("/sandbox/stream")
+async def sandbox_stream(task: SandboxTask):
+    # SSE: {"stream": "stdout"|"stderr", "data": ...} chunks as the script
+    # prints them, then a {"done": true, ...} event. The generator is sync, so
+    # Starlette iterates it in a worker thread; a disconnect kills the script.
+    request_id = current_request_id()
+    def events():
+        output = {"stdout": [], "stderr": []}
+        outcome: Dict[str, Any] = {"done": False}
+        try:
+            for event in sandbox.stream_script(task.script, task.language):
+                if "stream" in event:
+                    output[event["stream"]].append(event["data"])
+                else:
+                    outcome = event
+                yield f"data: {json.dumps(event)}\n\n"
+        finally:
+            save_log({
+                "timestamp": get_timestamp(),
+                "request_id": request_id,
+                "user_id": task.user_id,
+                "input_text": task.script,
+                "action_type": "sandbox",
+                "source": "sandbox",
+                "result": {"output": "".join(output["stdout"]), "error": "".join(output["stderr"]), **outcome},
+                "context": {"language": task.language, "streamed": True}
+            })
+    return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+@app.post("/sandbox/jobs", status_code=202)
+async def sandbox_submit_job(task: SandboxTask):
+    # Raises QueueFullError (429 + Retry-After) when too many jobs are waiting
+    job = sandbox_jobs.submit(lambda: run_and_log_sandbox_task(task))
+    return {"job_id": job.job_id, "status": job.status}
+
+@app.get("/sandbox/jobs/{job_id}")
+async def sandbox_get_job(job_id: str):
+    job = sandbox_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found or expired")
+    return job.to_dict()
+
 @app.get("/logs")
-async def get_logs(count: int = 20):
-    if not os.path.exists(LOG_PATH):
-        return []
-    with open(LOG_PATH, "r") as logf:
-        lines = logf.readlines()[-count:]
-        return [json.loads(line) for line in lines]
+async def get_logs(count: int = Query(20, ge=1, le=LOG_MAX_COUNT), user_id: Optional[str] = None, action_type: Optional[str] = None,
+                   source: Optional[str] = None, since: Optional[str] = None, until: Optional[str] = None,
+                   cursor: Optional[str] = None):
+    # Both paths return {"entries": [...], "next_cursor": ...}; next_cursor pages
+    # back through older entries. Entries still queued in the writer are flushed
+    # first so the reader sees them
+    await asyncio.to_thread(log_writer.flush)
+    try:
+        if not any((user_id, action_type, source, since, until, cursor)):
+            # Plain tail (oldest first), read backwards from the end of the active
+            # segment; sealed segments are only decompressed if it runs short. The
+            # cursor comes from the store, which the writer fills in the same flush
+            entries = await asyncio.to_thread(tail_entries, LOG_PATH, count)
+            return {"entries": entries, "next_cursor": await asyncio.to_thread(log_store.cursor_after, count)}
+        # Filtered query against the indexed store: newest first
+        return await asyncio.to_thread(
+            log_store.query, user_id=user_id, action_type=action_type, source=source,
+            since=since, until=until, cursor=cursor, limit=count
+        )
+    except ValueError as e:
+        # Bad cursor or limit: a validation error, like the count bounds above
+        raise HTTPException(status_code=422, detail=str(e))
+
+@app.get("/llm/cache/stats")
+async def llm_cache_stats():
+    stats = llm_cache.get_stats()
+    stats["single_flight"] = {**llm_single_flight.stats, "in_flight": llm_single_flight.in_flight()}
+    return stats
+
+@app.get("/llm/queue/stats")
+async def llm_queue_stats():
+    return llm_scheduler.get_stats()
+
+@app.get("/sessions/stats")
+async def session_stats():
+    return agent_core.sessions.get_stats()
+
+@app.get("/llm/backends")
+async def llm_backends():
+    return llm_pool.get_stats()
+
+@app.get("/sandbox/stats")
+async def sandbox_stats():
+    return {
+        "pool": sandbox.pool.get_stats() if sandbox.pool is not None else "disabled",
+        "jobs": sandbox_jobs.get_stats(),
+        "cache": sandbox_cache.get_stats() if sandbox_cache is not None else "disabled"
+    }
+
+@app.get("/traces")
+async def recent_traces(count: int = 20):
+    return {"traces": tracer.recent(count), "stats": tracer.stats}
+
+@app.get("/traces/{request_id}")
+async def get_trace(request_id: str):
+    trace = tracer.get(request_id)
+    if trace is None:
+        raise HTTPException(status_code=404, detail="Trace not found")
+    return trace
+
+@app.get("/metrics")
+async def get_metrics():
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+background_tasks: List[asyncio.Task] = []
+
+@app.on_event("startup")
+async def start_health_checks():
+    background_tasks.append(asyncio.ensure_future(llm_pool.run_health_checks(LLM_HEALTH_CHECK_INTERVAL_SEC)))
+
+@app.on_event("startup")
+async def start_sandbox_workers():
+    if sandbox.pool is not None:
+        await asyncio.to_thread(sandbox.pool.start)
+
+@app.on_event("shutdown")
+async def close_llm_client():
+    for task in background_tasks:
+        task.cancel()
+    await llm_client.aclose()
+
+@app.on_event("shutdown")
+async def drain_log_writer():
+    await asyncio.to_thread(log_writer.close)
+
+@app.on_event("shutdown")
+async def stop_sandbox_workers():
+    await asyncio.to_thread(sandbox_jobs.close)
+    await asyncio.to_thread(sandbox.close)
 
 @app.get("/")
 def root():
@@ -0,0 +1,134 @@
+# endpointPool.py
+import asyncio
+import itertools
+import logging
+import math
+import time
+from typing import Any, Dict, List, Optional, Tuple, Union
+from urllib.parse import urljoin
+
+import httpx
+
+from src.core.masterAIAgent.llmScheduler import AdmissionError
+
+
+class NoHealthyBackendError(AdmissionError):
+    status_code = 503
+
+
+class Replica:
+    def __init__(self, url: str):
+        self.url = url
+        self.outstanding = 0
+        self.healthy = True
+        self.consecutive_failures = 0
+        self.opened_at: Optional[float] = None  # circuit open since (None = closed)
+        self.trial: Optional[int] = None  # half-open: token of the one request let through
+        self.stats = {"requests": 0, "failures": 0, "breaker_trips": 0}
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "url": self.url,
+            "outstanding": self.outstanding,
+            "healthy": self.healthy,
+            "breaker": "closed" if self.opened_at is None else "open",
+            "consecutive_failures": self.consecutive_failures,
+            **self.stats
+        }
+
+
+class EndpointPool:
+    def __init__(self, endpoints: Dict[str, Union[str, List[str]]], failure_threshold=3, reset_timeout_sec=30):
+        """
+        Replica sets per model with least-outstanding-requests balancing and a
+        circuit breaker per replica.
+        :param endpoints: model name -> generate URL or list of replica URLs.
+        :param failure_threshold: consecutive failures (timeouts, transport errors, 5xx) that open the breaker.
+        :param reset_timeout_sec: seconds an open breaker waits before letting one trial request through.
+        """
+        self.failure_threshold = failure_threshold
+        self.reset_timeout_sec = reset_timeout_sec
+        self.replicas: Dict[str, List[Replica]] = {
+            model: [Replica(url) for url in ([urls] if isinstance(urls, str) else urls)]
+            for model, urls in endpoints.items()
+        }
+        self._trial_tokens = itertools.count(1)
+
+    def _available(self, replica: Replica, now: float) -> bool:
+        if not replica.healthy:
+            return False
+        if replica.opened_at is None:
+            return True
+        # Half-open after the reset timeout: admit a single trial request
+        return now - replica.opened_at >= self.reset_timeout_sec and replica.trial is None
+
+    def acquire(self, model: str, exclude=()) -> Tuple[Replica, Optional[int]]:
+        """
+        Pick the available replica with the fewest outstanding requests and count the request against it.
+        Returns (replica, trial): trial is a token when this is the half-open trial
+        request of an open breaker, else None. Pass both back to release().
+        """
+        now = time.monotonic()
+        candidates = [r for r in self.replicas[model] if r not in exclude and self._available(r, now)]
+        if not candidates:
+            raise NoHealthyBackendError(f"No healthy backend for {model}", self._retry_after(model, now))
+        replica = min(candidates, key=lambda r: r.outstanding)
+        trial = None
+        if replica.opened_at is not None:
+            trial = replica.trial = next(self._trial_tokens)
+        replica.outstanding += 1
+        replica.stats["requests"] += 1
+        return replica, trial
+
+    def release(self, replica: Replica, failed: bool, trial: Optional[int] = None):
+        replica.outstanding -= 1
+        if replica.opened_at is not None:
+            if trial is None or trial != replica.trial:
+                # Started before the breaker opened: only the trial decides whether it closes
+                if failed:
+                    replica.stats["failures"] += 1
+                return
+            replica.trial = None
+        if not failed:
+            replica.consecutive_failures = 0
+            replica.opened_at = None
+            return
+        replica.stats["failures"] += 1
+        replica.consecutive_failures += 1
+        if replica.opened_at is not None or replica.consecutive_failures >= self.failure_threshold:
+            if replica.opened_at is None:
+                replica.stats["breaker_trips"] += 1
+                logging.warning(f"Circuit opened for LLM backend {replica.url}")
+            replica.opened_at = time.monotonic()
+
+    def _retry_after(self, model: str, now: float) -> int:
+        waits = [
+            self.reset_timeout_sec - (now - r.opened_at)
+            for r in self.replicas[model] if r.healthy and r.opened_at is not None
+        ]
+        return max(1, math.ceil(min(waits))) if waits else self.reset_timeout_sec
+
+    async def probe(self, client: httpx.AsyncClient):
+        """
+        Check every replica once. The Ollama root URL answers 200 when the server is up.
+        """
+        async def check(replica: Replica):
+            try:
+                resp = await client.get(urljoin(replica.url, "/"))
+                healthy = resp.status_code < 500
+            except httpx.HTTPError:
+                healthy = False
+            if healthy != replica.healthy:
+                logging.warning(f"LLM backend {replica.url} is now {'healthy' if healthy else 'unhealthy'}")
+            replica.healthy = healthy
+
+        await asyncio.gather(*(check(r) for replicas in self.replicas.values() for r in replicas))
+
+    async def run_health_checks(self, interval_sec: float, timeout_sec: float = 5.0):
+        async with httpx.AsyncClient(timeout=timeout_sec) as client:
+            while True:
+                await self.probe(client)
+                await asyncio.sleep(interval_sec)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {model: [r.to_dict() for r in replicas] for model, replicas in self.replicas.items()}
@@ -0,0 +1,161 @@
+# llmCache.py
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+
+def normalize_prompt(prompt: str, exact: bool = False) -> str:
+    # Case and whitespace differences should not produce separate cache entries,
+    # except in code, where `Foo` and `foo` or a change of indentation are different
+    # programs: exact prompts only lose surrounding whitespace
+    if exact:
+        return prompt.strip()
+    return " ".join(prompt.split()).casefold()
+
+
+class LLMResponseCache:
+    def __init__(self, db_path: Optional[str] = None, max_entries=1024, ttl_sec=3600, max_disk_entries=100000):
+        """
+        Two-tier LLM response cache: in-memory LRU in front of a persistent SQLite table.
+        :param db_path: SQLite file for the persistent tier (None disables it).
+        :param max_entries: max entries held in memory.
+        :param ttl_sec: seconds a cached response stays valid in both tiers.
+        :param max_disk_entries: max rows kept in SQLite; oldest rows are pruned first.
+        get_memory() only touches the in-memory tier and is safe to call on the event
+        loop; get_disk() and put() do SQLite I/O and belong on a worker thread.
+        """
+        self.max_entries = max_entries
+        self.ttl_sec = ttl_sec
+        self.max_disk_entries = max_disk_entries
+        self._memory: "OrderedDict[str, tuple]" = OrderedDict()
+        # Guards only the in-memory tier and stats, never held during SQLite I/O
+        self._lock = threading.Lock()
+        self.stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "stores": 0, "bypassed": 0}
+        self.db_path = db_path
+        self._db = None
+        self._db_lock = threading.Lock()  # the write connection
+        self._readers = threading.local()  # a read connection per thread
+        self._writes = 0
+        if db_path:
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            # WAL: readers see the last commit and never wait for a writer
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS llm_cache ("
+                "key TEXT PRIMARY KEY, response TEXT NOT NULL, created_at REAL NOT NULL, expires_at REAL NOT NULL)"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS llm_cache_created ON llm_cache (created_at)")
+            self._db.commit()
+
+    @property
+    def persistent(self) -> bool:
+        return self._db is not None
+
+    @staticmethod
+    def make_key(model: str, prompt: str, options: Optional[Dict[str, Any]] = None, exact: bool = False) -> str:
+        raw = json.dumps([model, normalize_prompt(prompt, exact), options or {}], sort_keys=True)
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        response = self.get_memory(key)
+        if response is None and self.persistent:
+            response = self.get_disk(key)
+        return response
+
+    def get_memory(self, key: str) -> Optional[str]:
+        """
+        In-memory lookup only. A miss is counted here only when there is no disk tier.
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                response, expires_at = entry
+                if expires_at > now:
+                    self._memory.move_to_end(key)
+                    self.stats["memory_hits"] += 1
+                    return response
+                del self._memory[key]
+            if self._db is None:
+                self.stats["misses"] += 1
+            return None
+
+    def get_disk(self, key: str) -> Optional[str]:
+        """
+        SQLite lookup (blocking); a hit is promoted to the in-memory tier.
+        """
+        now = time.time()
+        row = None
+        if self._db is not None:
+            try:
+                row = self._reader().execute(
+                    "SELECT response, expires_at FROM llm_cache WHERE key = ?", (key,)
+                ).fetchone()
+            except sqlite3.Error as e:
+                logging.warning(f"LLM cache read failed: {e}")
+        with self._lock:
+            if row is not None and row[1] > now:
+                self._remember(key, row[0], row[1])
+                self.stats["disk_hits"] += 1
+                return row[0]
+            self.stats["misses"] += 1
+            return None
+
+    def _reader(self) -> sqlite3.Connection:
+        db = getattr(self._readers, "db", None)
+        if db is None:
+            db = self._readers.db = sqlite3.connect(self.db_path)
+        return db
+
+    def put(self, key: str, response: str):
+        now = time.time()
+        expires_at = now + self.ttl_sec
+        with self._lock:
+            self._remember(key, response, expires_at)
+            self.stats["stores"] += 1
+        if self._db is None:
+            return
+        with self._db_lock:
+            try:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO llm_cache (key, response, created_at, expires_at) VALUES (?, ?, ?, ?)",
+                    (key, response, now, expires_at)
+                )
+                self._writes += 1
+                if self._writes % 1000 == 0:
+                    self._prune(now)
+                self._db.commit()
+            except sqlite3.Error as e:
+                logging.warning(f"LLM cache write failed: {e}")
+
+    def _remember(self, key: str, response: str, expires_at: float):
+        self._memory[key] = (response, expires_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def _prune(self, now: float):
+        self._db.execute("DELETE FROM llm_cache WHERE expires_at <= ?", (now,))
+        self._db.execute(
+            "DELETE FROM llm_cache WHERE key IN ("
+            "SELECT key FROM llm_cache ORDER BY created_at DESC LIMIT -1 OFFSET ?)",
+            (self.max_disk_entries,)
+        )
+
+    def record_bypass(self):
+        with self._lock:
+            self.stats["bypassed"] += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self.stats)
+            stats["memory_entries"] = len(self._memory)
+        lookups = stats["memory_hits"] + stats["disk_hits"] + stats["misses"]
+        stats["hit_rate"] = round((stats["memory_hits"] + stats["disk_hits"]) / lookups, 4) if lookups else 0.0
+        return stats
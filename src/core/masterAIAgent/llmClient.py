@@ -0,0 +1,130 @@
+# llmClient.py
+import asyncio
+import json
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, List, Optional, Union
+
+import httpx
+
+from src.core.masterAIAgent.endpointPool import EndpointPool, Replica
+
+# Errors that count against a replica's circuit breaker
+_BACKEND_ERRORS = (httpx.TimeoutException, httpx.TransportError)
+
+
+class AsyncLLMClient:
+    def __init__(self, endpoints: Dict[str, Union[str, List[str]]], max_concurrency: Optional[Dict[str, int]] = None,
+                 default_concurrency=4, timeout_sec=120, max_keepalive=8, pool: Optional[EndpointPool] = None):
+        """
+        Non-blocking client for the Ollama generate endpoints.
+        :param endpoints: model name -> generate URL, or a list of replica URLs.
+        :param max_concurrency: model name -> max generations in flight for that model.
+        :param default_concurrency: limit for models missing from max_concurrency.
+        :param timeout_sec: per-request read timeout.
+        :param max_keepalive: idle keep-alive connections kept per endpoint.
+        :param pool: replica pool to balance across (built from endpoints if omitted).
+        """
+        self.endpoints = endpoints
+        self.pool = pool or EndpointPool(endpoints)
+        self.max_concurrency = max_concurrency or {}
+        self.default_concurrency = default_concurrency
+        self.timeout = httpx.Timeout(timeout_sec, connect=10.0)
+        self.max_keepalive = max_keepalive
+        self._clients: Dict[str, httpx.AsyncClient] = {}
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+        self.in_flight: Dict[str, int] = {model: 0 for model in endpoints}
+
+    def _limit(self, model: str) -> int:
+        return self.max_concurrency.get(model, self.default_concurrency)
+
+    def _client(self, url: str) -> httpx.AsyncClient:
+        # One pooled client per endpoint so keep-alive connections are reused
+        client = self._clients.get(url)
+        if client is None:
+            limits = httpx.Limits(max_connections=None, max_keepalive_connections=self.max_keepalive)
+            client = httpx.AsyncClient(timeout=self.timeout, limits=limits)
+            self._clients[url] = client
+        return client
+
+    def _semaphore(self, model: str) -> asyncio.Semaphore:
+        semaphore = self._semaphores.get(model)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(self._limit(model))
+            self._semaphores[model] = semaphore
+        return semaphore
+
+    @asynccontextmanager
+    async def _replica(self, model: str, tried: List[Replica]):
+        # Count the request against the chosen replica and report the outcome
+        # to its circuit breaker; cancellation is not the backend's fault.
+        replica, trial = self.pool.acquire(model, exclude=tried)
+        tried.append(replica)
+        failed = False
+        try:
+            yield replica
+        except _BACKEND_ERRORS:
+            failed = True
+            raise
+        except httpx.HTTPStatusError as e:
+            failed = e.response.status_code >= 500
+            raise
+        finally:
+            self.pool.release(replica, failed, trial)
+
+    async def generate(self, model: str, prompt: str, options: Optional[Dict[str, Any]] = None) -> str:
+        """
+        Run one generation and return the response text. Raises on HTTP or transport errors.
+        Cancelling the awaiting task aborts the upstream request and frees its slot.
+        A replica that refuses the connection is skipped in favour of the next one.
+        """
+        payload: Dict[str, Any] = {"model": model, "prompt": prompt, "stream": False}
+        if options:
+            payload["options"] = options
+        async with self._semaphore(model):
+            self.in_flight[model] = self.in_flight.get(model, 0) + 1
+            tried: List[Replica] = []
+            try:
+                while True:
+                    try:
+                        async with self._replica(model, tried) as replica:
+                            resp = await self._client(replica.url).post(replica.url, json=payload)
+                            resp.raise_for_status()
+                            return resp.json().get("response", "")
+                    except httpx.ConnectError:
+                        # Nothing was sent, so another replica can safely take it
+                        if len(tried) >= len(self.pool.replicas[model]):
+                            raise
+            finally:
+                self.in_flight[model] -= 1
+
+    async def stream(self, model: str, prompt: str, options: Optional[Dict[str, Any]] = None) -> AsyncIterator[str]:
+        """
+        Run one generation with Ollama streaming enabled and yield response tokens as they arrive.
+        """
+        payload: Dict[str, Any] = {"model": model, "prompt": prompt, "stream": True}
+        if options:
+            payload["options"] = options
+        async with self._semaphore(model):
+            self.in_flight[model] = self.in_flight.get(model, 0) + 1
+            try:
+                async with self._replica(model, []) as replica, \
+                        self._client(replica.url).stream("POST", replica.url, json=payload) as resp:
+                    resp.raise_for_status()
+                    # Ollama streams one JSON object per line
+                    async for line in resp.aiter_lines():
+                        if not line:
+                            continue
+                        chunk = json.loads(line)
+                        if chunk.get("error"):
+                            raise RuntimeError(chunk["error"])
+                        if chunk.get("response"):
+                            yield chunk["response"]
+                        if chunk.get("done"):
+                            break
+            finally:
+                self.in_flight[model] -= 1
+
+    async def aclose(self):
+        clients, self._clients = self._clients, {}
+        for client in clients.values():
+            await client.aclose()
@@ -0,0 +1,163 @@
+# llmScheduler.py
+import asyncio
+import heapq
+import itertools
+import math
+import time
+from contextlib import asynccontextmanager
+from typing import Any, Dict, List, Optional
+
+
+class AdmissionError(Exception):
+    status_code = 503
+
+    def __init__(self, message: str, retry_after: int):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class QueueFullError(AdmissionError):
+    status_code = 429
+
+
+class DeadlineExceededError(AdmissionError):
+    status_code = 503
+
+
+class _ModelQueue:
+    def __init__(self, concurrency: int, max_queue: int):
+        self.concurrency = concurrency
+        self.max_queue = max_queue
+        self.active = 0
+        self.waiting = 0
+        self.heap: List[list] = []  # [priority, seq, deadline, future]
+        self.service_ewma = 0.0  # smoothed seconds per generation
+        self.stats = {
+            "admitted": 0, "rejected_full": 0, "dropped_deadline": 0,
+            "wait_count": 0, "wait_sum_sec": 0.0, "wait_max_sec": 0.0
+        }
+
+
+class LLMScheduler:
+    def __init__(self, max_concurrency: Optional[Dict[str, int]] = None, default_concurrency=4, max_queue=64):
+        """
+        Per-model admission control in front of the LLM backends.
+        :param max_concurrency: model name -> generations allowed to run at once.
+        :param default_concurrency: limit for models missing from max_concurrency.
+        :param max_queue: waiters allowed per model before new requests get QueueFullError.
+        Lower priority values are served first; FIFO within a priority.
+        """
+        self.max_concurrency = max_concurrency or {}
+        self.default_concurrency = default_concurrency
+        self.max_queue = max_queue
+        self._queues: Dict[str, _ModelQueue] = {}
+        self._seq = itertools.count()
+
+    def _queue(self, model: str) -> _ModelQueue:
+        q = self._queues.get(model)
+        if q is None:
+            q = _ModelQueue(self.max_concurrency.get(model, self.default_concurrency), self.max_queue)
+            self._queues[model] = q
+        return q
+
+    def _estimated_wait(self, q: _ModelQueue, ahead: int) -> float:
+        return (ahead + 1) / max(q.concurrency, 1) * q.service_ewma
+
+    def _retry_after(self, q: _ModelQueue) -> int:
+        return max(1, math.ceil(self._estimated_wait(q, q.waiting)))
+
+    @asynccontextmanager
+    async def slot(self, model: str, priority: int = 0, timeout: Optional[float] = None):
+        """
+        Hold one generation slot for `model` for the duration of the block.
+        Raises QueueFullError when the queue is full and DeadlineExceededError
+        when the request cannot start within `timeout` seconds.
+        """
+        q = self._queue(model)
+        enqueued = time.monotonic()
+        deadline = enqueued + timeout if timeout is not None else None
+        if q.active < q.concurrency and q.waiting == 0:
+            q.active += 1
+        else:
+            self._refuse_if_over(q, model, priority, timeout)
+            future = asyncio.get_running_loop().create_future()
+            heapq.heappush(q.heap, [priority, next(self._seq), deadline, future])
+            q.waiting += 1
+            try:
+                remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+                await asyncio.wait_for(future, remaining)
+            except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+                if future.done() and not future.cancelled() and future.exception() is None:
+                    # Slot was handed over just as we gave up: pass it on
+                    self._release(q)
+                elif not future.done() or future.cancelled():
+                    q.waiting -= 1
+                if isinstance(e, asyncio.TimeoutError):
+                    q.stats["dropped_deadline"] += 1
+                    raise DeadlineExceededError(f"LLM request for {model} expired in queue", self._retry_after(q))
+                raise
+        waited = time.monotonic() - enqueued
+        q.stats["admitted"] += 1
+        q.stats["wait_count"] += 1
+        q.stats["wait_sum_sec"] += waited
+        q.stats["wait_max_sec"] = max(q.stats["wait_max_sec"], waited)
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            elapsed = time.monotonic() - started
+            q.service_ewma = elapsed if not q.service_ewma else 0.8 * q.service_ewma + 0.2 * elapsed
+            self._release(q)
+
+    def check(self, model: str, priority: int = 0, timeout: Optional[float] = None):
+        """
+        Raise the QueueFullError or DeadlineExceededError a slot() request would
+        get right now, without taking a slot. For callers that must refuse before
+        committing to a response (a stream's status line); slot() still decides.
+        """
+        q = self._queue(model)
+        if q.active >= q.concurrency or q.waiting > 0:
+            self._refuse_if_over(q, model, priority, timeout)
+
+    def _refuse_if_over(self, q: _ModelQueue, model: str, priority: int, timeout: Optional[float]):
+        if q.waiting >= q.max_queue:
+            q.stats["rejected_full"] += 1
+            raise QueueFullError(f"LLM queue for {model} is full", self._retry_after(q))
+        ahead = sum(1 for entry in q.heap if entry[0] <= priority and not entry[3].done())
+        if timeout is not None and q.service_ewma and self._estimated_wait(q, ahead) > timeout:
+            # Would miss its deadline anyway: fail now instead of queueing
+            q.stats["dropped_deadline"] += 1
+            raise DeadlineExceededError(f"LLM queue for {model} cannot meet deadline", self._retry_after(q))
+
+    def _release(self, q: _ModelQueue):
+        # Hand the slot straight to the best live waiter, dropping expired ones
+        now = time.monotonic()
+        while q.heap:
+            _, _, deadline, future = heapq.heappop(q.heap)
+            if future.done():
+                continue
+            q.waiting -= 1
+            if deadline is not None and deadline <= now:
+                q.stats["dropped_deadline"] += 1
+                future.set_exception(DeadlineExceededError("LLM request expired in queue", self._retry_after(q)))
+                continue
+            future.set_result(None)
+            return
+        q.active -= 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        stats = {}
+        for model, q in self._queues.items():
+            depth: Dict[int, int] = {}
+            for priority, _, _, future in q.heap:
+                if not future.done():
+                    depth[priority] = depth.get(priority, 0) + 1
+            stats[model] = {
+                **q.stats,
+                "active": q.active,
+                "queued": q.waiting,
+                "queued_by_priority": depth,
+                "wait_avg_sec": round(q.stats["wait_sum_sec"] / q.stats["wait_count"], 4) if q.stats["wait_count"] else 0.0,
+                "service_ewma_sec": round(q.service_ewma, 4)
+            }
+        return stats
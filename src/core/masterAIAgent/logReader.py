@@ -0,0 +1,64 @@
+# logReader.py
+import json
+import os
+from itertools import islice
+from typing import Any, Dict, List
+
+from src.core.log_segments import iter_lines_reversed, sealed_segments
+
+
+def _complete_lines(blocks: List[bytes], pos: int) -> List[bytes]:
+    pieces = b"".join(reversed(blocks)).split(b"\n")
+    if pos > 0:
+        # The first piece may be the tail end of an earlier line
+        pieces = pieces[1:]
+    return [line for line in pieces if line.strip()]
+
+
+def tail_lines(path: str, count: int, block_size: int = 64 * 1024) -> List[bytes]:
+    """
+    Return the last `count` non-empty lines of a file, oldest first.
+    Reads fixed-size blocks backwards from the end, so the cost depends on
+    `count` and line length, not on the file size.
+    """
+    if count <= 0:
+        return []
+    with open(path, "rb") as f:
+        f.seek(0, os.SEEK_END)
+        pos = f.tell()
+        blocks: List[bytes] = []
+        newlines = 0
+        needed = count
+        while pos > 0:
+            read_size = min(block_size, pos)
+            pos -= read_size
+            f.seek(pos)
+            block = f.read(read_size)
+            blocks.append(block)
+            newlines += block.count(b"\n")
+            # count + 1 newlines give `count` complete lines unless some are blank
+            if newlines > needed:
+                lines = _complete_lines(blocks, pos)
+                if len(lines) >= count:
+                    return lines[-count:]
+                needed = newlines + count - len(lines)
+    return _complete_lines(blocks, pos)[-count:]
+
+
+def tail_entries(path: str, count: int) -> List[Dict[str, Any]]:
+    """
+    Last `count` JSONL entries of an action log; lines that fail to parse are skipped.
+    Older sealed segments are only opened if the active file holds fewer than `count` lines.
+    """
+    if count < 1:
+        return []
+    lines = tail_lines(path, count) if os.path.exists(path) else []
+    if len(lines) < count and sealed_segments(path):
+        lines = list(islice(iter_lines_reversed(path), count))[::-1]
+    entries = []
+    for line in lines:
+        try:
+            entries.append(json.loads(line))
+        except ValueError:
+            continue
+    return entries
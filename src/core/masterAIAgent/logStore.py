@@ -0,0 +1,145 @@
+# logStore.py
+import base64
+import json
+import sqlite3
+import sys
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+# Filterable columns -> entry keys they are copied from
+INDEXED_FIELDS = ("user_id", "action_type", "source")
+
+
+def encode_cursor(timestamp: str, row_id: int) -> str:
+    return base64.urlsafe_b64encode(json.dumps([timestamp, row_id]).encode()).decode()
+
+
+def decode_cursor(cursor: str) -> Tuple[str, int]:
+    try:
+        timestamp, row_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return str(timestamp), int(row_id)
+    except (ValueError, TypeError):
+        raise ValueError("Invalid cursor")
+
+
+class ActionLogStore:
+    def __init__(self, db_path: str):
+        """
+        Queryable copy of the action log in SQLite (WAL mode), indexed on
+        timestamp, user_id, action_type and source. Inserts come from the
+        background log writer thread; queries may run on any thread.
+        """
+        self.db_path = db_path
+        self._local = threading.local()
+        db = self._connect()
+        db.execute(
+            "CREATE TABLE IF NOT EXISTS action_log ("
+            "id INTEGER PRIMARY KEY, timestamp TEXT NOT NULL, user_id TEXT, "
+            "action_type TEXT, source TEXT, entry TEXT NOT NULL)"
+        )
+        db.execute("CREATE INDEX IF NOT EXISTS action_log_ts ON action_log (timestamp, id)")
+        for field in INDEXED_FIELDS:
+            db.execute(f"CREATE INDEX IF NOT EXISTS action_log_{field} ON action_log ({field}, timestamp, id)")
+        db.commit()
+
+    def _connect(self) -> sqlite3.Connection:
+        # One connection per thread; WAL lets readers run alongside the writer
+        db = getattr(self._local, "db", None)
+        if db is None:
+            db = sqlite3.connect(self.db_path)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            self._local.db = db
+        return db
+
+    def insert_many(self, entries: List[Dict[str, Any]]):
+        db = self._connect()
+        db.executemany(
+            "INSERT INTO action_log (timestamp, user_id, action_type, source, entry) VALUES (?, ?, ?, ?, ?)",
+            [
+                (
+                    entry.get("timestamp", ""), entry.get("user_id"), entry.get("action_type"),
+                    entry.get("source"), json.dumps(entry)
+                )
+                for entry in entries
+            ]
+        )
+        db.commit()
+
+    def query(self, user_id: Optional[str] = None, action_type: Optional[str] = None, source: Optional[str] = None,
+              since: Optional[str] = None, until: Optional[str] = None, cursor: Optional[str] = None,
+              limit: int = 50) -> Dict[str, Any]:
+        """
+        Newest-first page of entries matching every given filter.
+        `since`/`until` are ISO timestamps (inclusive / exclusive). Pass the
+        returned `next_cursor` back to fetch the following page; it is None on the last page.
+        Raises ValueError for a bad cursor or a limit below 1.
+        """
+        if limit < 1:
+            # SQLite would read LIMIT 0 as "none" and a negative one as "all rows"
+            raise ValueError("limit must be at least 1")
+        clauses, params = [], []
+        for column, value in (("user_id", user_id), ("action_type", action_type), ("source", source)):
+            if value is not None:
+                clauses.append(f"{column} = ?")
+                params.append(value)
+        if since is not None:
+            clauses.append("timestamp >= ?")
+            params.append(since)
+        if until is not None:
+            clauses.append("timestamp < ?")
+            params.append(until)
+        if cursor is not None:
+            # Keyset pagination: resume strictly after the last row of the previous page
+            clauses.append("(timestamp, id) < (?, ?)")
+            params.extend(decode_cursor(cursor))
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        rows = self._connect().execute(
+            f"SELECT id, timestamp, entry FROM action_log {where} ORDER BY timestamp DESC, id DESC LIMIT ?",
+            params + [limit + 1]
+        ).fetchall()
+        next_cursor = encode_cursor(rows[limit - 1][1], rows[limit - 1][0]) if len(rows) > limit else None
+        return {"entries": [json.loads(row[2]) for row in rows[:limit]], "next_cursor": next_cursor}
+
+    def cursor_after(self, count: int) -> Optional[str]:
+        """
+        The `next_cursor` query(limit=count) would return without filters: where
+        the page after the newest `count` entries starts, or None if there is none.
+        Raises ValueError for a count below 1.
+        """
+        if count < 1:
+            raise ValueError("limit must be at least 1")
+        rows = self._connect().execute(
+            "SELECT id, timestamp FROM action_log ORDER BY timestamp DESC, id DESC LIMIT 2 OFFSET ?", (count - 1,)
+        ).fetchall()
+        return encode_cursor(rows[0][1], rows[0][0]) if len(rows) > 1 else None
+
+    def import_jsonl(self, path: str, batch_size: int = 10000) -> int:
+        """
+        Backfill the store from an existing JSONL action log. Returns the number of entries imported.
+        """
+        imported = 0
+        batch = []
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    batch.append(json.loads(line))
+                except ValueError:
+                    continue
+                if len(batch) >= batch_size:
+                    self.insert_many(batch)
+                    imported += len(batch)
+                    batch = []
+        if batch:
+            self.insert_many(batch)
+            imported += len(batch)
+        return imported
+
+
+if __name__ == "__main__":
+    # Backfill: python -m src.core.masterAIAgent.logStore tess_action_log.jsonl tess_action_log.sqlite3
+    if len(sys.argv) != 3:
+        print("Usage: python -m src.core.masterAIAgent.logStore <log.jsonl> <store.sqlite3>")
+        sys.exit(1)
+    count = ActionLogStore(sys.argv[2]).import_jsonl(sys.argv[1])
+    print(f"Imported {count} entries into {sys.argv[2]}")
@@ -0,0 +1,140 @@
+# logWriter.py
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from src.core.log_segments import SegmentPolicy
+
+DURABILITY_MODES = ("none", "flush", "fsync")
+
+_STOP = object()
+
+
+class BackgroundLogWriter:
+    def __init__(self, path: str, batch_size=256, flush_interval_sec=0.5, durability="flush", max_queue=100000,
+                 sinks: Optional[List[Callable[[List[Dict[str, Any]]], None]]] = None,
+                 rotation: Optional[SegmentPolicy] = None):
+        """
+        Append JSON lines to `path` from a background thread.
+        :param path: JSONL file to append to.
+        :param batch_size: entries written together once this many are queued.
+        :param flush_interval_sec: max seconds an entry waits before its batch is written.
+        :param durability: 'none' (leave it to the OS), 'flush' (flush each batch)
+                           or 'fsync' (flush + fsync each batch).
+        :param max_queue: queued entries before write() blocks the caller.
+        :param sinks: extra callables given each written batch on the writer thread (e.g. an indexed store).
+        :param rotation: when set, the file is sealed into numbered (compressed) segments by this policy.
+        """
+        if durability not in DURABILITY_MODES:
+            raise ValueError(f"durability must be one of {DURABILITY_MODES}")
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval_sec = flush_interval_sec
+        self.durability = durability
+        self.sinks = sinks or []
+        self.rotation = rotation
+        self._queue: "queue.Queue" = queue.Queue(maxsize=max_queue)
+        self.stats = {"entries": 0, "batches": 0, "errors": 0, "sink_errors": 0, "rotations": 0}
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="tess-log-writer", daemon=True)
+        self._thread.start()
+
+    def write(self, entry: Dict[str, Any]):
+        if self._closed:
+            raise RuntimeError("Log writer is closed")
+        self._queue.put(entry)
+
+    def write_many(self, entries: List[Dict[str, Any]]):
+        for entry in entries:
+            self.write(entry)
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """
+        Block until everything queued so far is written and flushed to the file.
+        """
+        if self._closed:
+            return True
+        done = threading.Event()
+        self._queue.put(done)
+        return done.wait(timeout)
+
+    def close(self, timeout: float = 10.0):
+        """
+        Drain the queue, flush and stop the writer thread.
+        """
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(_STOP)
+        self._thread.join(timeout)
+
+    def _run(self):
+        logf = open(self.path, "a", encoding="utf-8")
+        batch: List[Dict[str, Any]] = []
+        deadline = 0.0
+        try:
+            while True:
+                timeout = max(0.0, deadline - time.monotonic()) if batch else None
+                try:
+                    item = self._queue.get(timeout=timeout)
+                except queue.Empty:
+                    item = None  # flush interval reached
+                if item is None or item is _STOP or isinstance(item, threading.Event):
+                    self._write(logf, batch, force_flush=item is not None)
+                    logf = self._maybe_rotate(logf)
+                    batch = []
+                    if item is _STOP:
+                        return
+                    if isinstance(item, threading.Event):
+                        item.set()
+                    continue
+                if not batch:
+                    deadline = time.monotonic() + self.flush_interval_sec
+                batch.append(item)
+                if len(batch) >= self.batch_size:
+                    self._write(logf, batch)
+                    logf = self._maybe_rotate(logf)
+                    batch = []
+        finally:
+            logf.close()
+
+    def _maybe_rotate(self, logf):
+        if self.rotation is None or not self.rotation.due(logf.tell()):
+            return logf
+        logf.close()
+        try:
+            self.rotation.rotate()
+            self.stats["rotations"] += 1
+        except Exception as e:
+            self.stats["errors"] += 1
+            logging.error(f"Action log rotation failed: {e}")
+        return open(self.path, "a", encoding="utf-8")
+
+    def _write(self, logf, batch: List[Dict[str, Any]], force_flush=False):
+        try:
+            if batch:
+                logf.write("".join(json.dumps(entry) + "\n" for entry in batch))
+                self.stats["entries"] += len(batch)
+                self.stats["batches"] += 1
+            if self.durability != "none" or force_flush:
+                logf.flush()
+            if self.durability == "fsync" and batch:
+                os.fsync(logf.fileno())
+        except Exception as e:
+            self.stats["errors"] += 1
+            logging.error(f"Action log write failed: {e}")
+        if not batch:
+            return
+        for sink in self.sinks:
+            try:
+                sink(batch)
+            except Exception as e:
+                self.stats["sink_errors"] += 1
+                logging.error(f"Action log sink failed: {e}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {**self.stats, "queued": self._queue.qsize(), "durability": self.durability}
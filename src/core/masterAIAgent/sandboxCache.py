@@ -0,0 +1,58 @@
+# sandboxCache.py
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+
+class SandboxResultCache:
+    def __init__(self, max_entries=512, max_bytes=16 * 1024 * 1024):
+        """
+        Content-addressed LRU cache of successful sandbox results.
+        :param max_entries: results kept at most.
+        :param max_bytes: total size of the kept results (their JSON encoding) at most.
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()  # key -> (result, size)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "stores": 0, "evictions": 0, "too_large": 0}
+
+    @staticmethod
+    def make_key(script: str, language: str, fingerprint: Dict[str, Any]) -> str:
+        # fingerprint: interpreter version and limits, which can change a run's outcome
+        raw = json.dumps([script, language.lower(), fingerprint], sort_keys=True)
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.stats["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self.stats["hits"] += 1
+            return dict(entry[0])
+
+    def put(self, key: str, result: Dict[str, Any]):
+        size = len(json.dumps(result).encode("utf-8"))
+        with self._lock:
+            if size > self.max_bytes:
+                self.stats["too_large"] += 1
+                return
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old[1]
+            self._entries[key] = (dict(result), size)
+            self._bytes += size
+            self.stats["stores"] += 1
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+                self.stats["evictions"] += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {**self.stats, "entries": len(self._entries), "bytes": self._bytes, "max_bytes": self.max_bytes}
@@ -0,0 +1,135 @@
+# sandboxJobs.py
+import contextvars
+import logging
+import queue
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional
+from uuid import uuid4
+
+from src.core.masterAIAgent.llmScheduler import QueueFullError
+
+_STOP = object()
+
+
+class SandboxJob:
+    __slots__ = ("job_id", "status", "created", "started", "finished", "result", "error")
+
+    def __init__(self, job_id: str):
+        self.job_id = job_id
+        self.status = "queued"
+        self.created = time.time()
+        self.started: Optional[float] = None
+        self.finished: Optional[float] = None
+        self.result: Any = None
+        self.error: Optional[str] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        job = {
+            "job_id": self.job_id,
+            "status": self.status,
+            "created": self.created,
+            "started": self.started,
+            "finished": self.finished
+        }
+        if self.status == "done":
+            job["result"] = self.result
+        elif self.status == "failed":
+            job["error"] = self.error
+        return job
+
+
+class SandboxJobQueue:
+    def __init__(self, workers=2, max_queue=100, result_ttl_sec=600, max_results=1000):
+        """
+        Runs submitted sandbox work on a fixed set of threads, off the event loop.
+        :param workers: jobs run at once.
+        :param max_queue: jobs allowed to wait before submit() raises QueueFullError.
+        :param result_ttl_sec: seconds a finished job's result stays retrievable.
+        :param max_results: finished jobs kept at most; the oldest are dropped first.
+        """
+        self.result_ttl_sec = result_ttl_sec
+        self.max_results = max_results
+        self._queue: "queue.Queue" = queue.Queue(maxsize=max_queue)
+        self._jobs: Dict[str, SandboxJob] = {}
+        # Finished jobs in completion order, for expiry
+        self._finished: "OrderedDict[str, float]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"submitted": 0, "rejected_full": 0, "done": 0, "failed": 0, "expired": 0}
+        self._threads = [
+            threading.Thread(target=self._run, name=f"tess-sandbox-job-{i}", daemon=True)
+            for i in range(workers)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def submit(self, fn: Callable[[], Any]) -> SandboxJob:
+        """
+        Queue `fn` and return its job right away. `fn` runs in the caller's
+        context (so request ids carry over into its log entries).
+        Raises QueueFullError when max_queue jobs are already waiting.
+        """
+        job = SandboxJob(uuid4().hex)
+        context = contextvars.copy_context()
+        with self._lock:
+            self._expire()
+            try:
+                self._queue.put_nowait((job, context, fn))
+            except queue.Full:
+                self.stats["rejected_full"] += 1
+                raise QueueFullError("Sandbox job queue is full", retry_after=5)
+            self._jobs[job.job_id] = job
+            self.stats["submitted"] += 1
+        return job
+
+    def get(self, job_id: str) -> Optional[SandboxJob]:
+        with self._lock:
+            self._expire()
+            return self._jobs.get(job_id)
+
+    def _expire(self):
+        # Called with the lock held
+        now = time.time()
+        while self._finished:
+            job_id, finished = next(iter(self._finished.items()))
+            if now - finished < self.result_ttl_sec and len(self._finished) <= self.max_results:
+                break
+            self._finished.popitem(last=False)
+            self._jobs.pop(job_id, None)
+            self.stats["expired"] += 1
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is _STOP:
+                return
+            job, context, fn = item
+            job.status = "running"
+            job.started = time.time()
+            try:
+                job.result = context.run(fn)
+                job.status = "done"
+            except Exception as e:
+                logging.error(f"Sandbox job {job.job_id} failed: {e}")
+                job.error = str(e)
+                job.status = "failed"
+            job.finished = time.time()
+            with self._lock:
+                self.stats[job.status] += 1
+                self._finished[job.job_id] = job.finished
+                self._expire()
+
+    def close(self, timeout: float = 5.0):
+        """
+        Stop the worker threads once the jobs already queued have run.
+        """
+        for _ in self._threads:
+            self._queue.put(_STOP)
+        for thread in self._threads:
+            thread.join(timeout)
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            running = sum(1 for job in self._jobs.values() if job.status == "running")
+            return {**self.stats, "queued": self._queue.qsize(), "running": running, "stored": len(self._jobs)}
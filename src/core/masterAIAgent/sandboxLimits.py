@@ -0,0 +1,137 @@
+# sandboxLimits.py
+import json
+import math
+import os
+import signal
+import sys
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# prlimit() sets limits on another process by pid, so nothing has to run
+# between fork and exec in the (multi-threaded) server. Linux only.
+LIMITS_SUPPORTED = resource is not None and hasattr(resource, "prlimit")
+
+# Run as `python -I -S -c LAUNCHER <limits json> <argv...>`: sets the limits on
+# itself, then execs the real command, which inherits them. Nothing of the
+# script runs before the limits are in place.
+LAUNCHER = """
+import json, os, resource, sys
+try:
+    for name, soft, hard in json.loads(sys.argv[1]):
+        resource.setrlimit(getattr(resource, name), (soft, hard))
+except (OSError, ValueError) as e:
+    sys.stderr.write(f"Error applying sandbox limits: {e}\\n")
+    os._exit(126)
+os.execv(sys.argv[2], sys.argv[2:])
+"""
+
+_SIGNAL_MESSAGES = {
+    getattr(signal, "SIGXCPU", None): "CPU time limit exceeded.",
+    getattr(signal, "SIGXFSZ", None): "File size limit exceeded.",
+}
+
+
+class SandboxLimits:
+    def __init__(self, memory_limit_mb=100, cpu_limit_sec=60, max_processes=64, max_file_mb=64):
+        """
+        Kernel-enforced limits for sandbox processes (0 leaves a limit unset).
+        :param memory_limit_mb: address space (RLIMIT_AS); allocations beyond it fail with MemoryError.
+        :param cpu_limit_sec: CPU seconds (RLIMIT_CPU); the process gets SIGXCPU past it.
+        :param max_processes: RLIMIT_NPROC. Linux counts every process of the user, so this is
+                              only a tight bound when the sandbox runs as its own user.
+        :param max_file_mb: largest file a script may write (RLIMIT_FSIZE).
+        """
+        self.memory_limit_mb = memory_limit_mb
+        self.cpu_limit_sec = cpu_limit_sec
+        self.max_processes = max_processes
+        self.max_file_mb = max_file_mb
+
+    def rlimits(self, cpu_hard_sec: Optional[int] = None, processes: bool = True) -> List[Tuple[str, int, int]]:
+        """
+        (RLIMIT_* name, soft, hard) for every limit that is set. `cpu_hard_sec`
+        raises the CPU hard limit above the soft one (for processes that lower
+        the soft limit per run); processes=False leaves out RLIMIT_NPROC.
+        """
+        cpu = int(math.ceil(self.cpu_limit_sec or 0))
+        limits = (
+            ("RLIMIT_AS", self.memory_limit_mb * 1024 * 1024, None),
+            ("RLIMIT_CPU", cpu, cpu_hard_sec or cpu + 1),
+            ("RLIMIT_NPROC", self.max_processes if processes else 0, None),
+            ("RLIMIT_FSIZE", self.max_file_mb * 1024 * 1024, None),
+        )
+        return [(name, soft, hard or soft) for name, soft, hard in limits if soft]
+
+    def apply(self, pid: int, cpu_hard_sec: Optional[int] = None):
+        """
+        Set the limits on a running process. Only for processes that haven't run
+        untrusted code yet (pool workers before their first job); scripts are
+        started through launch_command() instead.
+        RLIMIT_NPROC is not set: Linux counts it across all of the user's processes
+        and a pool worker has to fork for every job, so each job's child sets it
+        on itself instead.
+        """
+        if not LIMITS_SUPPORTED:
+            return
+        for name, soft, hard in self.rlimits(cpu_hard_sec, processes=False):
+            resource.prlimit(pid, getattr(resource, name), (soft, hard))
+
+    def launch_command(self, argv: List[str], python: str = sys.executable) -> List[str]:
+        """
+        `argv` wrapped so the limits are set in the new process before it execs
+        the command (argv[0] must be an absolute path for the exec).
+        """
+        if not LIMITS_SUPPORTED:
+            return argv
+        return [python, "-I", "-S", "-c", LAUNCHER, json.dumps(self.rlimits()), *argv]
+
+
+def resources_from_rusage(rusage, wall_time_sec: float) -> Dict[str, Any]:
+    if rusage is None:
+        return {"wall_time_sec": round(wall_time_sec, 4)}
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    peak_rss_kb = rusage.ru_maxrss // 1024 if sys.platform == "darwin" else rusage.ru_maxrss
+    return {
+        "peak_rss_kb": peak_rss_kb,
+        "user_cpu_sec": round(rusage.ru_utime, 4),
+        "system_cpu_sec": round(rusage.ru_stime, 4),
+        "wall_time_sec": round(wall_time_sec, 4)
+    }
+
+
+def reap(process, timeout: Optional[float] = None) -> Optional[Tuple[int, Any]]:
+    """
+    Wait for a Popen child with wait4() so its resource usage can be read.
+    Returns (returncode, rusage), or None if it is still running after `timeout` seconds
+    (None means wait for as long as it takes).
+    """
+    if resource is None or not hasattr(os, "wait4"):
+        try:
+            return process.wait(timeout), None
+        except Exception:
+            return None
+    deadline = None if timeout is None else time.monotonic() + timeout
+    delay = 0.001
+    while True:
+        pid, status, rusage = os.wait4(process.pid, 0 if deadline is None else os.WNOHANG)
+        if pid:
+            # Tell Popen the child is gone so it doesn't wait on it again
+            process.returncode = os.waitstatus_to_exitcode(status)
+            return process.returncode, rusage
+        if time.monotonic() >= deadline:
+            return None
+        time.sleep(delay)
+        delay = min(delay * 2, 0.05)
+
+
+def limit_message(returncode: int) -> Optional[str]:
+    """
+    Explanation for a process ended by one of the limit signals, if it was.
+    """
+    if returncode is None or returncode >= 0:
+        return None
+    return _SIGNAL_MESSAGES.get(-returncode)
@@ -0,0 +1,224 @@
+# sandboxPool.py
+import json
+import logging
+import os
+import select
+import struct
+import subprocess
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from src.core.masterAIAgent.sandboxLimits import SandboxLimits
+
+WORKER_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "sandboxWorker.py")
+# The worker enforces the time limit itself; the pool only gives up on it this much later
+WORKER_GRACE_SEC = 5
+
+
+class WorkerTimeout(Exception):
+    pass
+
+
+class WorkerDied(Exception):
+    def __init__(self, message: str, returncode: Optional[int] = None):
+        super().__init__(message)
+        self.returncode = returncode
+
+
+class SandboxWorker:
+    def __init__(self, python: str = "python3", limits: Optional[SandboxLimits] = None,
+                 cpu_hard_sec: Optional[int] = None):
+        # Requests go in on one pipe and replies come back on another; the
+        # script's own stdout/stderr are captured inside the worker
+        request_r, self._request_w = os.pipe()
+        self._reply_r, reply_w = os.pipe()
+        try:
+            # -I: isolated mode (no user site-packages, env vars or cwd on sys.path)
+            self.process = subprocess.Popen(
+                [python, "-I", WORKER_SCRIPT, str(request_r), str(reply_w)],
+                stdin=subprocess.DEVNULL, pass_fds=(request_r, reply_w), close_fds=True
+            )
+        except Exception:
+            os.close(self._request_w)
+            os.close(self._reply_r)
+            raise
+        finally:
+            os.close(request_r)
+            os.close(reply_w)
+        if limits is not None:
+            # Applied before the first job is sent and inherited by the child each
+            # script runs in; the child sets its own CPU soft limit, and the hard
+            # one (cpu_hard_sec) covers the worker's lifetime
+            try:
+                limits.apply(self.process.pid, cpu_hard_sec)
+            except Exception:
+                self.close()
+                raise
+        self.runs = 0
+
+    def call(self, job: Dict[str, Any], timeout: float) -> Dict[str, Any]:
+        body = json.dumps(job).encode()
+        try:
+            os.write(self._request_w, struct.pack(">I", len(body)) + body)
+        except OSError as e:
+            raise WorkerDied(str(e))
+        deadline = time.monotonic() + timeout
+        header = self._read(4, deadline)
+        reply = self._read(struct.unpack(">I", header)[0], deadline)
+        self.runs += 1
+        return json.loads(reply)
+
+    def _read(self, size: int, deadline: float) -> bytes:
+        data = b""
+        while len(data) < size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or not select.select([self._reply_r], [], [], remaining)[0]:
+                raise WorkerTimeout()
+            chunk = os.read(self._reply_r, min(size - len(data), 1 << 20))
+            if not chunk:
+                returncode = self.process.wait()
+                raise WorkerDied(f"exit code {returncode}", returncode)
+            data += chunk
+        return data
+
+    def close(self):
+        for fd in (self._request_w, self._reply_r):
+            try:
+                os.close(fd)
+            except OSError:
+                pass
+        if self.process.poll() is None:
+            self.process.kill()
+        self.process.wait()
+
+
+class SandboxWorkerPool:
+    def __init__(self, size=2, max_runs_per_worker=100, python="python3", limits: Optional[SandboxLimits] = None):
+        """
+        Pre-started Python interpreters that run sandbox scripts sent over a pipe,
+        each script in a fresh fork of the worker so runs can't affect each other.
+        :param size: workers kept running; also the max scripts run at once.
+        :param max_runs_per_worker: runs before a worker is replaced by a fresh one.
+        :param python: interpreter to start workers with.
+        :param limits: resource limits applied to every worker (CPU time and processes per run).
+        """
+        self.size = size
+        self.max_runs_per_worker = max_runs_per_worker
+        self.python = python
+        self.limits = limits
+        self._idle: List[SandboxWorker] = []
+        self._workers = 0  # idle + busy + starting
+        self._cond = threading.Condition()
+        self._closed = False
+        self.stats = {"runs": 0, "started": 0, "recycled": 0, "timeouts": 0, "died": 0}
+
+    def start(self):
+        """
+        Start workers up to `size` so the first requests don't pay for interpreter startup.
+        """
+        while True:
+            with self._cond:
+                if self._closed or self._workers >= self.size:
+                    return
+                self._workers += 1
+            self._add(self._spawn())
+
+    def _spawn(self) -> Optional[SandboxWorker]:
+        try:
+            cpu_hard_sec = None
+            if self.limits is not None and self.limits.cpu_limit_sec:
+                cpu_hard_sec = int(self.limits.cpu_limit_sec + 1) * (self.max_runs_per_worker + 1)
+            worker = SandboxWorker(self.python, self.limits, cpu_hard_sec)
+            self.stats["started"] += 1
+            return worker
+        except Exception as e:
+            logging.error(f"Sandbox worker failed to start: {e}")
+            return None
+
+    def _add(self, worker: Optional[SandboxWorker]):
+        with self._cond:
+            if worker is None:
+                self._workers -= 1
+            elif self._closed:
+                self._workers -= 1
+                worker.close()
+            else:
+                self._idle.append(worker)
+            self._cond.notify()
+
+    def _acquire(self) -> SandboxWorker:
+        with self._cond:
+            while not self._idle and self._workers >= self.size and not self._closed:
+                self._cond.wait()
+            if self._closed:
+                raise RuntimeError("Sandbox worker pool is closed")
+            if self._idle:
+                return self._idle.pop()
+            self._workers += 1
+        worker = self._spawn()
+        if worker is None:
+            self._add(None)
+            raise RuntimeError("Could not start a sandbox worker")
+        return worker
+
+    def _retire(self, worker: SandboxWorker):
+        worker.close()
+        with self._cond:
+            self._workers -= 1
+            self._cond.notify()
+        # Replace it off the request path so the pool stays warm
+        threading.Thread(target=self.start, name="tess-sandbox-spawn", daemon=True).start()
+
+    def run(self, script: str, time_limit_sec: float, max_output_bytes: int,
+            kill_on_output_limit: bool = False) -> Dict[str, Any]:
+        """
+        Run `script` on a warm worker, which stops it after `time_limit_sec`
+        (the worker itself is killed and replaced if it doesn't answer
+        WORKER_GRACE_SEC after that). At most `max_output_bytes` of stdout +
+        stderr come back; with `kill_on_output_limit` the script is stopped as
+        soon as it writes more than that.
+        Raises WorkerTimeout or WorkerDied; otherwise returns stdout, stderr,
+        returncode, truncated, killed and resources.
+        """
+        job = {
+            "script": script, "time_limit_sec": time_limit_sec,
+            "max_output_bytes": max_output_bytes, "kill_on_output_limit": kill_on_output_limit,
+            "cpu_limit_sec": self.limits.cpu_limit_sec if self.limits is not None else None,
+            "max_processes": self.limits.max_processes if self.limits is not None else None
+        }
+        worker = self._acquire()
+        try:
+            result = worker.call(job, time_limit_sec + WORKER_GRACE_SEC)
+        except WorkerTimeout:
+            self.stats["timeouts"] += 1
+            self._retire(worker)
+            raise
+        except (WorkerDied, OSError, ValueError):
+            self.stats["died"] += 1
+            self._retire(worker)
+            raise
+        self.stats["runs"] += 1
+        timed_out = result.pop("timed_out", False)
+        if timed_out:
+            self.stats["timeouts"] += 1
+        if worker.runs >= self.max_runs_per_worker:
+            self.stats["recycled"] += 1
+            self._retire(worker)
+        else:
+            self._add(worker)
+        if timed_out:
+            raise WorkerTimeout()
+        return result
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._workers -= len(idle)
+            self._cond.notify_all()
+        for worker in idle:
+            worker.close()
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {**self.stats, "size": self.size, "workers": self._workers, "idle": len(self._idle)}
@@ -1,26 +1,81 @@
 # sandboxRunner.py
+import codecs
 import subprocess
 import tempfile
 import os
+import queue
 import shlex
+import shutil
 import logging
+import threading
+import time
+from typing import Any, Dict, Iterator, Optional
+
+from src.core.masterAIAgent.sandboxLimits import (
+    LIMITS_SUPPORTED, SandboxLimits, limit_message, reap, resources_from_rusage
+)
+from src.core.masterAIAgent.sandboxPool import SandboxWorkerPool, WorkerDied, WorkerTimeout
+
+READ_CHUNK_BYTES = 64 * 1024
+
+
+def _pump(name: str, pipe, chunks: "queue.Queue"):
+    # Reader thread per pipe (portable, unlike select on pipes); None marks EOF
+    try:
+        while True:
+            data = pipe.read(READ_CHUNK_BYTES)
+            if not data:
+                break
+            chunks.put((name, data))
+    except (OSError, ValueError):
+        pass
+    finally:
+        chunks.put((name, None))
+
 
 class ScriptSandbox:
-    def __init__(self, time_limit_sec=60, memory_limit_mb=100):
+    def __init__(self, time_limit_sec=60, memory_limit_mb=100, pool_size=0, max_runs_per_worker=100,
+                 max_output_bytes=1024 * 1024, kill_on_output_limit=False, cpu_limit_sec=None,
+                 max_processes=64, max_file_mb=64, enforce_limits=True):
         """
         Sandbox runner to execute scripts safely with resource limits.
         :param time_limit_sec: max execution time in seconds.
-        :param memory_limit_mb: max memory usage in MB (currently advisory - platform dependent).
+        :param memory_limit_mb: max address space in MB (enforced on Linux, advisory elsewhere).
+        :param pool_size: warm worker interpreters to keep (POSIX only); 0 spawns a new interpreter per script.
+        :param max_runs_per_worker: scripts a worker runs before it is replaced.
+        :param max_output_bytes: stdout + stderr kept per run; anything beyond is dropped.
+        :param kill_on_output_limit: stop the script as soon as it goes over max_output_bytes.
+        :param cpu_limit_sec: CPU seconds per run (defaults to time_limit_sec).
+        :param max_processes: process limit (RLIMIT_NPROC, counted per user by Linux).
+        :param max_file_mb: largest file a script may write.
+        :param enforce_limits: apply the limits above on Linux; results report resource usage either way.
         """
         self.time_limit_sec = time_limit_sec
         self.memory_limit_mb = memory_limit_mb
+        self.max_output_bytes = max_output_bytes
+        self.kill_on_output_limit = kill_on_output_limit
+        self.limits = None
+        if enforce_limits and LIMITS_SUPPORTED:
+            self.limits = SandboxLimits(
+                memory_limit_mb=memory_limit_mb,
+                cpu_limit_sec=cpu_limit_sec or time_limit_sec,
+                max_processes=max_processes,
+                max_file_mb=max_file_mb
+            )
+        self._interpreter_version: Optional[str] = None
+        self.pool = None
+        if pool_size > 0 and os.name == "posix":
+            self.pool = SandboxWorkerPool(size=pool_size, max_runs_per_worker=max_runs_per_worker, limits=self.limits)
 
     def run_script(self, script: str, language: str = "python") -> dict:
         """
         Execute the given script safely.
         :param script: Script source code as a string.
         :param language: Script language (only 'python' implemented for now).
-        :return: Dict containing 'stdout', 'stderr', 'success' boolean.
+        :return: Dict containing 'stdout', 'stderr', 'success' boolean, 'resources'
+                 (peak_rss_kb, user_cpu_sec, system_cpu_sec, wall_time_sec as far as
+                 the platform reports them), plus 'truncated' (and 'killed') when the
+                 output cap was hit.
         """
         if language.lower() != "python":
             return {
@@ -29,44 +84,200 @@ class ScriptSandbox:
                 "success": False
             }
 
+        if self.pool is not None:
+            return self._run_pooled(script)
+
+        output = {"stdout": [], "stderr": []}
+        for event in self.stream_script(script, language):
+            if "stream" in event:
+                output[event["stream"]].append(event["data"])
+                continue
+            if event.get("timed_out"):
+                return {
+                    "stdout": "",
+                    "stderr": f"Execution timed out after {self.time_limit_sec} seconds.",
+                    "success": False,
+                    "resources": event["resources"]
+                }
+            if "error" in event:
+                return {
+                    "stdout": "",
+                    "stderr": event["error"],
+                    "success": False
+                }
+            return self._result("".join(output["stdout"]), "".join(output["stderr"]), event)
+
+    def stream_script(self, script: str, language: str = "python") -> Iterator[Dict[str, Any]]:
+        """
+        Execute the script in a fresh interpreter, yielding output as it is produced:
+        {"stream": "stdout" | "stderr", "data": text} events, then one final
+        {"done": True, "success", "returncode", "truncated", "killed", "timed_out", "resources"}
+        event (or {"done": True, "error": ...} if the script could not be started).
+        Output past max_output_bytes is dropped; closing the generator kills the script.
+        """
+        if language.lower() != "python":
+            yield {"done": True, "success": False, "error": f"Unsupported sandbox language: {language}"}
+            return
+
         # Create a temporary file for the script
         with tempfile.NamedTemporaryFile(mode="w", suffix=".py", delete=False) as tf:
             script_path = tf.name
             tf.write(script)
 
+        # -u: unbuffered, so output reaches us as soon as the script prints it
+        argv = [shutil.which("python3") or "python3", "-u", script_path]
+        if self.limits is not None:
+            # Set by a launcher inside the new process before it execs the script
+            argv = self.limits.launch_command(argv)
+        started = time.perf_counter()
         try:
-            # Build command with safety measures
-            # On Unix, you could add 'timeout' and 'ulimit' wrappers, but for cross-platform compatibility:
-            # We use subprocess.run with timeout param
-            process = subprocess.run(
-                ["python3", script_path],
-                capture_output=True,
-                timeout=self.time_limit_sec,
-                text=True
+            process = subprocess.Popen(
+                argv,
+                stdin=subprocess.DEVNULL,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                bufsize=0
             )
-            success = (process.returncode == 0)
-            stdout = process.stdout
-            stderr = process.stderr
-
-        except subprocess.TimeoutExpired:
-            stdout = ""
-            stderr = f"Execution timed out after {self.time_limit_sec} seconds."
-            success = False
-
         except Exception as e:
-            stdout = ""
-            stderr = f"Error running script: {str(e)}"
-            success = False
+            self._cleanup(script_path)
+            yield {"done": True, "success": False, "error": f"Error running script: {str(e)}"}
+            return
 
+        chunks: "queue.Queue" = queue.Queue()
+        for name, pipe in (("stdout", process.stdout), ("stderr", process.stderr)):
+            threading.Thread(target=_pump, args=(name, pipe, chunks), daemon=True).start()
+        decoders = {name: codecs.getincrementaldecoder("utf-8")("replace") for name in ("stdout", "stderr")}
+        deadline = time.monotonic() + self.time_limit_sec
+        emitted = 0
+        open_pipes = 2
+        truncated = killed = timed_out = False
+        try:
+            while open_pipes:
+                try:
+                    name, data = chunks.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    timed_out = True
+                    process.kill()
+                    break
+                if data is None:
+                    open_pipes -= 1
+                    continue
+                if truncated:
+                    # Keep draining so the script never blocks on a full pipe
+                    continue
+                room = self.max_output_bytes - emitted
+                if len(data) > room:
+                    data = data[:room]
+                    truncated = True
+                emitted += len(data)
+                text = decoders[name].decode(data)
+                if text:
+                    yield {"stream": name, "data": text}
+                if truncated and self.kill_on_output_limit:
+                    killed = True
+                    process.kill()
+                    break
+            reaped = None
+            if not (timed_out or killed):
+                reaped = reap(process, max(0.0, deadline - time.monotonic()))
+                if reaped is None:
+                    timed_out = True
+                    process.kill()
+            if reaped is None:
+                reaped = reap(process)
+            returncode, rusage = reaped
+            done = {
+                "done": True,
+                "success": returncode == 0 and not timed_out,
+                "returncode": returncode,
+                "truncated": truncated,
+                "killed": killed,
+                "timed_out": timed_out,
+                "resources": resources_from_rusage(rusage, time.perf_counter() - started)
+            }
+            if limit_message(returncode):
+                done["limit_exceeded"] = limit_message(returncode)
+            yield done
         finally:
-            # Clean up the temporary file
+            # Also reached when the consumer stops early (e.g. a client disconnect)
+            if process.returncode is None:
+                process.kill()
+                reap(process)
+            self._cleanup(script_path)
+
+    def interpreter_version(self) -> str:
+        # Version of the interpreter scripts actually run on (not necessarily this one); asked once
+        if self._interpreter_version is None:
             try:
-                os.unlink(script_path)
-            except Exception as cleanup_error:
-                logging.warning(f"Failed to delete temp script file: {cleanup_error}")
+                self._interpreter_version = subprocess.run(
+                    ["python3", "-c", "import sys; print(sys.version)"],
+                    capture_output=True, text=True, timeout=10
+                ).stdout.strip() or "unknown"
+            except Exception:
+                self._interpreter_version = "unknown"
+        return self._interpreter_version
 
+    def fingerprint(self) -> Dict[str, Any]:
+        """
+        Everything besides the script that can change a run's result: for result cache keys.
+        """
+        limits = self.limits
         return {
+            "interpreter": self.interpreter_version(),
+            "time_limit_sec": self.time_limit_sec,
+            "memory_limit_mb": self.memory_limit_mb,
+            "max_output_bytes": self.max_output_bytes,
+            "kill_on_output_limit": self.kill_on_output_limit,
+            "limits": vars(limits) if limits is not None else None
+        }
+
+    def _result(self, stdout: str, stderr: str, outcome: Dict[str, Any]) -> dict:
+        result = {
             "stdout": stdout,
             "stderr": stderr,
-            "success": success
+            "success": outcome["returncode"] == 0 and not outcome.get("killed", False),
+            "resources": outcome["resources"]
         }
+        exceeded = limit_message(outcome["returncode"])
+        if exceeded:
+            result["stderr"] = f"{stderr}\n{exceeded}" if stderr else exceeded
+        if outcome.get("truncated"):
+            note = f"[Output truncated at {self.max_output_bytes} bytes"
+            note += "; script stopped]" if outcome.get("killed") else "]"
+            result["stderr"] = f"{stderr}\n{note}" if stderr else note
+            result["truncated"] = True
+            if outcome.get("killed"):
+                result["killed"] = True
+        return result
+
+    def _cleanup(self, script_path: str):
+        # Clean up the temporary file
+        try:
+            os.unlink(script_path)
+        except Exception as cleanup_error:
+            logging.warning(f"Failed to delete temp script file: {cleanup_error}")
+
+    def _run_pooled(self, script: str) -> dict:
+        # Same result shape and time limit as the subprocess path, without
+        # interpreter startup or a temp file per run
+        started = time.perf_counter()
+        try:
+            result = self.pool.run(script, self.time_limit_sec, self.max_output_bytes, self.kill_on_output_limit)
+            return self._result(result["stdout"], result["stderr"], result)
+        except WorkerTimeout:
+            stderr = f"Execution timed out after {self.time_limit_sec} seconds."
+        except WorkerDied as e:
+            stderr = limit_message(e.returncode) or f"Sandbox worker exited unexpectedly ({e})."
+        except Exception as e:
+            stderr = f"Error running script: {str(e)}"
+        # The worker is gone, so only the wall time of this run is known
+        return {
+            "stdout": "",
+            "stderr": stderr,
+            "success": False,
+            "resources": resources_from_rusage(None, time.perf_counter() - started)
+        }
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.close()
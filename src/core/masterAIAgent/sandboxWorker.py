@@ -0,0 +1,223 @@
+# sandboxWorker.py
+# Runs inside a pre-started sandbox interpreter (see sandboxPool.py); stdlib only.
+# Protocol on the two fds given as arguments: 4-byte big-endian length + JSON, one
+# {"script", "time_limit_sec", "max_output_bytes", "kill_on_output_limit", "cpu_limit_sec", "max_processes"}
+# request in, one {"stdout", "stderr", "returncode", "truncated", "killed", "timed_out", "resources"} reply out.
+#
+# The worker never runs a script itself: it forks a child per job, so every script
+# starts from the same clean, already-initialised interpreter and nothing it changes
+# (builtins, modules, cwd, env, threads) reaches the next one. The child drops the
+# protocol fds before any script code runs and gets its own process group, which is
+# killed after the run so processes the script started don't outlive it.
+import json
+import os
+import signal
+import struct
+import sys
+import tempfile
+import threading
+import time
+import traceback
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+try:
+    # Loaded once here rather than in every child
+    import ctypes
+    libc = ctypes.CDLL(None, use_errno=True)
+except Exception:
+    libc = None
+
+PR_SET_PDEATHSIG = 1
+
+
+def read_exact(f, size):
+    data = b""
+    while len(data) < size:
+        chunk = f.read(size - len(data))
+        if not chunk:
+            return None
+        data += chunk
+    return data
+
+
+def capture_file():
+    # In-memory where the platform allows it, so runs don't touch the disk
+    if hasattr(os, "memfd_create"):
+        return os.fdopen(os.memfd_create("sandbox-output"), "w+b")
+    return tempfile.TemporaryFile()
+
+
+def send(replies, reply):
+    body = json.dumps(reply).encode()
+    replies.write(struct.pack(">I", len(body)) + body)
+    replies.flush()
+
+
+def read_capped(out, err, max_output_bytes):
+    # stdout first, then whatever room is left for stderr; pread leaves the file offsets alone
+    stdout = os.pread(out.fileno(), max_output_bytes + 1, 0)
+    stderr = os.pread(err.fileno(), max_output_bytes - min(len(stdout), max_output_bytes) + 1, 0)
+    truncated = len(stdout) + len(stderr) > max_output_bytes
+    stdout = stdout[:max_output_bytes]
+    stderr = stderr[:max_output_bytes - len(stdout)]
+    return stdout.decode("utf-8", "replace"), stderr.decode("utf-8", "replace"), truncated
+
+
+def resources(rusage, wall_time_sec):
+    # Same shape as sandboxLimits.resources_from_rusage (this file can't import it)
+    return {
+        "peak_rss_kb": rusage.ru_maxrss // 1024 if sys.platform == "darwin" else rusage.ru_maxrss,
+        "user_cpu_sec": round(rusage.ru_utime, 4),
+        "system_cpu_sec": round(rusage.ru_stime, 4),
+        "wall_time_sec": round(wall_time_sec, 4)
+    }
+
+
+def die_with_parent():
+    # Linux: if the worker is killed (pool-side timeout), take the script down too
+    try:
+        libc.prctl(PR_SET_PDEATHSIG, signal.SIGKILL)
+    except Exception:
+        pass
+
+
+def run_child(script, out, err, protocol_fds, cpu_limit_sec, max_processes):
+    # In the forked child: never returns
+    returncode = 1
+    try:
+        os.setpgid(0, 0)
+        die_with_parent()
+        for fd in protocol_fds:
+            os.close(fd)
+        os.dup2(out.fileno(), 1)
+        os.dup2(err.fileno(), 2)
+        out.close()
+        err.close()
+        sys.argv = ["<sandbox>"]
+        if resource is not None and cpu_limit_sec:
+            # CPU time is counted from the fork, so the per-run limit is exact
+            cpu = int(cpu_limit_sec)
+            _, hard = resource.getrlimit(resource.RLIMIT_CPU)
+            if hard != resource.RLIM_INFINITY:
+                cpu = min(cpu, hard)
+            resource.setrlimit(resource.RLIMIT_CPU, (cpu, hard))
+        if resource is not None and max_processes:
+            # Only here, never on the worker: the worker forks for every job,
+            # and Linux counts this limit across all of the user's processes
+            _, hard = resource.getrlimit(resource.RLIMIT_NPROC)
+            if hard != resource.RLIM_INFINITY:
+                max_processes = min(max_processes, hard)
+            resource.setrlimit(resource.RLIMIT_NPROC, (max_processes, max_processes))
+        returncode = 0
+        code = compile(script, "<sandbox>", "exec")
+        exec(code, {"__name__": "__main__", "__builtins__": __builtins__})
+    except SystemExit as e:
+        if e.code is None:
+            returncode = 0
+        elif isinstance(e.code, int):
+            returncode = e.code
+        else:
+            print(e.code, file=sys.stderr)
+            returncode = 1
+    except BaseException:
+        # Leave this function's frame out, as if the script had run on its own
+        etype, value, tb = sys.exc_info()
+        traceback.print_exception(etype, value, tb.tb_next if tb is not None else None)
+        returncode = 1
+    finally:
+        for stream in (sys.stdout, sys.stderr, sys.__stdout__, sys.__stderr__):
+            try:
+                stream.flush()
+            except Exception:
+                pass
+        os._exit(returncode & 0xFF)
+
+
+def watch(pid, out, err, job, deadline, done, outcome):
+    # Kills the script's process group on timeout or (in kill mode) once it has
+    # written more than the output cap
+    max_output_bytes = job["max_output_bytes"]
+    while not done.wait(0.02):
+        if time.monotonic() >= deadline:
+            outcome["timed_out"] = True
+        elif job["kill_on_output_limit"] and (
+            os.fstat(out.fileno()).st_size + os.fstat(err.fileno()).st_size > max_output_bytes
+        ):
+            outcome["killed"] = True
+        else:
+            continue
+        try:
+            os.killpg(pid, signal.SIGKILL)
+        except OSError:
+            pass
+        return
+
+
+def run_job(job, protocol_fds):
+    if resource is not None:
+        # The pool's CPU soft limit is meant for scripts and each child sets its
+        # own, so the worker lets itself (and the child, until then) run to the hard one
+        _, hard = resource.getrlimit(resource.RLIMIT_CPU)
+        resource.setrlimit(resource.RLIMIT_CPU, (hard, hard))
+    out, err = capture_file(), capture_file()
+    started = time.perf_counter()
+    try:
+        pid = os.fork()
+    except OSError as e:
+        # EAGAIN (process limit, memory pressure): fail this job, keep the worker
+        out.close()
+        err.close()
+        return {
+            "stdout": "", "stderr": f"Error running script: {e}", "returncode": 1,
+            "truncated": False, "killed": False, "timed_out": False,
+            "resources": {"wall_time_sec": round(time.perf_counter() - started, 4)}
+        }
+    if pid == 0:
+        run_child(job["script"], out, err, protocol_fds, job.get("cpu_limit_sec"), job.get("max_processes"))
+    try:
+        # Also set here, so killpg works even if the child hasn't got to it yet
+        os.setpgid(pid, pid)
+    except OSError:
+        pass
+    done = threading.Event()
+    outcome = {"timed_out": False, "killed": False}
+    watchdog = threading.Thread(
+        target=watch, args=(pid, out, err, job, time.monotonic() + job["time_limit_sec"], done, outcome), daemon=True
+    )
+    watchdog.start()
+    _, status, rusage = os.wait4(pid, 0)
+    done.set()
+    watchdog.join()
+    try:
+        # Whatever the script forked is stopped with it
+        os.killpg(pid, signal.SIGKILL)
+    except OSError:
+        pass
+    stdout, stderr, truncated = read_capped(out, err, job["max_output_bytes"])
+    out.close()
+    err.close()
+    return {
+        "stdout": stdout, "stderr": stderr, "returncode": os.waitstatus_to_exitcode(status),
+        "truncated": truncated, "killed": outcome["killed"], "timed_out": outcome["timed_out"],
+        "resources": resources(rusage, time.perf_counter() - started)
+    }
+
+
+def main():
+    request_fd, reply_fd = int(sys.argv[1]), int(sys.argv[2])
+    requests = os.fdopen(request_fd, "rb")
+    replies = os.fdopen(reply_fd, "wb")
+    while True:
+        header = read_exact(requests, 4)
+        if header is None:
+            return
+        job = json.loads(read_exact(requests, struct.unpack(">I", header)[0]))
+        send(replies, run_job(job, (request_fd, reply_fd)))
+
+
+if __name__ == "__main__":
+    main()
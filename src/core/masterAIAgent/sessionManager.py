@@ -0,0 +1,102 @@
+# sessionManager.py
+import math
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from src.core.masterAIAgent.llmScheduler import AdmissionError
+
+
+class RateLimitedError(AdmissionError):
+    status_code = 429
+
+
+class Session:
+    # __slots__ keeps per-session state to a few fixed fields
+    __slots__ = ("user_id", "created", "last_seen", "requests", "llm_requests", "tokens", "refilled")
+
+    def __init__(self, user_id: str, now: float, burst: float):
+        self.user_id = user_id
+        self.created = now
+        self.last_seen = now
+        self.requests = 0
+        self.llm_requests = 0
+        self.tokens = burst
+        self.refilled = now
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "user_id": self.user_id,
+            "created": self.created,
+            "last_seen": self.last_seen,
+            "requests": self.requests,
+            "llm_requests": self.llm_requests,
+            "tokens": round(self.tokens, 2)
+        }
+
+
+class SessionManager:
+    def __init__(self, max_sessions=10000, idle_timeout_sec=1800, llm_rate_per_sec=0.5, llm_burst=10):
+        """
+        Bounded per-user session table with a token bucket guarding the LLM tier.
+        Meant to be used from the event loop thread only.
+        :param max_sessions: sessions kept before the least recently used one is evicted.
+        :param idle_timeout_sec: sessions idle longer than this are evicted.
+        :param llm_rate_per_sec: sustained LLM requests per second allowed per user.
+        :param llm_burst: LLM requests a user may make back to back.
+        """
+        self.max_sessions = max_sessions
+        self.idle_timeout_sec = idle_timeout_sec
+        self.llm_rate_per_sec = llm_rate_per_sec
+        self.llm_burst = llm_burst
+        # Ordered by last_seen: oldest first
+        self._sessions: "OrderedDict[str, Session]" = OrderedDict()
+        self.stats = {"created": 0, "evicted_lru": 0, "evicted_idle": 0, "rate_limited": 0}
+
+    def touch(self, user_id: str) -> Session:
+        """
+        Return the user's session (creating it if needed) and mark it as most recently used.
+        """
+        now = time.monotonic()
+        self._evict_idle(now)
+        session = self._sessions.get(user_id)
+        if session is None:
+            session = Session(user_id, now, self.llm_burst)
+            self._sessions[user_id] = session
+            self.stats["created"] += 1
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+                self.stats["evicted_lru"] += 1
+        else:
+            self._sessions.move_to_end(user_id)
+        session.last_seen = now
+        session.requests += 1
+        return session
+
+    def _evict_idle(self, now: float):
+        while self._sessions:
+            oldest = next(iter(self._sessions.values()))
+            if now - oldest.last_seen <= self.idle_timeout_sec:
+                break
+            self._sessions.popitem(last=False)
+            self.stats["evicted_idle"] += 1
+
+    def consume_llm(self, session: Session, cost: float = 1.0):
+        """
+        Take `cost` tokens from the session's bucket or raise RateLimitedError.
+        """
+        now = time.monotonic()
+        session.tokens = min(self.llm_burst, session.tokens + (now - session.refilled) * self.llm_rate_per_sec)
+        session.refilled = now
+        if session.tokens < cost:
+            self.stats["rate_limited"] += 1
+            retry_after = max(1, math.ceil((cost - session.tokens) / self.llm_rate_per_sec))
+            raise RateLimitedError(f"Rate limit exceeded for user {session.user_id}", retry_after)
+        session.tokens -= cost
+        session.llm_requests += 1
+
+    def get(self, user_id: str) -> Optional[Session]:
+        return self._sessions.get(user_id)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {"active": len(self._sessions), "max_sessions": self.max_sessions, **self.stats}
@@ -0,0 +1,169 @@
+# tracing.py
+import asyncio
+import cProfile
+import datetime
+import glob
+import os
+import threading
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional
+
+# Set per request by the HTTP middleware; contextvars follow awaits and asyncio.to_thread
+_request_id: ContextVar[Optional[str]] = ContextVar("tess_request_id", default=None)
+_trace: ContextVar[Optional["Trace"]] = ContextVar("tess_trace", default=None)
+_parent_span: ContextVar[Optional[int]] = ContextVar("tess_parent_span", default=None)
+
+
+def current_request_id() -> Optional[str]:
+    return _request_id.get()
+
+
+class Trace:
+    def __init__(self, request_id: str, name: str):
+        self.request_id = request_id
+        self.name = name
+        self.started = time.time()
+        self._origin = time.perf_counter()
+        self.duration_ms: Optional[float] = None
+        self.spans: List[Dict[str, Any]] = []
+
+    def add_span(self, name: str, parent: Optional[int], started: float, attrs: Dict[str, Any]) -> Dict[str, Any]:
+        span = {
+            "id": len(self.spans),
+            "parent": parent,
+            "name": name,
+            "start_ms": round((started - self._origin) * 1000, 3),
+            "duration_ms": None,
+            **({"attrs": attrs} if attrs else {})
+        }
+        self.spans.append(span)
+        return span
+
+    def finish(self):
+        self.duration_ms = round((time.perf_counter() - self._origin) * 1000, 3)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "request_id": self.request_id,
+            "name": self.name,
+            "started": self.started,
+            "duration_ms": self.duration_ms,
+            "spans": self.spans
+        }
+
+
+@contextmanager
+def span(name: str, **attrs):
+    """
+    Time a block as a child of the current span. A no-op unless the request is being traced.
+    """
+    trace = _trace.get()
+    if trace is None:
+        yield
+        return
+    started = time.perf_counter()
+    record = trace.add_span(name, _parent_span.get(), started, attrs)
+    token = _parent_span.set(record["id"])
+    try:
+        yield
+    except BaseException as e:
+        record["error"] = type(e).__name__
+        raise
+    finally:
+        _parent_span.reset(token)
+        record["duration_ms"] = round((time.perf_counter() - started) * 1000, 3)
+
+
+class Tracer:
+    def __init__(self, max_traces=200, profile_dir="data/profiles", max_profiles=50):
+        """
+        Keeps the most recent finished traces and writes cProfile dumps for profiled requests.
+        :param max_traces: finished traces kept in memory for /traces.
+        :param profile_dir: directory receiving <request_id>-<time>.prof files.
+        :param max_profiles: dumps kept in profile_dir; older ones are deleted.
+        """
+        self.max_traces = max_traces
+        self.profile_dir = profile_dir
+        self.max_profiles = max_profiles
+        self._traces: "OrderedDict[str, Trace]" = OrderedDict()
+        # cProfile hooks the whole thread, so only one request is profiled at a time
+        self._profile_lock = threading.Lock()
+        self._active = 0  # requests inside request()
+        self.stats = {"traced": 0, "profiled": 0, "profile_skipped": 0}
+
+    @contextmanager
+    def request(self, request_id: str, name: str, trace: bool = False):
+        """
+        Bind `request_id` for log entries and, if `trace`, record spans under a new trace.
+        """
+        id_token = _request_id.set(request_id)
+        new_trace = Trace(request_id, name) if trace else None
+        trace_token = _trace.set(new_trace)
+        self._active += 1
+        try:
+            yield new_trace
+        finally:
+            self._active -= 1
+            _trace.reset(trace_token)
+            _request_id.reset(id_token)
+            if new_trace is not None:
+                new_trace.finish()
+                self._traces[request_id] = new_trace
+                while len(self._traces) > self.max_traces:
+                    self._traces.popitem(last=False)
+                self.stats["traced"] += 1
+
+    @asynccontextmanager
+    async def profile(self, request_id: str):
+        """
+        Run the block under cProfile and dump the stats to profile_dir/<request_id>-<time>.prof
+        (open with pstats or snakeviz, or convert to a flamegraph with flameprof).
+        cProfile sees everything on the event loop thread, so the request is only
+        profiled if no other request is in progress (requests arriving meanwhile
+        still show up in the dump). Only the newest max_profiles dumps are kept.
+        The dump is written on a worker thread, off the event loop.
+        """
+        # Called inside request(), which counts this request as active
+        if self._active > 1 or not self._profile_lock.acquire(blocking=False):
+            self.stats["profile_skipped"] += 1
+            yield None
+            return
+        profiler = cProfile.Profile()
+        # Timestamped, so a reused request id never overwrites an earlier dump
+        stamp = datetime.datetime.now().strftime("%Y%m%dT%H%M%S%f")
+        path = os.path.join(self.profile_dir, f"{request_id}-{stamp}.prof")
+        try:
+            profiler.enable()
+            try:
+                yield path
+            finally:
+                profiler.disable()
+        finally:
+            self._profile_lock.release()
+        # Failed requests are dumped too; they are often the interesting ones
+        await asyncio.to_thread(self._dump_profile, profiler, path)
+        self.stats["profiled"] += 1
+
+    def _dump_profile(self, profiler: cProfile.Profile, path: str):
+        os.makedirs(self.profile_dir, exist_ok=True)
+        profiler.dump_stats(path)
+        self._prune_profiles()
+
+    def _prune_profiles(self):
+        paths = sorted(glob.glob(os.path.join(self.profile_dir, "*.prof")), key=os.path.getmtime)
+        for path in paths[:max(0, len(paths) - self.max_profiles)]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def get(self, request_id: str) -> Optional[Dict[str, Any]]:
+        trace = self._traces.get(request_id)
+        return trace.to_dict() if trace else None
+
+    def recent(self, count: int = 20) -> List[Dict[str, Any]]:
+        traces = list(self._traces.values())[-count:] if count > 0 else []
+        return [trace.to_dict() for trace in reversed(traces)]
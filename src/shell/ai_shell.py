@@ -2,46 +2,58 @@ import subprocess
 import os
 import logging
 import psutil
-from datetime import datetime
-import threading
+from datetime import datetime, timedelta
 import time
 import json
+import uuid
 <<<<<<< HEAD
 from src.core.AIEngine import AIEngine
 =======
 from src.core.ai_engine import AIEngine
 >>>>>>> 3115e64782de9e5c0302baebf3995aa4b3a8e45f
+from src.core.log_segments import SegmentedFileHandler
+from src.shell.command_history import CommandHistory
+from src.shell.reminder_scheduler import ReminderScheduler, reminder_due
+from src.shell import system_ops
 
 class AIShell:
     def __init__(self):
         self.ai_engine = AIEngine()
         print("AI Shell started with AI Engine")
-        # Command history
+        # Command history: appended per command, compacted to the last 10000
+        # commands every 500; those are read from the end of the file at
+        # startup and kept in memory, indexed for history search
         self.history_file = "data/logs/ai_shell_history.txt"
-        self.history = []
-        if os.path.exists(self.history_file):
-            with open(self.history_file, "r") as f:
-                self.history = [line.strip() for line in f]
+        self.history = CommandHistory(self.history_file, max_entries=10000, memory_entries=10000, compact_every=500)
         print(f"Loaded {len(self.history)} lines of history.")
 
-        # Reminders
-        self.reminders_file = "data/logs/ai_shell_reminders.json"
-        self.reminders = []
-        self.load_reminders()
-
         # Logging setup
         log_dir = "data/logs"
         os.makedirs(log_dir, exist_ok=True)
         self.logger = logging.getLogger("AIOS_Shell")
         self.logger.setLevel(logging.INFO)
         log_file_path = os.path.join(log_dir, "ai_shell.log")
-        handler = logging.FileHandler(log_file_path)
+        # Rolls into gzipped segments (ai_shell.log.000001.gz, ...) instead of growing forever
+        handler = SegmentedFileHandler(log_file_path, max_bytes=5 * 1024 * 1024, max_segments=20)
         formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
         handler.setFormatter(formatter)
         if not self.logger.hasHandlers():
             self.logger.addHandler(handler)
         self.logger.info("Shell started. History loaded.")
 
+        # Reminders: one scheduler thread fires all of them; pending ones are
+        # rescheduled from the reminders file at startup
+        self.reminders_file = "data/logs/ai_shell_reminders.json"
+        self.reminders = []
+        self.reminder_scheduler = ReminderScheduler(self.notify_reminder)
+        self.load_reminders()
+        now = time.time()
+        pending = [rem for rem in self.reminders if (reminder_due(rem) or 0) > now]
+        for rem in pending:
+            self.schedule_reminder(rem)
+        if pending:
+            print(f"Rescheduled {len(pending)} pending reminder(s).")
+
     def load_reminders(self):
         if os.path.exists(self.reminders_file):
             try:
@@ -51,6 +63,9 @@ class AIShell:
                 self.reminders = []
         else:
             self.reminders = []
+        # Older records have no id; one is needed to cancel them
+        for rem in self.reminders:
+            rem.setdefault("id", uuid.uuid4().hex)
 
     def save_reminders(self):
         with open(self.reminders_file, "w") as f:
@@ -64,18 +79,49 @@ class AIShell:
         else:
             print("\nNo active reminders.")
 
-    def schedule_reminder(self, task, reminder_time):
+    def schedule_reminder(self, reminder):
         try:
-            seconds = int(reminder_time) if reminder_time.isdigit() else 10
-            self.logger.info(f"Setting reminder: '{task}' in {seconds} seconds")
-            def notify():
-                time.sleep(seconds)
-                print(f"\n[Reminder] {task}")
-                self.logger.info(f"[Reminder] {task}")
-            threading.Thread(target=notify, daemon=True).start()
+            due = reminder_due(reminder)
+            if due is None:
+                return
+            self.logger.info(f"Setting reminder: '{reminder['task']}' in {max(0, round(due - time.time()))} seconds")
+            self.reminder_scheduler.schedule(reminder["id"], due, reminder)
         except Exception as e:
             self.logger.error(f"Reminder error: {e}")
 
+    def notify_reminder(self, reminder):
+        print(f"\n[Reminder] {reminder['task']}")
+        self.logger.info(f"[Reminder] {reminder['task']}")
+
+    def reverse_search(self):
+        """
+        Reverse incremental history search: each line typed extends the query and
+        shows the newest match; an empty line steps to the next older match; q quits.
+        """
+        print("Reverse search: type to extend the query, Enter for older matches, q to quit.")
+        query, match = "", None
+        while True:
+            try:
+                text = input(f"(reverse-i-search)`{query}': ")
+            except EOFError:
+                break
+            if text.strip().lower() == "q":
+                break
+            if text:
+                query += text
+                matches = self.history.search(query, limit=1)
+            elif match is not None:
+                matches = self.history.search(query, limit=1, before=match[0])
+            else:
+                continue
+            if matches:
+                match = matches[0]
+                print(f"  {match[1]}")
+            else:
+                print("  (no older match)" if not text else "  (no match)")
+        if match is not None:
+            print(f"Last match: {match[1]}")
+
     def show_startup_status(self):
         cpu = psutil.cpu_percent(interval=1)
         memory = psutil.virtual_memory().percent
@@ -113,16 +159,34 @@ class AIShell:
             user_input = input("AI OS> ")
             if user_input.lower() in ["exit", "quit"]:
                 print("Goodbye!")
+                self.history.close()
+                self.reminder_scheduler.close()
                 self.logger.info("User exited shell.")
                 break
 
             # Command history
             if user_input.lower() == "history":
                 print("Command History:")
-                for i, cmd in enumerate(self.history[-10:], 1):
+                for i, cmd in enumerate(self.history.tail(10), 1):
                     print(f"{i}: {cmd}")
                 continue
 
+            if user_input.lower().startswith("history search"):
+                query = user_input[len("history search"):].strip()
+                if not query:
+                    print("Usage: history search <term>")
+                    continue
+                matches = self.history.search(query, limit=20)
+                if not matches:
+                    print(f"No history entries match '{query}'.")
+                for entry_id, cmd in matches:
+                    print(f"{entry_id}: {cmd}")
+                continue
+
+            if user_input.lower() == "history rsearch":
+                self.reverse_search()
+                continue
+
             # Reminders
             if user_input.lower() == "reminders":
                 self.show_reminders()
@@ -133,6 +197,7 @@ class AIShell:
                     idx = int(user_input.split()[-1]) - 1
                     if 0 <= idx < len(self.reminders):
                         removed = self.reminders.pop(idx)
+                        self.reminder_scheduler.cancel(removed["id"])
                         print(f"Dismissed reminder: {removed['task']}")
                         self.save_reminders()
                     else:
@@ -143,9 +208,6 @@ class AIShell:
 
             # Save command history
             self.history.append(user_input)
-            with open(self.history_file, "w") as f:
-                for line in self.history:
-                    f.write(line + "\n")
             self.logger.info(f"User command: {user_input}")
 
             result = self.ai_engine.process_input(user_input)
@@ -153,38 +215,46 @@ class AIShell:
             print(f"AI ({intent}): {result['text']}")
 
             try:
+                # File and system operations run in-process (no shell), the same on every platform
                 if intent == "list_files":
-                    self.logger.info("Running command: dir")
-                    print("Running: dir")
-                    subprocess.run("dir", shell=True)
+                    cwd = os.getcwd()
+                    self.logger.info(f"Listing files in {cwd}")
+                    print(f"Contents of {cwd}:")
+                    print(system_ops.format_listing(system_ops.list_files(cwd)))
 
                 elif intent == "system_status" or intent == "system_info":
-                    self.logger.info("Running command: systeminfo")
-                    print("Running: systeminfo")
-                    subprocess.run("systeminfo", shell=True)
+                    self.logger.info("Reading system status")
+                    print(system_ops.format_status(system_ops.system_status()))
 
                 elif intent == "find_files" and result.get("query"):
-                    cmd = f'dir /s /b *{result["query"]}*'
-                    self.logger.info(f"Running command: {cmd}")
-                    print(f"Running: {cmd}")
-                    subprocess.run(cmd, shell=True)
+                    query = result["query"]
+                    self.logger.info(f"Finding files matching '{query}'")
+                    found = system_ops.find_files(query)
+                    for path in found["matches"]:
+                        print(path)
+                    if found["truncated"]:
+                        print(f"(showing the first {len(found['matches'])} matches)")
+                    elif not found["matches"]:
+                        print(f"No files found matching '{query}'.")
 
                 elif intent == "create_folder" and result.get("folder"):
-                    folder = result["folder"]
-                    cmd = f'mkdir \"{folder}\"'
-                    self.logger.info(f"Running command: {cmd}")
-                    print(f"Running: {cmd}")
-                    subprocess.run(cmd, shell=True)
+                    created = system_ops.create_folder(result["folder"])
+                    self.logger.info(f"Create folder {created['path']}: {'created' if created['created'] else 'already exists'}")
+                    print(f"{'Created' if created['created'] else 'Already exists'}: {created['path']}")
 
                 elif intent == "delete_file":
                     filename = result.get("filename")
                     if filename:
                         confirm = input(f"Are you sure you want to delete '{filename}'? (y/N): ").lower()
                         if confirm == "y":
-                            cmd = f'del \"{filename}\"'
-                            self.logger.info(f"Running command: {cmd}")
-                            print(f"Running: {cmd}")
-                            subprocess.run(cmd, shell=True)
+                            try:
+                                deleted = system_ops.delete_file(filename)
+                                self.logger.info(f"Deleted file {deleted['path']}")
+                                print(f"Deleted: {deleted['path']}")
+                            except FileNotFoundError:
+                                print(f"No such file: {filename}")
+                            except IsADirectoryError as e:
+                                print(f"Not deleted: {e}")
                         else:
                             print("Delete cancelled.")
                             self.logger.info("Delete command cancelled by user.")
@@ -192,7 +262,7 @@ class AIShell:
                         print("No filename detected. Try, e.g., 'delete file called old_report.txt'")
 
                 elif intent == "help":
-                    print("You can ask me to: list files, find files, create folder, delete file, get system status, backup data, set reminders, view history/reminders, dismiss reminders.")
+                    print("You can ask me to: list files, find files, create folder, delete file, get system status, backup data, set reminders, view history/reminders, search history (history search <term>, history rsearch), dismiss reminders.")
                     self.logger.info("Displayed help to user.")
 
                 elif intent == "backup_data":
@@ -216,9 +286,18 @@ class AIShell:
                     task = result.get("task", "unknown task")
                     reminder_time = result.get("reminder_time", "10")
                     print(f"Reminder scheduled for: {task} in {reminder_time} seconds")
-                    self.reminders.append({"task": task, "reminder_time": reminder_time, "created": datetime.now().isoformat()})
+                    created = datetime.now()
+                    seconds = int(reminder_time) if str(reminder_time).isdigit() else 10
+                    reminder = {
+                        "id": uuid.uuid4().hex,
+                        "task": task,
+                        "reminder_time": reminder_time,
+                        "created": created.isoformat(),
+                        "due": (created + timedelta(seconds=seconds)).isoformat()
+                    }
+                    self.reminders.append(reminder)
                     self.save_reminders()
-                    self.schedule_reminder(task, reminder_time)
+                    self.schedule_reminder(reminder)
 
             except Exception as e:
                 print(f"Error: {e}")
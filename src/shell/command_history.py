@@ -0,0 +1,264 @@
+import heapq
+import os
+import re
+from collections import deque
+from itertools import islice
+from typing import Deque, Dict, Iterator, List, Optional, Set, Tuple
+
+from src.core.log_segments import iter_segment_lines_reversed
+
+
+def read_tail(path: str, count: int) -> List[str]:
+    """
+    Last `count` lines of a text file, oldest first, read backwards from the end.
+    """
+    if count <= 0 or not os.path.exists(path):
+        return []
+    lines = islice(iter_segment_lines_reversed(path), count)
+    return [line.decode("utf-8", "replace").rstrip("\r") for line in lines][::-1]
+
+
+TOKEN_RE = re.compile(r"\w+")
+
+
+def tokenize(text: str) -> List[str]:
+    return TOKEN_RE.findall(text.lower())
+
+
+class _TrieNode:
+    __slots__ = ("children", "token", "tokens", "postings")
+
+    def __init__(self):
+        self.children: Dict[str, "_TrieNode"] = {}
+        self.token: Optional[str] = None  # set if a token ends here
+        self.tokens = 0  # distinct tokens below (and at) this node
+        self.postings = 0  # entries per token below, summed
+
+
+class HistoryIndex:
+    def __init__(self):
+        """
+        Search index over history entries: a token -> entry ids inverted index,
+        plus a prefix trie over the token vocabulary so the last query word can be
+        partial (as it is while typing an incremental search).
+        Entry ids only grow and only the oldest entry is ever removed, so ids are
+        contiguous and each posting list stays sorted by appending.
+        A command typed several times is only reported at its newest entry.
+        """
+        self.commands: Dict[int, Tuple[str, Set[str]]] = {}
+        self.latest: Dict[str, int] = {}  # command -> id of its newest entry
+        self.postings: Dict[str, Deque[int]] = {}
+        self.trie = _TrieNode()
+        self.next_id = 0
+
+    def add(self, command: str) -> int:
+        entry_id = self.next_id
+        self.next_id += 1
+        tokens = set(tokenize(command))
+        self.commands[entry_id] = (command, tokens)
+        self.latest[command] = entry_id
+        for token in tokens:
+            posting = self.postings.get(token)
+            if posting is None:
+                posting = self.postings[token] = deque()
+            posting.append(entry_id)
+            self._trie_update(token, 1, len(posting) == 1)
+        return entry_id
+
+    def remove_oldest(self):
+        if not self.commands:
+            return
+        entry_id = next(iter(self.commands))
+        command, tokens = self.commands.pop(entry_id)
+        if self.latest.get(command) == entry_id:
+            del self.latest[command]
+        for token in tokens:
+            posting = self.postings[token]
+            # The oldest entry is at the front of every posting list it is in
+            posting.popleft()
+            if not posting:
+                del self.postings[token]
+            self._trie_update(token, -1, not posting)
+
+    def _trie_update(self, token: str, delta: int, token_changed: bool):
+        # Adjust the counts along the token's path; add or prune nodes as it
+        # enters or leaves the vocabulary
+        node = self.trie
+        path = [node]
+        for char in token:
+            child = node.children.get(char)
+            if child is None:
+                child = node.children[char] = _TrieNode()
+            node = child
+            path.append(node)
+        if token_changed:
+            node.token = token if delta > 0 else None
+        for depth, node in enumerate(path):
+            node.postings += delta
+            if token_changed:
+                node.tokens += delta
+            if node.tokens == 0 and depth:
+                del path[depth - 1].children[token[depth - 1]]
+                break
+
+    def _find(self, prefix: str) -> Optional[_TrieNode]:
+        node = self.trie
+        for char in prefix:
+            node = node.children.get(char)
+            if node is None:
+                return None
+        return node if node.tokens else None
+
+    def expand(self, prefix: str) -> List[str]:
+        """
+        Every indexed token starting with `prefix`.
+        """
+        node = self._find(prefix)
+        tokens, stack = [], [node] if node is not None else []
+        while stack:
+            node = stack.pop()
+            if node.token is not None:
+                tokens.append(node.token)
+            stack.extend(node.children.values())
+        return tokens
+
+    def _all_newest_first(self, before: Optional[int]) -> Iterator[int]:
+        if not self.commands:
+            return iter(())
+        oldest = next(iter(self.commands))
+        start = self.next_id if before is None else min(before, self.next_id)
+        return iter(range(start - 1, oldest - 1, -1))
+
+    def _newest_first(self, tokens: List[str], before: Optional[int]) -> Iterator[int]:
+        # Merge the posting lists newest first, skipping ids at or after `before`
+        lists = [reversed(self.postings[token]) for token in tokens]
+        seen = None
+        for entry_id in heapq.merge(*lists, reverse=True):
+            if entry_id == seen or (before is not None and entry_id >= before):
+                continue
+            seen = entry_id
+            yield entry_id
+
+    def search(self, query: str, limit: int = 20, before: Optional[int] = None) -> List[Tuple[int, str]]:
+        """
+        Most recent entries containing every word of `query` (the last word may be
+        a prefix), newest first as (entry id, command). Each distinct command is
+        returned once, at its newest entry, so paging with `before` (an entry id,
+        to continue with older matches) never shows a command again either.
+        """
+        words = tokenize(query)
+        if not words or limit <= 0:
+            return []
+        # (word, is_prefix, number of token kinds, number of postings) per query word
+        groups = []
+        for i, word in enumerate(words):
+            if i == len(words) - 1:
+                node = self._find(word)
+                if node is None:
+                    return []
+                groups.append((word, True, node.tokens, node.postings))
+            elif word in self.postings:
+                groups.append((word, False, 1, len(self.postings[word])))
+            else:
+                return []
+        # Walk one word's postings (or all entries) newest first and check the
+        # others per entry. Pick whichever should reach `limit` matches in the
+        # fewest steps, estimating each word's selectivity from its postings;
+        # merging a short prefix's many posting lists is often slower than a scan.
+        total = len(self.commands)
+        expected = float(limit)
+        for _, _, _, size in groups:
+            expected *= total / size
+        best, best_cost = None, min(total, expected)
+        for i, (_, _, kinds, size) in enumerate(groups):
+            cost = kinds + min(size, expected * size / total)
+            if cost < best_cost:
+                best, best_cost = i, cost
+        if best is None:
+            candidates = self._all_newest_first(before)
+        else:
+            word, is_prefix = groups[best][:2]
+            candidates = self._newest_first(self.expand(word) if is_prefix else [word], before)
+        checks = [(word, is_prefix) for i, (word, is_prefix, _, _) in enumerate(groups) if i != best]
+        results: List[Tuple[int, str]] = []
+        for entry_id in candidates:
+            command, tokens = self.commands[entry_id]
+            if self.latest[command] != entry_id or not all(
+                any(t.startswith(word) for t in tokens) if is_prefix else word in tokens
+                for word, is_prefix in checks
+            ):
+                continue
+            results.append((entry_id, command))
+            if len(results) >= limit:
+                break
+        return results
+
+
+class CommandHistory:
+    def __init__(self, path: str, max_entries=10000, memory_entries=1000, compact_every=500):
+        """
+        Append-only shell command history.
+        :param path: history file, one command per line.
+        :param max_entries: commands kept in the file; compaction drops older ones.
+        :param memory_entries: most recent commands loaded at startup and kept in memory.
+        :param compact_every: appends between compaction checks.
+        The in-memory entries are indexed for search() as they are loaded and appended.
+        """
+        self.path = path
+        self.max_entries = max_entries
+        self.compact_every = compact_every
+        # Only the tail is read, however long the file has grown
+        self.entries = deque(read_tail(path, memory_entries), maxlen=memory_entries)
+        self.index = HistoryIndex()
+        for command in self.entries:
+            self.index.add(command)
+        self._appends = 0
+        self._file = None
+
+    def append(self, command: str):
+        command = command.replace("\n", " ")
+        if len(self.entries) == self.entries.maxlen:
+            # The deque is about to drop its oldest entry; drop it from the index too
+            self.index.remove_oldest()
+        self.entries.append(command)
+        self.index.add(command)
+        if self._file is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._file = open(self.path, "a", encoding="utf-8")
+        self._file.write(command + "\n")
+        self._file.flush()
+        self._appends += 1
+        if self._appends >= self.compact_every:
+            self.compact()
+
+    def compact(self) -> bool:
+        """
+        Rewrite the file with only the last max_entries commands, if it holds more.
+        Returns True if the file was rewritten.
+        """
+        self._appends = 0
+        keep = read_tail(self.path, self.max_entries + 1)
+        if len(keep) <= self.max_entries:
+            return False
+        self.close()
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write("".join(line + "\n" for line in keep[1:]))
+        os.replace(tmp_path, self.path)
+        return True
+
+    def search(self, query: str, limit: int = 20, before: Optional[int] = None) -> List[Tuple[int, str]]:
+        return self.index.search(query, limit, before)
+
+    def tail(self, count: int) -> List[str]:
+        return list(self.entries)[-count:] if count > 0 else []
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
@@ -0,0 +1,115 @@
+import heapq
+import itertools
+import logging
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# Longest single wait, so a wall-clock jump (suspend, NTP step) delays a reminder by at most this
+MAX_WAIT_SEC = 30
+
+
+def reminder_due(reminder: Dict[str, Any]) -> Optional[float]:
+    """
+    When a stored reminder is due, as a Unix timestamp: its "due" field, or for
+    records written before it existed, "created" plus a reminder_time given in
+    seconds. None for reminders without a time (e.g. added from the dashboard).
+    """
+    try:
+        if reminder.get("due"):
+            return datetime.fromisoformat(reminder["due"]).timestamp()
+        reminder_time = str(reminder.get("reminder_time", ""))
+        if reminder.get("created") and reminder_time.isdigit():
+            created = datetime.fromisoformat(reminder["created"])
+            return (created + timedelta(seconds=int(reminder_time))).timestamp()
+    except (TypeError, ValueError):
+        pass
+    return None
+
+
+class ReminderScheduler:
+    def __init__(self, callback: Callable[[Any], None]):
+        """
+        Fires reminders from a single thread, whatever their number.
+        :param callback: called with a reminder's payload when it is due, on the scheduler thread.
+        Due times sit in a min-heap; cancelled entries are skipped when they reach the
+        top, and the heap is rebuilt once they make up most of it.
+        """
+        self.callback = callback
+        self._heap: List[Tuple[float, int, str]] = []  # (due, seq, key)
+        self._entries: Dict[str, Tuple[float, int, Any]] = {}  # key -> (due, seq, payload)
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._closed = False
+
+    def schedule(self, key: str, due: float, payload: Any):
+        """
+        Fire `payload` at Unix time `due` (right away if that has passed).
+        Scheduling an existing key replaces it.
+        """
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("Reminder scheduler is closed")
+            seq = next(self._seq)
+            self._entries[key] = (due, seq, payload)
+            heapq.heappush(self._heap, (due, seq, key))
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="aios-reminders", daemon=True)
+                self._thread.start()
+            # Only an earlier head changes how long the thread should sleep
+            if self._heap[0][1] == seq:
+                self._cond.notify()
+
+    def cancel(self, key: str) -> bool:
+        with self._cond:
+            if self._entries.pop(key, None) is None:
+                return False
+            if len(self._heap) > 64 and len(self._heap) > 2 * len(self._entries):
+                self._heap = [(due, seq, k) for k, (due, seq, _) in self._entries.items()]
+                heapq.heapify(self._heap)
+            return True
+
+    def _pop_due(self) -> Optional[Tuple[Any]]:
+        # With the lock held: wait for the next live entry to come due and take
+        # its payload (wrapped, so a None payload isn't mistaken for shutdown)
+        while not self._closed:
+            while self._heap:
+                due, seq, key = self._heap[0]
+                entry = self._entries.get(key)
+                if entry is not None and entry[1] == seq:
+                    break
+                heapq.heappop(self._heap)  # cancelled or replaced
+            if not self._heap:
+                self._cond.wait()
+                continue
+            delay = due - time.time()
+            if delay > 0:
+                self._cond.wait(min(delay, MAX_WAIT_SEC))
+                continue
+            heapq.heappop(self._heap)
+            return (self._entries.pop(key)[2],)
+        return None
+
+    def _run(self):
+        while True:
+            with self._cond:
+                taken = self._pop_due()
+            if taken is None:
+                return
+            try:
+                self.callback(taken[0])
+            except Exception:
+                logging.exception("Reminder callback failed")
+
+    def __len__(self) -> int:
+        with self._cond:
+            return len(self._entries)
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=1)
@@ -0,0 +1,155 @@
+import fnmatch
+import os
+import platform
+import socket
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import psutil
+
+# Stop a find after this many matches so a search from a big tree returns quickly
+MAX_FIND_RESULTS = 200
+
+
+def list_files(path: str = ".") -> List[Dict[str, Any]]:
+    """
+    Entries of a directory as {"name", "type" ("dir" | "file" | "link"), "size", "modified"},
+    folders first, then by name. Uses the stat data scandir already has where it can.
+    """
+    entries = []
+    with os.scandir(path) as it:
+        for entry in it:
+            try:
+                if entry.is_symlink():
+                    kind = "link"
+                elif entry.is_dir():
+                    kind = "dir"
+                else:
+                    kind = "file"
+                st = entry.stat(follow_symlinks=False)
+            except OSError:
+                continue
+            entries.append({
+                "name": entry.name,
+                "type": kind,
+                "size": st.st_size if kind == "file" else None,
+                "modified": datetime.fromtimestamp(st.st_mtime).isoformat(timespec="seconds")
+            })
+    entries.sort(key=lambda e: (e["type"] != "dir", e["name"].lower()))
+    return entries
+
+
+def find_files(query: str, root: str = ".", limit: int = MAX_FIND_RESULTS) -> Dict[str, Any]:
+    """
+    Paths under `root` whose name contains `query`, case-insensitively (or matches
+    it, if it has * or ? wildcards). Symlinked folders aren't followed.
+    Returns {"matches": [...], "truncated": bool}.
+    """
+    pattern = query.lower() if any(c in query for c in "*?[") else f"*{query.lower()}*"
+    matches: List[str] = []
+    stack = [root]
+    while stack:
+        directory = stack.pop()
+        try:
+            with os.scandir(directory) as it:
+                entries = sorted(it, key=lambda e: e.name.lower())
+        except OSError:
+            continue
+        subdirs = []
+        for entry in entries:
+            if fnmatch.fnmatchcase(entry.name.lower(), pattern):
+                # "/"-separated on every platform, like the rest of the output
+                matches.append(Path(os.path.relpath(entry.path, root)).as_posix())
+                if len(matches) >= limit:
+                    return {"matches": matches, "truncated": True}
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    subdirs.append(entry.path)
+            except OSError:
+                pass
+        # Reversed so folders are visited in name order
+        stack.extend(reversed(subdirs))
+    return {"matches": matches, "truncated": False}
+
+
+def create_folder(name: str, base: str = ".") -> Dict[str, Any]:
+    """
+    Create a folder (and missing parents). Returns {"path", "created"}; created is
+    False if it already existed. Raises FileExistsError if a file has that name.
+    """
+    path = Path(base, name)
+    existed = path.is_dir()
+    path.mkdir(parents=True, exist_ok=True)
+    return {"path": str(path.resolve()), "created": not existed}
+
+
+def delete_file(name: str, base: str = ".") -> Dict[str, Any]:
+    """
+    Delete a single file. Raises FileNotFoundError, or IsADirectoryError for folders
+    (on every platform, so a folder is never removed by this).
+    """
+    path = Path(base, name)
+    if path.is_dir() and not path.is_symlink():
+        raise IsADirectoryError(f"'{name}' is a folder, not a file")
+    path.unlink()
+    return {"path": str(path.absolute()), "deleted": True}
+
+
+def system_status(cpu_interval: Optional[float] = None) -> Dict[str, Any]:
+    """
+    Host summary from psutil. With cpu_interval None, CPU usage is measured since
+    the previous psutil.cpu_percent() call (the shell takes one at startup), so
+    this returns immediately.
+    """
+    memory = psutil.virtual_memory()
+    disk = psutil.disk_usage(os.path.abspath(os.sep))
+    boot_time = psutil.boot_time()
+    return {
+        "hostname": socket.gethostname(),
+        "os": f"{platform.system()} {platform.release()}",
+        "machine": platform.machine(),
+        "python": platform.python_version(),
+        "cpu_count": psutil.cpu_count(),
+        "cpu_percent": psutil.cpu_percent(interval=cpu_interval),
+        "memory_total": memory.total,
+        "memory_percent": memory.percent,
+        "disk_total": disk.total,
+        "disk_percent": disk.percent,
+        "boot_time": datetime.fromtimestamp(boot_time).isoformat(timespec="seconds"),
+        "uptime_sec": int(time.time() - boot_time)
+    }
+
+
+def format_size(size: Optional[int]) -> str:
+    if size is None:
+        return ""
+    for unit in ("B", "KB", "MB", "GB", "TB"):
+        if size < 1024 or unit == "TB":
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+
+
+def format_listing(entries: List[Dict[str, Any]]) -> str:
+    if not entries:
+        return "(empty folder)"
+    lines = []
+    for e in entries:
+        name = e["name"] + ("/" if e["type"] == "dir" else "")
+        lines.append(f"{e['modified'].replace('T', ' ')}  {format_size(e['size']):>10}  {name}")
+    dirs = sum(e["type"] == "dir" for e in entries)
+    lines.append(f"{len(entries) - dirs} file(s), {dirs} folder(s)")
+    return "\n".join(lines)
+
+
+def format_status(status: Dict[str, Any]) -> str:
+    hours, rest = divmod(status["uptime_sec"], 3600)
+    return "\n".join([
+        f"Host:    {status['hostname']} ({status['os']}, {status['machine']})",
+        f"Python:  {status['python']}",
+        f"CPU:     {status['cpu_percent']}% of {status['cpu_count']} cores",
+        f"Memory:  {status['memory_percent']}% of {format_size(status['memory_total'])}",
+        f"Disk:    {status['disk_percent']}% of {format_size(status['disk_total'])}",
+        f"Uptime:  {hours}h {rest // 60}m (since {status['boot_time'].replace('T', ' ')})"
+    ])
@@ -8,6 +8,13 @@ from PyQt5.QtWidgets import (
 )
 from PyQt5.QtCore import QTimer
 import psutil
+from itertools import islice
+from src.core.log_segments import iter_lines_reversed, iter_segment_lines_reversed
+from src.shell.command_history import read_tail
+
+# Log segments (the active file, then the newest archives) searched for the
+# notifications panel, so a refresh never walks every archive when matches are rare
+NOTIFICATION_LOG_SEGMENTS = 2
 
 class Dashboard(QWidget):
     def __init__(self):
@@ -102,24 +109,24 @@ class Dashboard(QWidget):
 
     def load_history(self):
         self.history_list.clear()
-        hist_file = "data/logs/ai_shell_history.txt"
-        if os.path.exists(hist_file):
-            with open(hist_file, "r") as f:
-                for line in f.readlines()[-10:]:
-                    self.history_list.addItem(line.strip())
+        for line in read_tail("data/logs/ai_shell_history.txt", 10):
+            self.history_list.addItem(line.strip())
+
+    def recent_log_lines(self, words, limit, lines=None):
+        # Newest-first scan across the newest shell log segments: stops as soon
+        # as `limit` matches are found, and never reads past NOTIFICATION_LOG_SEGMENTS
+        if lines is None:
+            lines = iter_lines_reversed("data/logs/ai_shell.log", NOTIFICATION_LOG_SEGMENTS)
+        matches = (
+            text for text in (line.decode("utf-8", "replace").strip() for line in lines)
+            if any(word in text for word in words)
+        )
+        return list(islice(matches, limit))[::-1]
 
     def load_notifications(self):
         self.notif_list.clear()
-        notif_file = "data/logs/ai_shell.log"
-        if os.path.exists(notif_file):
-            with open(notif_file, "r") as f:
-                lines = [
-                    line.strip()
-                    for line in f.readlines()
-                    if "INFO" in line or "WARNING" in line or "ERROR" in line
-                ]
-                for line in lines[-10:]:
-                    self.notif_list.addItem(line)
+        for line in self.recent_log_lines(("INFO", "WARNING", "ERROR"), 10):
+            self.notif_list.addItem(line)
 
     def load_reminders(self):
         self.reminder_list.clear()
@@ -137,16 +144,8 @@ class Dashboard(QWidget):
 
     def load_ai_recommendations(self):
         self.ai_recommend_list.clear()
-        log_file = "data/logs/ai_shell.log"
-        if os.path.exists(log_file):
-            with open(log_file, "r") as f:
-                lines = [
-                    line.strip()
-                    for line in f.readlines()
-                    if "WARNING" in line or "System alert" in line or "Backup recommended" in line
-                ]
-                for line in lines[-5:]:
-                    self.ai_recommend_list.addItem(line)
+        for line in self.recent_log_lines(("WARNING", "System alert", "Backup recommended"), 5):
+            self.ai_recommend_list.addItem(line)
 
     def refresh_all(self):
         self.update_status()
@@ -233,15 +232,18 @@ class Dashboard(QWidget):
         if not os.path.exists(log_file):
             return
         try:
-            with open(log_file, "r") as f:
-                lines = [line.strip() for line in f if any(word in line for word in ("WARNING", "System alert", "Backup completed", "[Reminder]"))]
-                if lines:
-                    # Find the latest alert (by timestamp at start of line)
-                    last_line = lines[-1]
-                    if last_line != getattr(self, "last_alert", None):
-                        # Only show if new
-                        self.show_popup("AI OS Alert", last_line)
-                        self.last_alert = last_line
+            # Only the active segment: anything older was already seen by earlier polls
+            lines = self.recent_log_lines(
+                ("WARNING", "System alert", "Backup completed", "[Reminder]"), 1,
+                iter_segment_lines_reversed(log_file)
+            )
+            if lines:
+                # The latest alert
+                last_line = lines[-1]
+                if last_line != getattr(self, "last_alert", None):
+                    # Only show if new
+                    self.show_popup("AI OS Alert", last_line)
+                    self.last_alert = last_line
         except Exception:
             pass
 
@@ -0,0 +1,96 @@
+import time
+
+from src.shell.command_history import CommandHistory, HistoryIndex
+
+def test_appends_and_loads_only_the_tail(tmp_path):
+    path = tmp_path / "logs" / "history.txt"
+    history = CommandHistory(str(path), memory_entries=3)
+    for i in range(5):
+        history.append(f"cmd {i}")
+    history.close()
+    assert path.read_text().splitlines() == [f"cmd {i}" for i in range(5)]
+    reloaded = CommandHistory(str(path), memory_entries=3)
+    assert reloaded.tail(10) == ["cmd 2", "cmd 3", "cmd 4"]
+    reloaded.append("cmd 5")
+    assert reloaded.tail(2) == ["cmd 4", "cmd 5"]
+    reloaded.close()
+
+def test_periodic_compaction_bounds_the_file(tmp_path):
+    path = tmp_path / "history.txt"
+    history = CommandHistory(str(path), max_entries=10, compact_every=4)
+    for i in range(30):
+        history.append(f"cmd {i}")
+    history.close()
+    lines = path.read_text().splitlines()
+    # Compaction runs every 4 appends, so the file overshoots by at most 3
+    assert len(lines) <= 13 and lines[-1] == "cmd 29"
+    assert lines == [f"cmd {i}" for i in range(30 - len(lines), 30)]
+
+def test_search_matches_all_words_newest_first(tmp_path):
+    history = CommandHistory(str(tmp_path / "history.txt"))
+    for cmd in ["create folder called alpha", "list files", "create folder called beta",
+                "delete file called alpha.txt", "create folder called alpha"]:
+        history.append(cmd)
+    history.close()
+    assert [cmd for _, cmd in history.search("create")] == ["create folder called alpha", "create folder called beta"]
+    assert [cmd for _, cmd in history.search("alpha")] == ["create folder called alpha", "delete file called alpha.txt"]
+    assert [cmd for _, cmd in history.search("called al")] == ["create folder called alpha", "delete file called alpha.txt"]
+    assert history.search("folder zeta") == [] and history.search("") == []
+
+def test_incremental_search_steps_to_older_matches(tmp_path):
+    history = CommandHistory(str(tmp_path / "history.txt"))
+    for i in range(5):
+        history.append(f"find files named report{i}")
+    history.close()
+    match = history.search("find rep", limit=1)[0]
+    assert match[1] == "find files named report4"
+    older = history.search("find rep", limit=1, before=match[0])[0]
+    assert older[1] == "find files named report3"
+
+def test_repeated_commands_are_shown_once(tmp_path):
+    history = CommandHistory(str(tmp_path / "history.txt"), memory_entries=4)
+    for cmd in ["list files", "find notes", "list files", "list files"]:
+        history.append(cmd)
+    history.close()
+    assert [cmd for _, cmd in history.search("list", limit=1)] == ["list files"]
+    # Stepping back from the newest "list files" doesn't land on an older copy of it
+    newest = history.search("list", limit=1)[0]
+    assert history.search("list", limit=1, before=newest[0]) == []
+    # Dropping the oldest copy from the window leaves the newest one in place
+    history.index.remove_oldest()
+    assert history.search("files") == [(3, "list files")]
+
+def test_index_follows_in_memory_window(tmp_path):
+    path = tmp_path / "history.txt"
+    history = CommandHistory(str(path), memory_entries=3)
+    for cmd in ["unique oldest", "cmd a", "cmd b", "cmd c"]:
+        history.append(cmd)
+    history.close()
+    assert history.search("unique") == [] and history.index.expand("uni") == []
+    assert [cmd for _, cmd in history.search("cmd")] == ["cmd c", "cmd b", "cmd a"]
+    # Entries loaded from the file at startup are indexed too
+    assert [cmd for _, cmd in CommandHistory(str(path)).search("oldest")] == ["unique oldest"]
+
+def test_trie_counts_follow_removals():
+    index = HistoryIndex()
+    for cmd in ["open report", "open reports", "open readme"]:
+        index.add(cmd)
+    assert sorted(index.expand("re")) == ["readme", "report", "reports"]
+    index.remove_oldest()
+    assert sorted(index.expand("rep")) == ["reports"] and index.search("report") == [(1, "open reports")]
+    index.remove_oldest()
+    assert index.expand("rep") == [] and index.search("rep") == []
+    assert index.search("op") == [(2, "open readme")]
+    assert index.trie.tokens == 2 and index.trie.postings == 2
+
+def test_search_stays_fast_on_large_history():
+    index = HistoryIndex()
+    for i in range(50000):
+        index.add(f"{['create folder', 'find files', 'delete file'][i % 3]} item{i % 2000} part{i}")
+    queries = ["find it", "delete file item42", "create par", "missing words"]
+    start = time.perf_counter()
+    for _ in range(50):
+        for query in queries:
+            index.search(query)
+    # Sub-millisecond in practice; generous bound for slow CI machines
+    assert (time.perf_counter() - start) / (50 * len(queries)) < 0.005
@@ -0,0 +1,46 @@
+import pytest
+
+from src.core.masterAIAgent.endpointPool import EndpointPool, NoHealthyBackendError
+
+def test_least_outstanding_balancing():
+    pool = EndpointPool({"mixtral": ["http://a/api/generate", "http://b/api/generate"]})
+    first, _ = pool.acquire("mixtral")
+    second, _ = pool.acquire("mixtral")
+    assert first is not second
+    pool.release(first, failed=False)
+    assert pool.acquire("mixtral")[0] is first
+
+def test_circuit_breaker_opens_and_half_opens():
+    pool = EndpointPool({"mixtral": ["http://a/api/generate"]}, failure_threshold=2, reset_timeout_sec=30)
+    replica = pool.replicas["mixtral"][0]
+    for _ in range(2):
+        failing, trial = pool.acquire("mixtral")
+        pool.release(failing, True, trial)
+    with pytest.raises(NoHealthyBackendError) as exc:
+        pool.acquire("mixtral")
+    assert exc.value.status_code == 503 and exc.value.retry_after >= 1
+    # After the reset timeout one trial request is let through
+    replica.opened_at -= 30
+    trial_replica, trial = pool.acquire("mixtral")
+    assert trial is not None
+    with pytest.raises(NoHealthyBackendError):
+        pool.acquire("mixtral")
+    pool.release(trial_replica, False, trial)
+    assert pool.get_stats()["mixtral"][0]["breaker"] == "closed"
+
+def test_only_the_trial_resolves_a_half_open_breaker():
+    pool = EndpointPool({"mixtral": ["http://a/api/generate"]}, failure_threshold=1, reset_timeout_sec=30)
+    replica = pool.replicas["mixtral"][0]
+    # In flight since before the breaker opened
+    straggler, straggler_trial = pool.acquire("mixtral")
+    _, ordinary = pool.acquire("mixtral")
+    pool.release(replica, True, ordinary)
+    replica.opened_at -= 30
+    _, trial = pool.acquire("mixtral")
+    # The straggler finishing neither closes the breaker nor lets a second trial in
+    pool.release(straggler, False, straggler_trial)
+    assert pool.get_stats()["mixtral"][0]["breaker"] == "open"
+    with pytest.raises(NoHealthyBackendError):
+        pool.acquire("mixtral")
+    pool.release(replica, True, trial)
+    assert pool.get_stats()["mixtral"][0]["breaker"] == "open" and replica.trial is None
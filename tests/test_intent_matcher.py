@@ -0,0 +1,29 @@
+from src.core.ai_engine import AIEngine
+from src.core.intent_matcher import IntentMatcher
+
+matcher = IntentMatcher(AIEngine.INTENT_PATTERNS)
+
+def test_intent_and_arguments():
+    result = matcher.classify("Create folder called Projects")
+    assert result["intent"] == "create_folder"
+    assert result["folder"] == "projects"
+    assert matcher.classify("find quarterly report.pdf")["query"] == "quarterly report.pdf"
+    assert matcher.classify("delete file called old.txt")["filename"] == "old.txt"
+    assert matcher.classify("make directory")["folder"] == "new_folder"
+
+def test_word_boundaries():
+    # "rm" in "transformers", "info" in "information", "dir" in "directory"
+    for text in ["tell me about transformers", "more information please", "what's in this directory"]:
+        assert matcher.classify(text)["intent"] == "unknown"
+
+def test_dict_order_priority():
+    # list_files is listed before find_files, even though "find" comes first in the text
+    assert matcher.classify("find list files")["intent"] == "list_files"
+    # Overlapping phrases: "system info" (system_status) inside "show system info"
+    assert matcher.classify("show system info")["intent"] == "system_status"
+
+if __name__ == "__main__":
+    test_intent_and_arguments()
+    test_word_boundaries()
+    test_dict_order_priority()
+    print("Intent matcher tests passed.")
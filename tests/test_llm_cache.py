@@ -0,0 +1,51 @@
+import threading
+
+from src.core.masterAIAgent.llmCache import LLMResponseCache
+
+def test_memory_and_disk_tiers(tmp_path):
+    db_path = str(tmp_path / "cache.sqlite3")
+    cache = LLMResponseCache(db_path, max_entries=1)
+    key = cache.make_key("mixtral", "  What is   TESS? ", {"temperature": 0})
+    assert key == cache.make_key("mixtral", "what is tess?", {"temperature": 0})
+    assert key != cache.make_key("mixtral", "what is tess?", {"temperature": 1})
+    assert cache.get(key) is None
+    cache.put(key, "An assistant.")
+    assert cache.get(key) == "An assistant."
+    # Evicted from the single-entry LRU, still served by SQLite
+    cache.put(cache.make_key("mixtral", "other"), "x")
+    assert cache.get(key) == "An assistant."
+    # Survives a restart
+    assert LLMResponseCache(db_path).get(key) == "An assistant."
+    stats = cache.get_stats()
+    assert (stats["memory_hits"], stats["disk_hits"], stats["misses"]) == (1, 1, 1)
+
+def test_code_prompts_keep_case_and_indentation():
+    make_key = LLMResponseCache.make_key
+    assert make_key("codellama", "class Foo: pass", exact=True) != make_key("codellama", "class foo: pass", exact=True)
+    nested = "if a:\n    if b:\n        x()\n    y()"
+    flat = "if a:\n    if b:\n        x()\ny()"
+    assert make_key("codellama", nested, exact=True) != make_key("codellama", flat, exact=True)
+    assert make_key("codellama", f"  {nested}\n", exact=True) == make_key("codellama", nested, exact=True)
+
+def test_ttl_expiry(tmp_path):
+    cache = LLMResponseCache(str(tmp_path / "cache.sqlite3"), ttl_sec=-1)
+    key = cache.make_key("mixtral", "hi")
+    cache.put(key, "hello")
+    assert cache.get(key) is None
+
+def test_lookups_do_not_wait_for_a_write(tmp_path):
+    cache = LLMResponseCache(str(tmp_path / "cache.sqlite3"), max_entries=1)
+    key, other = cache.make_key("mixtral", "a"), cache.make_key("mixtral", "b")
+    cache.put(key, "A")
+    cache.put(other, "B")  # evicts "a" from memory
+    # A write in progress: the write lock held, a transaction open and uncommitted
+    with cache._db_lock:
+        cache._db.execute("INSERT OR REPLACE INTO llm_cache VALUES ('k', 'v', 0, 1e12)")
+        assert cache.get_memory(other) == "B"
+        assert cache.get_memory(key) is None
+        result = []
+        reader = threading.Thread(target=lambda: result.append(cache.get_disk(key)))
+        reader.start()
+        reader.join(timeout=2)
+        assert result == ["A"]
+        cache._db.rollback()
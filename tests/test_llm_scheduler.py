@@ -0,0 +1,47 @@
+import asyncio
+
+import pytest
+
+from src.core.masterAIAgent.llmScheduler import DeadlineExceededError, LLMScheduler, QueueFullError
+
+def test_priority_order_and_queue_limit():
+    async def run():
+        scheduler = LLMScheduler({"mixtral": 1}, max_queue=2)
+        order = []
+        release = asyncio.Event()
+        async def job(name, priority):
+            async with scheduler.slot("mixtral", priority=priority):
+                order.append(name)
+                if name == "first":
+                    await release.wait()
+        first = asyncio.ensure_future(job("first", 0))
+        await asyncio.sleep(0)
+        bulk = asyncio.ensure_future(job("bulk", 1))
+        chat = asyncio.ensure_future(job("chat", 0))
+        await asyncio.sleep(0)
+        assert scheduler.get_stats()["mixtral"]["queued"] == 2
+        with pytest.raises(QueueFullError) as exc:
+            await job("overflow", 0)
+        assert exc.value.status_code == 429 and exc.value.retry_after >= 1
+        release.set()
+        await asyncio.gather(first, bulk, chat)
+        assert order == ["first", "chat", "bulk"]
+        stats = scheduler.get_stats()["mixtral"]
+        assert stats["active"] == 0 and stats["queued"] == 0 and stats["rejected_full"] == 1
+    asyncio.run(run())
+
+def test_deadline_drop():
+    async def run():
+        scheduler = LLMScheduler({"mixtral": 1})
+        async def hold():
+            async with scheduler.slot("mixtral"):
+                await asyncio.sleep(0.2)
+        holder = asyncio.ensure_future(hold())
+        await asyncio.sleep(0)
+        with pytest.raises(DeadlineExceededError):
+            async with scheduler.slot("mixtral", timeout=0.01):
+                pass
+        await holder
+        stats = scheduler.get_stats()["mixtral"]
+        assert stats["dropped_deadline"] == 1 and stats["queued"] == 0 and stats["active"] == 0
+    asyncio.run(run())
@@ -0,0 +1,17 @@
+import json
+
+from src.core.masterAIAgent.logReader import tail_entries, tail_lines
+
+def test_tail_across_blocks(tmp_path):
+    log_path = tmp_path / "log.jsonl"
+    log_path.write_text("".join(json.dumps({"n": i}) + "\n" for i in range(1000)))
+    assert [e["n"] for e in tail_entries(str(log_path), 5)] == [995, 996, 997, 998, 999]
+    # Tiny blocks force many backward reads and lines split across blocks
+    assert tail_lines(str(log_path), 3, block_size=7) == [b'{"n": 997}', b'{"n": 998}', b'{"n": 999}']
+    assert len(tail_entries(str(log_path), 5000)) == 1000
+
+def test_tail_missing_file_and_partial_line(tmp_path):
+    assert tail_entries(str(tmp_path / "missing.jsonl"), 5) == []
+    log_path = tmp_path / "log.jsonl"
+    log_path.write_text('{"n": 1}\n{"n": 2}\n{"n": 3')
+    assert tail_entries(str(log_path), 2) == [{"n": 2}]
@@ -0,0 +1,47 @@
+import gzip
+import json
+import logging
+
+from src.core.log_segments import (
+    SegmentPolicy, SegmentedFileHandler, iter_lines_reversed, iter_segment_lines_reversed, segment_paths
+)
+from src.core.masterAIAgent.logReader import tail_entries
+from src.core.masterAIAgent.logWriter import BackgroundLogWriter
+
+def test_writer_rotates_into_compressed_segments(tmp_path):
+    log_path = str(tmp_path / "log.jsonl")
+    writer = BackgroundLogWriter(log_path, batch_size=10, flush_interval_sec=60,
+                                 rotation=SegmentPolicy(log_path, max_bytes=90, max_segments=3))
+    for i in range(100):
+        writer.write({"n": i})
+    writer.close()
+    segments = segment_paths(log_path)
+    # Oldest segments beyond max_segments are dropped
+    assert [p.rsplit(".", 2)[-2:] for p in segments[1:]] == [["000010", "gz"], ["000009", "gz"], ["000008", "gz"]]
+    assert json.loads(gzip.open(segments[1]).read().splitlines()[0]) == {"n": 90}
+    assert [int(line[6:-1]) for line in iter_lines_reversed(log_path)] == list(range(99, 69, -1))
+    assert [e["n"] for e in tail_entries(log_path, 15)] == list(range(85, 100))
+    # The (empty) active file and the two newest archives only
+    assert [int(line[6:-1]) for line in iter_lines_reversed(log_path, max_segments=3)] == list(range(99, 79, -1))
+
+def test_handler_rolls_over_and_reads_newest_first(tmp_path):
+    log_path = str(tmp_path / "shell.log")
+    logger = logging.getLogger("test_segments")
+    handler = SegmentedFileHandler(log_path, max_bytes=50, compress=False)
+    logger.addHandler(handler)
+    for i in range(20):
+        logger.warning(f"event {i:02d}")
+    logger.removeHandler(handler)
+    handler.close()
+    assert len(segment_paths(log_path)) > 2
+    assert [line.decode() for line in iter_lines_reversed(log_path)] == [f"event {i:02d}" for i in range(19, -1, -1)]
+
+def test_archives_are_read_backwards_in_blocks(tmp_path):
+    log_path = str(tmp_path / "big.log")
+    with open(log_path, "w") as f:
+        f.writelines(f"line {i}\n" for i in range(5000))
+    policy = SegmentPolicy(log_path)
+    policy.rotate()
+    # Blocks far smaller than the archive, and lines that straddle them
+    lines = list(iter_segment_lines_reversed(segment_paths(log_path)[0], block_size=7))
+    assert lines == [f"line {i}".encode() for i in range(4999, -1, -1)]
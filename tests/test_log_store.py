@@ -0,0 +1,33 @@
+import pytest
+
+from src.core.masterAIAgent.logStore import ActionLogStore
+
+def test_filters_and_cursor_pagination(tmp_path):
+    store = ActionLogStore(str(tmp_path / "log.sqlite3"))
+    store.insert_many([
+        {"timestamp": f"2025-11-{day:02d}T10:00:00", "user_id": "u1" if day % 2 else "u2",
+         "action_type": "sandbox" if day % 3 == 0 else "chat", "source": "llm", "day": day}
+        for day in range(1, 21)
+    ])
+    page = store.query(user_id="u1", limit=3)
+    assert [e["day"] for e in page["entries"]] == [19, 17, 15]
+    days = [e["day"] for e in page["entries"]]
+    while page["next_cursor"]:
+        page = store.query(user_id="u1", cursor=page["next_cursor"], limit=3)
+        days += [e["day"] for e in page["entries"]]
+    assert days == list(range(19, 0, -2))
+    # The unfiltered tail's cursor continues where a page of that size would
+    assert store.cursor_after(5) == store.query(limit=5)["next_cursor"]
+    assert store.cursor_after(20) is None
+    window = store.query(action_type="sandbox", since="2025-11-06", until="2025-11-13")
+    assert [e["day"] for e in window["entries"]] == [12, 9, 6]
+    assert window["next_cursor"] is None
+
+def test_rejects_limits_below_one(tmp_path):
+    store = ActionLogStore(str(tmp_path / "log.sqlite3"))
+    store.insert_many([{"timestamp": "2025-11-01T10:00:00", "user_id": "u1"}])
+    for limit in (0, -1, -10):
+        with pytest.raises(ValueError):
+            store.query(user_id="u1", limit=limit)
+        with pytest.raises(ValueError):
+            store.cursor_after(limit)
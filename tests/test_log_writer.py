@@ -0,0 +1,20 @@
+import json
+
+from src.core.masterAIAgent.logWriter import BackgroundLogWriter
+
+def test_batches_and_drains_on_close(tmp_path):
+    log_path = tmp_path / "log.jsonl"
+    writer = BackgroundLogWriter(str(log_path), batch_size=10, flush_interval_sec=60, durability="fsync")
+    for i in range(25):
+        writer.write({"n": i})
+    writer.close()
+    assert [json.loads(line)["n"] for line in log_path.read_text().splitlines()] == list(range(25))
+    assert writer.get_stats()["entries"] == 25
+
+def test_time_threshold_flush(tmp_path):
+    log_path = tmp_path / "log.jsonl"
+    writer = BackgroundLogWriter(str(log_path), batch_size=1000, flush_interval_sec=0.01, durability="none")
+    writer.write({"n": 1})
+    assert writer.flush()
+    assert log_path.read_text() == '{"n": 1}\n'
+    writer.close()
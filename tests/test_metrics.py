@@ -0,0 +1,39 @@
+import threading
+
+from src.core.masterAIAgent.metrics import MetricsRegistry
+
+def test_histogram_buckets_are_cumulative():
+    registry = MetricsRegistry()
+    latency = registry.histogram("stage_seconds", "Stage latency.", ("model",), buckets=(0.1, 1))
+    for value in (0.05, 0.5, 0.5, 3):
+        latency.observe(value, "mixtral")
+    hits = registry.counter("hits_total", "Hits.", ("source",))
+    hits.inc('say "hi"')
+    lines = registry.render().splitlines()
+    assert 'stage_seconds_bucket{model="mixtral",le="0.1"} 1' in lines
+    assert 'stage_seconds_bucket{model="mixtral",le="1"} 3' in lines
+    assert 'stage_seconds_bucket{model="mixtral",le="+Inf"} 4' in lines
+    assert 'stage_seconds_sum{model="mixtral"} 4.05' in lines
+    assert 'stage_seconds_count{model="mixtral"} 4' in lines
+    assert 'hits_total{source="say \\"hi\\""} 1' in lines
+    assert "# TYPE stage_seconds histogram" in lines
+
+def test_updates_from_threads_are_not_lost():
+    registry = MetricsRegistry()
+    latency = registry.histogram("run_seconds", "Run latency.", buckets=(1,))
+    hits = registry.counter("hits_total", "Hits.")
+
+    def record():
+        for _ in range(20000):
+            latency.observe(0.5)
+            hits.inc()
+
+    threads = [threading.Thread(target=record) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    lines = registry.render().splitlines()
+    assert "run_seconds_count 80000" in lines
+    assert 'run_seconds_bucket{le="1"} 80000' in lines
+    assert "hits_total 80000" in lines
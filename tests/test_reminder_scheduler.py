@@ -0,0 +1,57 @@
+import threading
+import time
+from datetime import datetime, timedelta
+
+from src.shell.reminder_scheduler import ReminderScheduler, reminder_due
+
+def collect():
+    fired, done = [], threading.Event()
+    def callback(payload):
+        fired.append(payload)
+        done.set()
+    return fired, done, callback
+
+def test_fires_in_due_order_on_one_thread():
+    fired, _, callback = collect()
+    threads = []
+    scheduler = ReminderScheduler(lambda p: (threads.append(threading.current_thread()), callback(p)))
+    now = time.time()
+    for i in range(200):
+        scheduler.schedule(f"r{i}", now + 0.05 + (199 - i) * 0.0005, i)
+    assert sum(t.name == "aios-reminders" for t in threading.enumerate()) == 1
+    deadline = time.time() + 5
+    while len(fired) < 200 and time.time() < deadline:
+        time.sleep(0.01)
+    scheduler.close()
+    assert fired == list(range(199, -1, -1))
+    assert len(set(threads)) == 1 and len(scheduler) == 0
+
+def test_cancel_and_reschedule():
+    fired, done, callback = collect()
+    scheduler = ReminderScheduler(callback)
+    now = time.time()
+    scheduler.schedule("a", now + 0.05, "a")
+    scheduler.schedule("b", now + 0.1, "b")
+    scheduler.schedule("c", now + 60, "c")
+    assert scheduler.cancel("a") and not scheduler.cancel("missing")
+    # Replacing a key moves it; only the new time counts
+    scheduler.schedule("c", now, "c-now")
+    time.sleep(0.3)
+    scheduler.close()
+    assert fired == ["c-now", "b"]
+
+def test_cancelled_entries_do_not_pile_up():
+    scheduler = ReminderScheduler(lambda payload: None)
+    for i in range(1000):
+        scheduler.schedule(str(i), time.time() + 3600, i)
+        scheduler.cancel(str(i))
+    assert len(scheduler) == 0 and len(scheduler._heap) <= 130
+    scheduler.close()
+
+def test_reminder_due_from_stored_records():
+    created = datetime(2025, 1, 1, 12, 0, 0)
+    due = created + timedelta(seconds=30)
+    assert reminder_due({"task": "x", "due": due.isoformat()}) == due.timestamp()
+    # Records written before the due field: created + seconds
+    assert reminder_due({"task": "x", "reminder_time": "30", "created": created.isoformat()}) == due.timestamp()
+    assert reminder_due({"task": "x", "reminder_time": "manual (via dashboard)", "created": created.isoformat()}) is None
@@ -0,0 +1,18 @@
+from src.core.masterAIAgent.sandboxCache import SandboxResultCache
+
+def test_lru_bounded_by_entries_and_bytes():
+    cache = SandboxResultCache(max_entries=2, max_bytes=200)
+    key = lambda script: SandboxResultCache.make_key(script, "python", {"interpreter": "3.11"})
+    assert key("print(1)") != SandboxResultCache.make_key("print(1)", "python", {"interpreter": "3.12"})
+    cache.put(key("a"), {"output": "a"})
+    cache.put(key("b"), {"output": "b"})
+    assert cache.get(key("a")) == {"output": "a"}  # a is now most recent
+    cache.put(key("c"), {"output": "c"})
+    assert cache.get(key("b")) is None
+    cache.put(key("big"), {"output": "x" * 150})
+    # Over max_bytes: least recently used entries go until it fits
+    assert cache.get(key("a")) is None and cache.get(key("big")) is not None
+    cache.put(key("huge"), {"output": "x" * 500})
+    assert cache.get(key("huge")) is None
+    stats = cache.get_stats()
+    assert stats["bytes"] <= 200 and stats["too_large"] == 1
@@ -0,0 +1,36 @@
+import threading
+import time
+
+import pytest
+
+from src.core.masterAIAgent.llmScheduler import QueueFullError
+from src.core.masterAIAgent.sandboxJobs import SandboxJobQueue
+
+def wait_for(queue, job_id, status):
+    deadline = time.time() + 5
+    while queue.get(job_id).status != status:
+        assert time.time() < deadline
+        time.sleep(0.01)
+    return queue.get(job_id)
+
+def test_jobs_run_in_background_and_queue_is_bounded():
+    release = threading.Event()
+    jobs = SandboxJobQueue(workers=1, max_queue=1)
+    blocking = jobs.submit(lambda: release.wait(5) and {"output": "first"})
+    wait_for(jobs, blocking.job_id, "running")
+    waiting = jobs.submit(lambda: 1 / 0)
+    with pytest.raises(QueueFullError):
+        jobs.submit(lambda: None)
+    release.set()
+    assert wait_for(jobs, blocking.job_id, "done").to_dict()["result"] == {"output": "first"}
+    assert wait_for(jobs, waiting.job_id, "failed").to_dict()["error"] == "division by zero"
+    jobs.close()
+
+def test_finished_results_expire():
+    jobs = SandboxJobQueue(workers=1, result_ttl_sec=0.05)
+    job = jobs.submit(lambda: "ok")
+    wait_for(jobs, job.job_id, "done")
+    time.sleep(0.1)
+    assert jobs.get(job.job_id) is None
+    assert jobs.get_stats()["expired"] == 1
+    jobs.close()
@@ -0,0 +1,105 @@
+import os
+import time
+
+import pytest
+
+from src.core.masterAIAgent.sandboxLimits import LIMITS_SUPPORTED
+from src.core.masterAIAgent.sandboxRunner import ScriptSandbox
+
+pytestmark = pytest.mark.skipif(os.name != "posix", reason="worker pool is POSIX only")
+
+@pytest.fixture
+def sandbox():
+    sandbox = ScriptSandbox(time_limit_sec=2, pool_size=1, max_runs_per_worker=3)
+    yield sandbox
+    sandbox.close()
+
+def test_runs_scripts_on_a_reused_worker(sandbox):
+    assert sandbox.run_script("print('first')")["stdout"] == "first\n"
+    failed = sandbox.run_script("import sys\nprint('partial')\nsys.exit(3)")
+    assert failed.pop("resources")["wall_time_sec"] >= 0
+    assert failed == {"stdout": "partial\n", "stderr": "", "success": False}
+    assert sandbox.pool.get_stats()["started"] == 1
+    error = sandbox.run_script("raise ValueError('bad')")
+    assert "ValueError: bad" in error["stderr"] and not error["success"]
+    # max_runs_per_worker=3: the worker was replaced after the third script
+    assert sandbox.pool.get_stats()["recycled"] == 1
+
+def test_runs_cannot_affect_each_other(sandbox):
+    tamper = (
+        "import builtins, math, os, sys\n"
+        "real_print = builtins.print\n"
+        "builtins.print = lambda *a, **k: real_print('HIJACKED', *a, **k)\n"
+        "math.pi = 3\n"
+        "sys.modules['json'] = None\n"
+        "os.chdir('/')\n"
+        "os.environ['TENANT'] = 'a'\n"
+    )
+    assert sandbox.run_script(tamper)["success"]
+    check = "import json, math, os\nprint(math.pi, os.environ.get('TENANT'), json.dumps(1))"
+    result = sandbox.run_script(check)
+    assert result["stdout"] == "3.141592653589793 None 1\n"
+    # Same worker, clean state: nothing had to be thrown away
+    assert sandbox.pool.get_stats()["started"] == 1
+
+@pytest.mark.skipif(not os.path.isdir("/proc/self/fd"), reason="needs /proc")
+def test_script_gets_no_protocol_fds_and_its_children_are_stopped(sandbox):
+    fds = sandbox.run_script("import os\nprint(sorted(int(fd) for fd in os.listdir('/proc/self/fd')))")
+    # 0-2 plus the fd listdir itself opened
+    assert fds["stdout"] == "[0, 1, 2, 3]\n"
+    forked = sandbox.run_script(
+        "import os, sys, time\n"
+        "pid = os.fork()\n"
+        "if pid == 0:\n"
+        "    time.sleep(30)\n"
+        "    os._exit(0)\n"
+        "print(pid)"
+    )
+    pid = int(forked["stdout"])
+    deadline = time.time() + 2
+    while time.time() < deadline:
+        try:
+            with open(f"/proc/{pid}/status") as f:
+                if "\nState:\tZ" in f.read():
+                    break
+        except FileNotFoundError:
+            break
+        time.sleep(0.02)
+    else:
+        pytest.fail("process forked by the script outlived the run")
+
+def test_timeout_stops_the_script_and_keeps_the_worker(sandbox):
+    timed_out = sandbox.run_script("while True: pass")
+    assert timed_out.pop("resources")["wall_time_sec"] >= 2
+    assert timed_out == {"stdout": "", "stderr": "Execution timed out after 2 seconds.", "success": False}
+    assert sandbox.run_script("print('alive')")["stdout"] == "alive\n"
+    stats = sandbox.pool.get_stats()
+    assert stats["timeouts"] == 1 and stats["started"] == 1
+
+@pytest.mark.skipif(not LIMITS_SUPPORTED, reason="rlimits are enforced on Linux only")
+def test_process_limit_is_set_per_run_not_on_the_worker():
+    import resource
+    # Far below what the user already has running: the worker must still be able to fork
+    sandbox = ScriptSandbox(time_limit_sec=5, pool_size=1, max_processes=1)
+    try:
+        check = "import resource\nprint(resource.getrlimit(resource.RLIMIT_NPROC))"
+        for _ in range(2):
+            result = sandbox.run_script(check)
+            assert result["success"] and result["stdout"] == "(1, 1)\n"
+        [worker] = sandbox.pool._idle
+        assert resource.prlimit(worker.process.pid, resource.RLIMIT_NPROC)[0] != 1
+        assert sandbox.pool.get_stats()["started"] == 1
+    finally:
+        sandbox.close()
+
+def test_failed_fork_fails_the_job_not_the_worker(monkeypatch):
+    from src.core.masterAIAgent import sandboxWorker
+
+    def no_fork():
+        raise BlockingIOError(11, "Resource temporarily unavailable")
+
+    monkeypatch.setattr(sandboxWorker.os, "fork", no_fork)
+    job = {"script": "print('x')", "time_limit_sec": 1, "max_output_bytes": 100, "kill_on_output_limit": False}
+    reply = sandboxWorker.run_job(job, ())
+    assert reply["returncode"] == 1 and not reply["timed_out"]
+    assert "Resource temporarily unavailable" in reply["stderr"]
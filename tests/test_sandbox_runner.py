@@ -0,0 +1,73 @@
+import os
+
+import pytest
+
+from src.core.masterAIAgent.sandboxLimits import LIMITS_SUPPORTED
+from src.core.masterAIAgent.sandboxRunner import ScriptSandbox
+
+FLOOD = "import sys\nfor i in range(10**6):\n    print('x' * 99)\n"
+
+def test_stream_yields_output_then_done():
+    events = list(ScriptSandbox(time_limit_sec=5).stream_script("import sys\nprint('a')\nprint('b', file=sys.stderr)"))
+    assert "".join(e["data"] for e in events if e.get("stream") == "stdout") == "a\n"
+    assert "".join(e["data"] for e in events if e.get("stream") == "stderr") == "b\n"
+    assert set(events[-1].pop("resources")) == {"peak_rss_kb", "user_cpu_sec", "system_cpu_sec", "wall_time_sec"}
+    assert events[-1] == {
+        "done": True, "success": True, "returncode": 0, "truncated": False, "killed": False, "timed_out": False
+    }
+
+def test_output_cap_truncates_or_kills():
+    capped = ScriptSandbox(time_limit_sec=10, max_output_bytes=1000).run_script("print('y' * 5000)")
+    assert capped["stdout"] == "y" * 1000 and capped["truncated"] and capped["success"]
+    killed = ScriptSandbox(time_limit_sec=10, max_output_bytes=1000, kill_on_output_limit=True).run_script(FLOOD)
+    assert len(killed["stdout"]) == 1000 and killed["killed"] and not killed["success"]
+    assert killed["stderr"] == "[Output truncated at 1000 bytes; script stopped]"
+
+def test_timeout_message_unchanged():
+    result = ScriptSandbox(time_limit_sec=1).run_script("while True: pass")
+    assert result.pop("resources")["user_cpu_sec"] > 0.5
+    assert result == {
+        "stdout": "", "stderr": "Execution timed out after 1 seconds.", "success": False
+    }
+
+@pytest.mark.skipif(os.name != "posix", reason="worker pool is POSIX only")
+def test_pooled_output_cap():
+    sandbox = ScriptSandbox(time_limit_sec=10, pool_size=1, max_output_bytes=1000, kill_on_output_limit=True)
+    try:
+        killed = sandbox.run_script(FLOOD)
+        assert len(killed["stdout"]) == 1000 and killed["killed"]
+        after = sandbox.run_script("print('next')")
+        assert after.pop("resources")["peak_rss_kb"] > 0
+        assert after == {"stdout": "next\n", "stderr": "", "success": True}
+        sandbox.kill_on_output_limit = False
+        capped = sandbox.run_script("print('z' * 5000)")
+        assert capped["stdout"] == "z" * 1000 and capped["truncated"] and "killed" not in capped
+    finally:
+        sandbox.close()
+
+@pytest.mark.skipif(not LIMITS_SUPPORTED, reason="rlimits are enforced on Linux only")
+@pytest.mark.parametrize("pool_size", [0, 1])
+def test_memory_and_cpu_limits_enforced(pool_size):
+    sandbox = ScriptSandbox(time_limit_sec=10, memory_limit_mb=200, cpu_limit_sec=1, pool_size=pool_size)
+    try:
+        hog = sandbox.run_script("x = bytearray(400 * 1024 * 1024)\nprint('allocated')")
+        assert "MemoryError" in hog["stderr"] and not hog["success"]
+        spin = sandbox.run_script("while True: pass")
+        assert spin["stderr"].endswith("CPU time limit exceeded.") and not spin["success"]
+        assert sandbox.run_script("print('ok')")["stdout"] == "ok\n"
+    finally:
+        sandbox.close()
+
+@pytest.mark.skipif(not LIMITS_SUPPORTED, reason="rlimits are enforced on Linux only")
+@pytest.mark.parametrize("pool_size", [0, 1])
+def test_limits_are_in_place_before_the_first_statement(pool_size):
+    sandbox = ScriptSandbox(time_limit_sec=10, memory_limit_mb=200, cpu_limit_sec=3, max_file_mb=8, pool_size=pool_size)
+    try:
+        result = sandbox.run_script(
+            "import resource\n"
+            "print(resource.getrlimit(resource.RLIMIT_AS)[0], resource.getrlimit(resource.RLIMIT_CPU)[0],"
+            " resource.getrlimit(resource.RLIMIT_FSIZE)[0])"
+        )
+        assert result["stdout"] == f"{200 * 1024 * 1024} 3 {8 * 1024 * 1024}\n"
+    finally:
+        sandbox.close()
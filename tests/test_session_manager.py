@@ -0,0 +1,28 @@
+import pytest
+
+from src.core.masterAIAgent.sessionManager import RateLimitedError, SessionManager
+
+def test_lru_and_idle_eviction():
+    manager = SessionManager(max_sessions=2, idle_timeout_sec=60)
+    manager.touch("a")
+    manager.touch("b")
+    manager.touch("a")
+    manager.touch("c")  # evicts b, the least recently used
+    assert manager.get("b") is None and manager.get("a") is not None
+    manager.get("a").last_seen -= 120
+    manager.touch("c")
+    assert manager.get("a") is None
+    assert manager.get_stats() == {
+        "active": 1, "max_sessions": 2, "created": 3, "evicted_lru": 1, "evicted_idle": 1, "rate_limited": 0
+    }
+
+def test_token_bucket():
+    manager = SessionManager(llm_rate_per_sec=1, llm_burst=2)
+    session = manager.touch("u")
+    manager.consume_llm(session)
+    manager.consume_llm(session)
+    with pytest.raises(RateLimitedError) as exc:
+        manager.consume_llm(session)
+    assert exc.value.status_code == 429 and exc.value.retry_after == 1
+    session.refilled -= 1  # one second later
+    manager.consume_llm(session)
@@ -0,0 +1,43 @@
+import asyncio
+
+import pytest
+
+from src.core.masterAIAgent.singleFlight import SingleFlight
+
+def test_coalesces_results_and_errors():
+    async def run():
+        flight = SingleFlight()
+        calls = []
+        async def work():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return "answer"
+        results = await asyncio.gather(*(flight.do("k", work) for _ in range(5)))
+        assert results == ["answer"] * 5 and len(calls) == 1
+        async def fail():
+            await asyncio.sleep(0.01)
+            raise RuntimeError("down")
+        errors = await asyncio.gather(flight.do("k", fail), flight.do("k", fail), return_exceptions=True)
+        assert all(isinstance(e, RuntimeError) for e in errors)
+        assert flight.in_flight() == 0
+    asyncio.run(run())
+
+def test_cancelled_waiters_do_not_leak():
+    async def run():
+        flight = SingleFlight()
+        started = asyncio.Event()
+        async def slow():
+            started.set()
+            await asyncio.sleep(10)
+        first = asyncio.ensure_future(flight.do("k", slow))
+        second = asyncio.ensure_future(flight.do("k", slow))
+        await started.wait()
+        first.cancel()
+        await asyncio.sleep(0)
+        assert flight.in_flight() == 1  # second waiter keeps it alive
+        second.cancel()
+        for task in (first, second):
+            with pytest.raises(asyncio.CancelledError):
+                await task
+        assert flight.in_flight() == 0
+    asyncio.run(run())
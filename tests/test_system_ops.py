@@ -0,0 +1,47 @@
+import pytest
+
+from src.shell import system_ops
+
+def make_tree(root):
+    (root / "Reports" / "2024").mkdir(parents=True)
+    (root / "Reports" / "2024" / "q1_report.txt").write_text("q1")
+    (root / "notes.txt").write_text("hello")
+    (root / "Archive").mkdir()
+    (root / "Archive" / "old_REPORT.md").write_text("old")
+
+def test_list_files_puts_folders_first(tmp_path):
+    make_tree(tmp_path)
+    entries = system_ops.list_files(str(tmp_path))
+    assert [(e["name"], e["type"]) for e in entries] == [("Archive", "dir"), ("Reports", "dir"), ("notes.txt", "file")]
+    assert entries[2]["size"] == 5 and entries[0]["size"] is None
+    rendered = system_ops.format_listing(entries)
+    assert "Archive/" in rendered and rendered.endswith("1 file(s), 2 folder(s)")
+
+def test_find_files_matches_names_case_insensitively(tmp_path):
+    make_tree(tmp_path)
+    # A folder's own matches come before those in its subfolders
+    assert system_ops.find_files("report", str(tmp_path)) == {
+        "matches": ["Reports", "Archive/old_REPORT.md", "Reports/2024/q1_report.txt"], "truncated": False
+    }
+    assert system_ops.find_files("*.txt", str(tmp_path))["matches"] == ["notes.txt", "Reports/2024/q1_report.txt"]
+    limited = system_ops.find_files("r", str(tmp_path), limit=2)
+    assert len(limited["matches"]) == 2 and limited["truncated"]
+
+def test_create_and_delete(tmp_path):
+    created = system_ops.create_folder("projects/new", base=str(tmp_path))
+    assert created["created"] and (tmp_path / "projects" / "new").is_dir()
+    assert not system_ops.create_folder("projects/new", base=str(tmp_path))["created"]
+    (tmp_path / "old.txt").write_text("x")
+    assert system_ops.delete_file("old.txt", base=str(tmp_path))["deleted"]
+    assert not (tmp_path / "old.txt").exists()
+    with pytest.raises(FileNotFoundError):
+        system_ops.delete_file("old.txt", base=str(tmp_path))
+    with pytest.raises(IsADirectoryError):
+        system_ops.delete_file("projects", base=str(tmp_path))
+    assert (tmp_path / "projects").is_dir()
+
+def test_system_status_is_structured():
+    status = system_ops.system_status()
+    assert status["cpu_count"] >= 1 and 0 <= status["memory_percent"] <= 100
+    assert status["memory_total"] > 0 and status["uptime_sec"] >= 0
+    assert system_ops.format_status(status).splitlines()[0].startswith("Host:")
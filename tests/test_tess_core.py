@@ -0,0 +1,256 @@
+import asyncio
+import json
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+import src.core.masterAIAgent.TESSCore as tess_core
+from src.core.masterAIAgent.llmScheduler import LLMScheduler
+from src.core.masterAIAgent.logStore import ActionLogStore
+from src.core.masterAIAgent.logWriter import BackgroundLogWriter
+
+client = TestClient(tess_core.app)
+
+@pytest.fixture
+def action_log(monkeypatch, tmp_path):
+    # Route the action log to a temp file; read_entries() drains the writer first
+    log_path = tmp_path / "log.jsonl"
+    writer = BackgroundLogWriter(str(log_path))
+    monkeypatch.setattr(tess_core, "log_writer", writer)
+    def read_entries():
+        writer.flush()
+        return [json.loads(line) for line in log_path.read_text().splitlines()]
+    yield read_entries
+    writer.close()
+
+async def fake_generate_llm(model, prompt, options=None, use_cache=True, task_type="chat"):
+    if prompt == "boom":
+        raise RuntimeError("backend down")
+    return f"{model}: {prompt}"
+
+def test_chat_batch(monkeypatch, action_log):
+    monkeypatch.setattr(tess_core, "generate_llm", fake_generate_llm)
+    actions = [
+        {"user_id": "u1", "input_text": "list files"},
+        {"user_id": "u1", "input_text": "hello there"},
+        {"user_id": "u1", "input_text": "write a parser", "task_type": "code"},
+        {"user_id": "u1", "input_text": "boom"},
+    ]
+    results = client.post("/chat/batch", json={"actions": actions}).json()["results"]
+    assert [r["status"] for r in results] == ["intent", "llm", "llm", "error"]
+    assert results[1]["response"] == "mixtral: hello there"
+    assert results[2]["model"] == "codellama"
+    assert len(action_log()) == 4
+
+def test_chat_batch_runs_models_concurrently_and_logs_rejections(monkeypatch, action_log):
+    started = {}
+
+    async def paired_generate_llm(model, prompt, options=None, use_cache=True, task_type="chat"):
+        # Each model waits for the other to start: only completes if both run at once
+        started.setdefault(model, asyncio.Event()).set()
+        other = "codellama" if model == "mixtral" else "mixtral"
+        await asyncio.wait_for(started.setdefault(other, asyncio.Event()).wait(), 2)
+        return f"{model}: {prompt}"
+
+    monkeypatch.setattr(tess_core, "generate_llm", paired_generate_llm)
+    tess_core.agent_core.sessions.touch("batch-flooder").tokens = 0
+    actions = [
+        {"user_id": "u1", "input_text": "hello there"},
+        {"user_id": "u1", "input_text": "write a parser", "task_type": "code"},
+        {"user_id": "batch-flooder", "input_text": "tell me a joke"},
+    ]
+    results = client.post("/chat/batch", json={"actions": actions}).json()["results"]
+    assert [r["status"] for r in results] == ["llm", "llm", "rejected"]
+    assert [entry["source"] for entry in action_log()] == ["llm", "llm", "rejected"]
+    assert 'tess_chat_resolutions_total{source="rejected"}' in client.get("/metrics").text
+
+def test_vector_tier_confidence():
+    engine = tess_core.agent_ai_engine
+    paraphrase = engine.process_input("what's in this directory")
+    assert paraphrase["intent"] == "list_files"
+    assert paraphrase["tier"] == "vector"
+    assert paraphrase["confidence"] >= 0.6
+    # Paraphrases that aren't among the examples
+    for text, intent in [("make me a new directory", "create_folder"), ("show the folder contents", "list_files"),
+                         ("copy my documents somewhere safe", "backup_data")]:
+        result = engine.process_input(text)
+        assert (result["intent"], result["tier"]) == (intent, "vector") and result["confidence"] >= 0.6, text
+    # Ordinary chat that shares phrasing with the examples but not their subject
+    for text in ["where is my cat", "tell me about this movie", "how is the weather doing",
+                 "tell me about yourself", "how is my mom doing", "What is the weather like today?"]:
+        assert engine.process_input(text)["confidence"] < 0.6, text
+
+def test_every_intent_example_classifies_as_its_intent():
+    engine = tess_core.agent_ai_engine
+    for intent, examples in engine.INTENT_EXAMPLES.items():
+        for text in examples:
+            result = engine.process_input(text)
+            assert result["intent"] == intent and result["confidence"] >= 0.6, text
+
+def test_chat_falls_back_to_llm_for_ordinary_chat(monkeypatch, action_log):
+    monkeypatch.setattr(tess_core, "generate_llm", fake_generate_llm)
+    for text in ["where is my cat", "tell me about this movie", "how is the weather doing"]:
+        response = client.post("/chat", json={"user_id": "u1", "input_text": text}).json()["response"]
+        assert response == f"mixtral: {text}"
+
+def test_logs_count_is_validated(action_log):
+    for count in (-10, -1, 0, tess_core.LOG_MAX_COUNT + 1):
+        assert client.get(f"/logs?count={count}").status_code == 422
+        assert client.get(f"/logs?user_id=nobody&count={count}").status_code == 422
+    assert client.get("/logs?user_id=nobody&count=1").json() == {"entries": [], "next_cursor": None}
+    assert client.get("/logs?cursor=not-a-cursor").status_code == 422
+
+def test_logs_tail_and_query_share_a_shape(monkeypatch, tmp_path):
+    store = ActionLogStore(str(tmp_path / "log.sqlite3"))
+    log_path = str(tmp_path / "log.jsonl")
+    writer = BackgroundLogWriter(log_path, sinks=[store.insert_many])
+    monkeypatch.setattr(tess_core, "log_store", store)
+    monkeypatch.setattr(tess_core, "log_writer", writer)
+    monkeypatch.setattr(tess_core, "LOG_PATH", log_path)
+    try:
+        writer.write_many([{"timestamp": f"2025-11-01T10:00:{n:02d}", "user_id": "u1", "n": n} for n in range(5)])
+        tail = client.get("/logs?count=2").json()
+        assert [e["n"] for e in tail["entries"]] == [3, 4]
+        page = client.get(f"/logs?count=2&cursor={tail['next_cursor']}").json()
+        assert [e["n"] for e in page["entries"]] == [2, 1]
+        assert client.get("/logs?count=5").json()["next_cursor"] is None
+    finally:
+        writer.close()
+
+def test_chat_stream(monkeypatch, action_log):
+    async def fake_stream(model, prompt, options=None):
+        for token in ["Hel", "lo"]:
+            yield token
+    monkeypatch.setattr(tess_core.llm_client, "stream", fake_stream)
+    body = client.post("/chat/stream", json={"user_id": "u1", "input_text": "tell me a joke", "no_cache": True}).text
+    events = [json.loads(line[len("data: "):]) for line in body.splitlines() if line.startswith("data: ")]
+    assert events == [{"token": "Hel"}, {"token": "lo"}, {"done": True, "model": "mixtral"}]
+    [entry] = action_log()
+    assert entry["llm_response"] == "Hello"
+    assert "ttft_ms" in entry
+    assert 'tess_llm_ttft_seconds_count{model="mixtral"}' in client.get("/metrics").text
+
+def test_chat_stream_rate_limited(monkeypatch, action_log):
+    session = tess_core.agent_core.sessions.touch("stream-flooder")
+    session.tokens = 0
+    resp = client.post("/chat/stream", json={"user_id": "stream-flooder", "input_text": "tell me a joke"})
+    assert resp.status_code == 429
+    assert int(resp.headers["Retry-After"]) >= 1
+
+def test_chat_stream_admission_errors_are_http_errors(monkeypatch, action_log):
+    scheduler = LLMScheduler({"mixtral": 1}, max_queue=0)
+    monkeypatch.setattr(tess_core, "llm_scheduler", scheduler)
+    queue = scheduler._queue("mixtral")
+    queue.active = 1
+    resp = client.post("/chat/stream", json={"user_id": "u-full", "input_text": "tell me a joke", "no_cache": True})
+    assert resp.status_code == 429 and int(resp.headers["Retry-After"]) >= 1
+    # Room to queue, but the estimated wait is past the chat deadline
+    queue.max_queue, queue.service_ewma = 8, 1000.0
+    resp = client.post("/chat/stream", json={"user_id": "u-slow", "input_text": "tell me a joke", "no_cache": True})
+    assert resp.status_code == 503 and int(resp.headers["Retry-After"]) >= 1
+
+def test_chat_rate_limited(monkeypatch, action_log):
+    monkeypatch.setattr(tess_core, "generate_llm", fake_generate_llm)
+    session = tess_core.agent_core.sessions.touch("flooder")
+    session.tokens = 0
+    resp = client.post("/chat", json={"user_id": "flooder", "input_text": "tell me a joke"})
+    assert resp.status_code == 429
+    assert int(resp.headers["Retry-After"]) >= 1
+    # Keyword hits never reach the LLM tier and are not rate limited
+    assert client.post("/chat", json={"user_id": "flooder", "input_text": "list files"}).status_code == 200
+    assert client.get("/sessions/stats").json()["rate_limited"] >= 1
+
+def test_metrics_endpoint(monkeypatch, action_log):
+    monkeypatch.setattr(tess_core, "generate_llm", fake_generate_llm)
+    client.post("/chat", json={"user_id": "metrics", "input_text": "list files"})
+    client.post("/chat", json={"user_id": "metrics", "input_text": "boom"})
+    client.get("/no-such-page")
+    body = client.get("/metrics").text
+    assert "tess_intent_match_seconds_count" in body
+    assert 'tess_chat_resolutions_total{source="keyword"}' in body
+    assert 'tess_chat_resolutions_total{source="llm"}' in body
+    assert 'tess_http_requests_total{endpoint="/chat",status="200"}' in body
+    assert 'tess_http_errors_total{endpoint="unmatched",status="404"}' in body
+    assert "tess_http_requests_in_flight 1" in body
+
+def test_request_tracing_and_profiling(monkeypatch, action_log, tmp_path):
+    monkeypatch.setattr(tess_core, "generate_llm", fake_generate_llm)
+    monkeypatch.setattr(tess_core.tracer, "profile_dir", str(tmp_path))
+    monkeypatch.setattr(tess_core, "TRACE_HEADERS_ENABLED", True)
+    response = client.post(
+        "/chat", json={"user_id": "u1", "input_text": "tell me a story"},
+        headers={"X-Request-ID": "req-42", "X-Trace": "1", "X-Profile": "1"}
+    )
+    assert response.headers["X-Request-ID"] == "req-42"
+    spans = client.get("/traces/req-42").json()["spans"]
+    by_name = {s["name"]: s for s in spans}
+    assert by_name["query_llm"]["parent"] == by_name["process"]["id"]
+    assert by_name["query_llm"]["attrs"] == {"model": "mixtral"}
+    assert {"intent_match", "save_log"} <= set(by_name)
+    assert len(list(tmp_path.glob("req-42-*.prof"))) == 1
+    assert action_log()[0]["request_id"] == "req-42"
+    # Untraced requests still get an id, but no trace
+    untraced = client.post("/chat", json={"user_id": "u1", "input_text": "list files"}, headers={"X-Request-ID": "../x"})
+    assert untraced.headers["X-Request-ID"] != "../x"
+    assert client.get(f"/traces/{untraced.headers['X-Request-ID']}").status_code == 404
+
+def test_sandbox_job_endpoints(monkeypatch, action_log):
+    monkeypatch.setattr(tess_core.sandbox, "run_script", lambda script, language: {"stdout": script.upper(), "stderr": ""})
+    submitted = client.post("/sandbox/jobs", json={"user_id": "u1", "script": "print(1)"}, headers={"X-Request-ID": "job-req"})
+    assert submitted.status_code == 202
+    job_id = submitted.json()["job_id"]
+    for _ in range(500):
+        job = client.get(f"/sandbox/jobs/{job_id}").json()
+        if job["status"] == "done":
+            break
+        time.sleep(0.01)
+    assert job["result"] == {"output": "PRINT(1)", "error": "", "cached": False}
+    assert action_log()[0]["request_id"] == "job-req"
+    assert client.get("/sandbox/jobs/unknown").status_code == 404
+
+def test_sandbox_stream_endpoint(action_log):
+    body = client.post("/sandbox/stream", json={"user_id": "u1", "script": "print('hi')"}).text
+    events = [json.loads(line[len("data: "):]) for line in body.splitlines() if line.startswith("data: ")]
+    assert "".join(e.get("data", "") for e in events) == "hi\n"
+    assert events[-1]["done"] and events[-1]["success"]
+    assert action_log()[0]["result"]["output"] == "hi\n"
+
+def test_sandbox_cache_only_keeps_successful_runs(monkeypatch, action_log):
+    runs = []
+    def fake_run_script(script, language):
+        runs.append(script)
+        return {"stdout": "ok", "stderr": "", "success": "fail" not in script, "resources": {"wall_time_sec": 0.1}}
+    monkeypatch.setattr(tess_core.sandbox, "run_script", fake_run_script)
+    monkeypatch.setattr(tess_core.sandbox, "_interpreter_version", "test")
+    monkeypatch.setattr(tess_core, "sandbox_cache", tess_core.SandboxResultCache())
+    task = {"user_id": "ci", "script": "validate()", "cache": True}
+    first = client.post("/sandbox", json=task).json()
+    second = client.post("/sandbox", json=task).json()
+    assert (first["cached"], second["cached"]) == (False, True)
+    assert "resources" in first and "resources" not in second
+    for _ in range(2):
+        assert client.post("/sandbox", json={**task, "script": "fail()"}).json()["cached"] is False
+    assert client.post("/sandbox", json={**task, "cache": False}).json()["cached"] is False
+    assert runs == ["validate()", "fail()", "fail()", "validate()"]
+
+def test_trace_headers_are_off_by_default_and_profiles_capped(monkeypatch, action_log, tmp_path):
+    monkeypatch.setattr(tess_core, "generate_llm", fake_generate_llm)
+    profiles = tmp_path / "profiles"
+    profiles.mkdir()
+    monkeypatch.setattr(tess_core.tracer, "profile_dir", str(profiles))
+    headers = {"X-Request-ID": "req-7", "X-Trace": "1", "X-Profile": "1"}
+    client.post("/chat", json={"user_id": "u1", "input_text": "hi"}, headers=headers)
+    assert client.get("/traces/req-7").status_code == 404 and not list(profiles.iterdir())
+    # Enabled with a secret: only requests that carry it
+    monkeypatch.setattr(tess_core, "TRACE_HEADERS_ENABLED", True)
+    monkeypatch.setattr(tess_core, "TRACE_HEADER_SECRET", "s3cret")
+    client.post("/chat", json={"user_id": "u1", "input_text": "hi"}, headers={**headers, "X-Trace-Secret": "nope"})
+    assert not list(profiles.iterdir())
+    monkeypatch.setattr(tess_core.tracer, "max_profiles", 2)
+    for _ in range(3):
+        client.post("/chat", json={"user_id": "u1", "input_text": "hi"}, headers={**headers, "X-Trace-Secret": "s3cret"})
+        time.sleep(0.01)
+    # The same request id never overwrites a dump; only the newest two are kept
+    assert len(list(profiles.glob("req-7-*.prof"))) == 2
+    assert client.get("/traces/req-7").status_code == 200